@@ -29,13 +29,27 @@ from .exceptions import \
 
 from .enums import \
     XLogMethod, \
+    BackupMethod, \
+    BackupFormat, \
     IsolationLevel, \
     NodeStatus, \
     ProcessType, \
-    DumpFormat
+    DumpFormat, \
+    LogFormat
 
 from .node import PostgresNode
 from .node import PortManager
+from .node_log import PostgresNodeLog
+from .structured_log import LogRecord, StructuredLogReader
+from .resource_sampler import NodeResourceSampler, ResourceSample, ResourceSummary
+from .stats_profile import StatsProfile, StatementStats
+from .replication_monitor import ReplicationMonitor, ReplicationSample, ReplicationLagStats, ReplicationLagSummary
+from .sync_benchmark import SyncReplicationBenchmark, SyncBenchmarkResult
+from .pgbench_result import PgbenchResult, PgbenchInterval, PgbenchScript, PgbenchCommand
+from .tracing import Tracer
+from .pubsub import LogicalCatchup
+from .logical_stream import LogicalStream, LogicalChange, PgOutputDecoder
+from .topology import Topology, TopologyBuilder
 from .node_app import NodeApp
 
 from .utils import \
@@ -68,9 +82,20 @@ __all__ = [
     "TestgresException", "ExecUtilException", "QueryException",
     "QueryTimeoutException",
     "TimeoutException", "CatchUpException", "StartNodeException", "InitNodeException", "BackupException", "InvalidOperationException",
-    "XLogMethod", "IsolationLevel", "NodeStatus", "ProcessType", "DumpFormat",
+    "XLogMethod", "BackupMethod", "BackupFormat", "IsolationLevel", "NodeStatus", "ProcessType", "DumpFormat", "LogFormat",
     "NodeApp",
     "PostgresNode",
+    "PostgresNodeLog",
+    "LogRecord", "StructuredLogReader",
+    "NodeResourceSampler", "ResourceSample", "ResourceSummary",
+    "StatsProfile", "StatementStats",
+    "ReplicationMonitor", "ReplicationSample", "ReplicationLagStats", "ReplicationLagSummary",
+    "SyncReplicationBenchmark", "SyncBenchmarkResult",
+    "PgbenchResult", "PgbenchInterval", "PgbenchScript", "PgbenchCommand",
+    "Tracer",
+    "LogicalCatchup",
+    "LogicalStream", "LogicalChange", "PgOutputDecoder",
+    "Topology", "TopologyBuilder",
     "PortManager",
     "reserve_port", "release_port", "get_bin_path", "get_bin_dir", "get_pg_config", "get_pg_version", "parse_pg_version",
     "First", "Any",
@@ -1,11 +1,18 @@
 # coding: utf-8
 
+import os
+import re
+import sys
+import time
+import typing
+
 from six import raise_from
 
-from .enums import XLogMethod
+from .enums import XLogMethod, BackupMethod, BackupFormat, NodeStatus
 
 from .consts import \
     DATA_DIR, \
+    TAR_DIR, \
     TMP_NODE, \
     TMP_BACKUP, \
     PG_CONF_FILE, \
@@ -13,30 +20,106 @@ from .consts import \
 
 from .exceptions import BackupException
 
+from .tracing import trace_span
+
+from .impl.fast_copy import FastCopy
+
 from testgres.operations.os_ops import OsOperations
+from testgres.operations.local_ops import LocalOperations
 
 from .utils import \
     get_bin_path2, \
     execute_utility2, \
-    clean_on_error
+    clean_on_error, \
+    PgVer
 
 
 class NodeBackup(object):
     """
     Smart object responsible for backups
     """
+    class Stats:
+        """
+        Statistics of a backup.
+        """
+        __slots__ = ["bytes", "duration"]
+
+        # amount of copied data (None if it is unknown)
+        bytes: typing.Optional[int]
+
+        # time of backup in seconds
+        duration: float
+
+        def __init__(self, bytes: typing.Optional[int], duration: float):
+            assert bytes is None or type(bytes) is int
+            assert type(duration) is float
+            self.bytes = bytes
+            self.duration = duration
+
+        @property
+        def rate(self) -> typing.Optional[float]:
+            """
+            Throughput in bytes per second.
+            """
+            if self.bytes is None or self.duration <= 0:
+                return None
+            return self.bytes / self.duration
+
+        def __repr__(self) -> str:
+            return "{}(bytes={}, duration={:.3f})".format(
+                __class__.__name__,
+                self.bytes,
+                self.duration,
+            )
+
+    # progress report of pg_basebackup: "<done>/<total> kB (<pct>%), ..."
+    _C_PROGRESS_REGEX = re.compile(r"(\d+)/\d+ kB")
+
     @property
     def log_file(self):
         assert self.os_ops is not None
         assert isinstance(self.os_ops, OsOperations)
         return self.os_ops.build_path(self.base_dir, BACKUP_LOG_FILE)
 
+    # contents of these directories are not copied by filesystem backup
+    _C_SKIP_CONTENTS = [
+        "pg_dynshmem",
+        "pg_notify",
+        "pg_replslot",
+        "pg_serial",
+        "pg_snapshots",
+        "pg_stat_tmp",
+        "pg_subtrans",
+        "pg_wal",
+        "pg_xlog",
+    ]
+
+    # these files are not copied by filesystem backup
+    _C_SKIP_FILES = [
+        "postmaster.pid",
+        "postmaster.opts",
+        "backup_label",
+        "backup_label.old",
+        "tablespace_map",
+        "tablespace_map.old",
+        "current_logfiles",
+        "pg_internal.init",
+    ]
+
     def __init__(self,
                  node,
                  base_dir=None,
                  username=None,
                  xlog_method=XLogMethod.fetch,
-                 options=None):
+                 options=None,
+                 method=BackupMethod.Basebackup,
+                 format=BackupFormat.plain,
+                 compress=None,
+                 max_rate=None,
+                 checkpoint=None,
+                 incremental=None,
+                 progress=False,
+                 summarize_wal=False):
         """
         Create a new backup.
 
@@ -45,6 +128,23 @@ class NodeBackup(object):
             base_dir: where should we store it?
             username: database user name.
             xlog_method: none | fetch | stream (see docs)
+            method: basebackup | filesystem. Filesystem backup copies the
+                data directory of a local node directly (a running primary
+                is put into backup mode and needs a free replication slot,
+                a stopped node is just copied, a running standby is not
+                supported).
+            format: plain | tar. A tar backup is extracted on spawn (lz4
+                archives need the lz4 utility).
+            compress: compression of pg_basebackup (e.g. 'gzip', 'lz4:1',
+                'server-zstd'). Client side compression requires tar format.
+            max_rate: maximum transfer rate (e.g. 1024 (kB/s) or '32M').
+            checkpoint: fast | spread.
+            incremental: a plain :class:`.NodeBackup` of the same node, this
+                backup contains only blocks changed since it (PostgreSQL 17+).
+            progress: collect the amount of transferred data (see stats).
+            summarize_wal: enable WAL summarization on the node before the
+                backup, so it can be the base of incremental backups
+                (PostgreSQL 17+).
         """
         assert node.os_ops is not None
         assert isinstance(node.os_ops, OsOperations)
@@ -52,9 +152,49 @@ class NodeBackup(object):
         if not options:
             options = []
         self.os_ops = node.os_ops
-        if not node.status():
+
+        if not isinstance(method, BackupMethod):
+            try:
+                method = BackupMethod(method)
+            except ValueError:
+                msg = 'Invalid method "{}"'.format(method)
+                raise BackupException(msg)
+
+        if not isinstance(format, BackupFormat):
+            try:
+                format = BackupFormat(format)
+            except ValueError:
+                msg = 'Invalid format "{}"'.format(format)
+                raise BackupException(msg)
+
+        if method == BackupMethod.Filesystem:
+            if not isinstance(self.os_ops, LocalOperations):
+                raise BackupException('Filesystem backup is supported for local nodes only')
+            if format != BackupFormat.plain or incremental is not None:
+                raise BackupException('Filesystem backup supports neither tar format nor incremental backups')
+        elif not node.status():
             raise BackupException('Node must be running')
 
+        if checkpoint is not None and checkpoint not in ("fast", "spread"):
+            msg = 'Invalid checkpoint "{}"'.format(checkpoint)
+            raise BackupException(msg)
+
+        if incremental is not None:
+            if not isinstance(incremental, NodeBackup):
+                raise BackupException('incremental must be a NodeBackup')
+            if not incremental._available:
+                raise BackupException('Backup is exhausted')
+            if incremental._format != BackupFormat.plain or format != BackupFormat.plain:
+                raise BackupException('Incremental backups require plain format')
+            if node.version < PgVer("17"):
+                raise BackupException('Incremental backups require PostgreSQL 17+')
+
+        if summarize_wal:
+            if node.version < PgVer("17"):
+                raise BackupException('WAL summarization requires PostgreSQL 17+')
+            if method == BackupMethod.Filesystem:
+                raise BackupException('Filesystem backup does not support WAL summarization')
+
         # Check arguments
         if not isinstance(xlog_method, XLogMethod):
             try:
@@ -72,11 +212,36 @@ class NodeBackup(object):
         self.base_dir = base_dir
         self.username = username
 
+        self.stats = None
+
         # private
         self._available = True
+        self._fast_copy = None
+        self._format = format
+        self._incremental_parent = incremental
 
         data_dir = self.os_ops.build_path(self.base_dir, DATA_DIR)
 
+        if method == BackupMethod.Filesystem:
+            start = time.monotonic()
+            with trace_span("backup.filesystem", node=node.name):
+                copier = self._filesystem_backup(node, data_dir)
+            self.stats = __class__.Stats(
+                copier.copied_bytes + copier.reflinked_bytes,
+                time.monotonic() - start,
+            )
+            return
+
+        if format == BackupFormat.tar:
+            data_dir = self.os_ops.build_path(self.base_dir, TAR_DIR)
+
+        if summarize_wal:
+            __class__._enable_wal_summarization(node, username)
+        elif incremental is not None:
+            # a clear error instead of the one of pg_basebackup
+            if node.execute("show summarize_wal", username=username)[0][0] != "on":
+                raise BackupException('summarize_wal is disabled (see summarize_wal option of a full backup)')
+
         _params = [
             get_bin_path2(self.os_ops, "pg_basebackup"),
             "-p", str(node.port),
@@ -85,8 +250,167 @@ class NodeBackup(object):
             "-D", data_dir,
             "-X", xlog_method.value
         ]  # yapf: disable
+
+        if format == BackupFormat.tar:
+            _params += ["-F", "t"]
+
+        if compress is not None:
+            _params += ["-Z", str(compress)]
+
+        if max_rate is not None:
+            _params += ["-r", str(max_rate)]
+
+        if checkpoint is not None:
+            _params += ["-c", checkpoint]
+
+        if incremental is not None:
+            _params += ["-i", incremental._manifest_path()]
+
+        if progress:
+            _params += ["-P"]
+
         _params += options
-        execute_utility2(self.os_ops, _params, self.log_file)
+
+        start = time.monotonic()
+
+        with trace_span("backup.pg_basebackup", node=node.name):
+            exec_r = execute_utility2(self.os_ops, _params, self.log_file, verbose=True)
+
+        self.stats = __class__.Stats(
+            __class__._parse_progress(exec_r[2]) if progress else None,
+            time.monotonic() - start,
+        )
+
+    def _filesystem_backup(self, node, data_dir: str) -> FastCopy:
+        assert type(data_dir) is str
+
+        src_dir = node.data_dir
+
+        if len(self.os_ops.listdir(os.path.join(src_dir, "pg_tblspc"))) > 0:
+            raise BackupException('Filesystem backup does not support tablespaces')
+
+        copier = FastCopy()
+
+        def skip(path: str) -> bool:
+            name = os.path.basename(path)
+            return name in __class__._C_SKIP_FILES or name.startswith("pgsql_tmp")
+
+        if node.status() != NodeStatus.Running:
+            # a stopped node is consistent, WAL is copied as is
+            copier.copy_tree(src_dir, data_dir, skip=skip)
+            return copier
+
+        version = node.version
+
+        if version < PgVer("10"):
+            raise BackupException('Filesystem backup of a running node requires PostgreSQL 10+')
+
+        with node.connect(username=self.username, autocommit=True) as con:
+            # pg_walfile_name() is not available during recovery
+            if con.execute("select pg_catalog.pg_is_in_recovery()")[0][0]:
+                raise BackupException('Filesystem backup of a running standby is not supported')
+
+            max_slots = con.execute("select pg_catalog.current_setting('max_replication_slots')")[0][0]
+
+            if int(max_slots) == 0:
+                raise BackupException('Filesystem backup of a running node requires max_replication_slots > 0')
+
+            # keep WAL of the backup until the end of this session
+            try:
+                con.execute(
+                    "select pg_catalog.pg_create_physical_replication_slot(%s, true, true)",
+                    "testgres_backup_{}".format(con.pid),
+                )
+            except Exception as e:
+                raise_from(BackupException('Failed to create a replication slot for backup'), e)
+
+            label = "testgres backup {}".format(os.path.basename(self.base_dir))
+
+            if version >= PgVer("15"):
+                start_lsn = con.execute("select pg_catalog.pg_backup_start(%s, true)", label)[0][0]
+            else:
+                start_lsn = con.execute("select pg_catalog.pg_start_backup(%s, true, false)", label)[0][0]
+
+            start_wal = con.execute("select pg_catalog.pg_walfile_name(%s)", start_lsn)[0][0]
+
+            copier.copy_tree(
+                src_dir,
+                data_dir,
+                skip_contents=__class__._C_SKIP_CONTENTS,
+                skip=skip,
+            )
+
+            if version >= PgVer("15"):
+                stop_r = con.execute("select labelfile, spcmapfile from pg_catalog.pg_backup_stop(false)")
+            else:
+                stop_r = con.execute("select labelfile, spcmapfile from pg_catalog.pg_stop_backup(false, false)")
+
+            labelfile, spcmapfile = stop_r[0]
+
+            # all the WAL since the start of backup, the end of backup record is there
+            wal_dir = os.path.join(src_dir, "pg_wal")
+
+            for name in sorted(os.listdir(wal_dir)):
+                if __class__._is_wal_required(name, start_wal):
+                    copier.copy_file(os.path.join(wal_dir, name), os.path.join(data_dir, "pg_wal", name))
+                continue
+
+        self.os_ops.makedirs(os.path.join(data_dir, "pg_wal", "archive_status"))
+        self.os_ops.write(os.path.join(data_dir, "backup_label"), labelfile, truncate=True)
+
+        if spcmapfile:
+            self.os_ops.write(os.path.join(data_dir, "tablespace_map"), spcmapfile, truncate=True)
+        return copier
+
+    @staticmethod
+    def _enable_wal_summarization(node, username) -> None:
+        # it is reloadable
+        node.apply_settings({"summarize_wal": True}, username=username)
+
+        # WAL summarizer has to start before the checkpoint of backup,
+        # otherwise the backup can't be a base of incremental backups.
+        node.poll_query_until(
+            "select summarizer_pid is not null from pg_catalog.pg_get_wal_summarizer_state()",
+            username=username,
+            max_attempts=100,
+            sleep_time=0.1,
+        )
+        return
+
+    @staticmethod
+    def _parse_progress(err) -> typing.Optional[int]:
+        if not err:
+            return None
+
+        if type(err) is bytes:
+            err = err.decode(errors="replace")
+
+        # the last report contains the total amount of sent data
+        found = __class__._C_PROGRESS_REGEX.findall(err)
+
+        if not found:
+            return None
+
+        return int(found[-1]) * 1024
+
+    @staticmethod
+    def _is_wal_required(name: str, start_wal: str) -> bool:
+        assert type(name) is str
+        assert type(start_wal) is str
+
+        if name.endswith(".history"):
+            return True
+
+        if len(name) != 24:
+            return False
+
+        try:
+            int(name, 16)
+        except ValueError:
+            return False
+
+        # compare segment numbers, timeline is ignored
+        return name[8:] >= start_wal[8:]
 
     def __enter__(self):
         return self
@@ -98,6 +422,11 @@ class NodeBackup(object):
         """
         Provide a data directory for a copy of node.
 
+        A backup which is not destroyed is an image: it is never started
+        itself, and each spawned node gets its own copy of it. Local copies
+        are cloned by reflink when the file system supports it, so spawns
+        of a big backup are nearly free.
+
         Args:
             destroy: should we convert this backup into a node?
 
@@ -111,7 +440,36 @@ class NodeBackup(object):
         # Do we want to use this backup several times?
         available = not destroy
 
-        if available:
+        if self._incremental_parent is not None:
+            # full backup is reconstructed from the chain
+            dest_base_dir = self.os_ops.mkdtemp(prefix=TMP_NODE)
+
+            try:
+                with trace_span("backup.combine", node=self.original_node.name):
+                    self._combine(self.os_ops.build_path(dest_base_dir, DATA_DIR))
+            except Exception as e:
+                self.os_ops.rmdirs(dest_base_dir, ignore_errors=True)
+                raise_from(BackupException('Failed to combine backups'), e)
+
+            if not available:
+                self.os_ops.rmdirs(self.base_dir, ignore_errors=True)
+        elif self._format == BackupFormat.tar:
+            dest_base_dir = self.os_ops.mkdtemp(prefix=TMP_NODE) if available else self.base_dir
+
+            try:
+                with trace_span("backup.extract", node=self.original_node.name):
+                    self._extract(self.os_ops.build_path(dest_base_dir, DATA_DIR))
+            except Exception as e:
+                if available:
+                    self.os_ops.rmdirs(dest_base_dir, ignore_errors=True)
+                else:
+                    # keep tar files, drop a partially extracted copy
+                    self.os_ops.rmdirs(self.os_ops.build_path(dest_base_dir, DATA_DIR), ignore_errors=True)
+                raise_from(BackupException('Failed to extract files'), e)
+
+            if not available:
+                self.os_ops.rmdirs(self.os_ops.build_path(self.base_dir, TAR_DIR), ignore_errors=True)
+        elif available:
             assert self.os_ops is not None
             assert isinstance(self.os_ops, OsOperations)
 
@@ -122,7 +480,8 @@ class NodeBackup(object):
 
             try:
                 # Copy backup to new data dir
-                self.os_ops.copytree(data1, data2)
+                with trace_span("backup.copy", node=self.original_node.name):
+                    self._copy_data_dir(data1, data2)
             except Exception as e:
                 raise_from(BackupException('Failed to copy files'), e)
         else:
@@ -134,6 +493,103 @@ class NodeBackup(object):
         # Return path to new node
         return dest_base_dir
 
+    def incremental_backup(self, **kwargs):
+        """
+        Take an incremental backup of the original node based on this
+        backup (PostgreSQL 17+). The node must summarize WAL since this
+        backup (see summarize_wal option).
+
+        Spawning of an incremental backup reconstructs a full data
+        directory by pg_combinebackup, so all the backups of the chain
+        must be available.
+
+        Args:
+            kwargs: options of :class:`.NodeBackup` (base_dir, format, ...).
+
+        Returns:
+            A smart object of type NodeBackup.
+        """
+        kwargs.setdefault("username", self.username)
+        return NodeBackup(node=self.original_node, incremental=self, **kwargs)
+
+    @property
+    def chain(self):
+        """
+        Backups of incremental chain from the full backup to this one.
+        """
+        chain = []
+        backup = self
+
+        while backup is not None:
+            chain.insert(0, backup)
+            backup = backup._incremental_parent
+
+        return chain
+
+    def _manifest_path(self):
+        return self.os_ops.build_path(self.base_dir, DATA_DIR, "backup_manifest")
+
+    def _combine(self, data_dir):
+        chain = []
+
+        for backup in self.chain:
+            if not backup._available:
+                raise BackupException('Backup of the chain is exhausted')
+            chain.append(self.os_ops.build_path(backup.base_dir, DATA_DIR))
+            continue
+
+        _params = [get_bin_path2(self.os_ops, "pg_combinebackup"), "-o", data_dir]
+
+        # unchanged files are cloned by the file system when it is possible
+        if isinstance(self.os_ops, LocalOperations) and sys.platform.startswith("linux"):
+            _params += ["--copy-file-range"]
+
+        _params += chain
+
+        execute_utility2(self.os_ops, _params, self.log_file)
+        return
+
+    def _extract(self, data_dir):
+        tar_dir = self.os_ops.build_path(self.base_dir, TAR_DIR)
+
+        # postgres requires restricted permissions of data directory
+        execute_utility2(self.os_ops, ["mkdir", "-m", "0700", "-p", data_dir])
+
+        for name in sorted(self.os_ops.listdir(tar_dir)):
+            if name.startswith("base.tar"):
+                target = data_dir
+            elif name.startswith("pg_wal.tar"):
+                target = self.os_ops.build_path(data_dir, "pg_wal")
+            elif name == "backup_manifest":
+                continue
+            else:
+                raise BackupException('Tablespaces are not supported in tar format')
+
+            tar_file = self.os_ops.build_path(tar_dir, name)
+
+            # tar detects gzip and zstd itself, but not lz4
+            if name.endswith(".lz4"):
+                cmd = ["tar", "--use-compress-program=lz4", "-xf", tar_file, "-C", target]
+            else:
+                cmd = ["tar", "-xf", tar_file, "-C", target]
+
+            execute_utility2(self.os_ops, cmd)
+            continue
+
+        return
+
+    def _copy_data_dir(self, src, dst):
+        if not isinstance(self.os_ops, LocalOperations):
+            self.os_ops.copytree(src, dst)
+            return
+
+        # keep it between spawns, reflink support is probed once
+        if self._fast_copy is None:
+            self._fast_copy = FastCopy()
+
+        self._fast_copy.copy_tree(src, dst)
+        return
+
     def spawn_primary(self, name=None, destroy=True):
         """
         Create a primary node from a backup.
@@ -158,9 +614,13 @@ class NodeBackup(object):
         assert type(node) is self.original_node.__class__
 
         with clean_on_error(node) as node:
-            # Set a new port
+            # Set a new address (port or socket directory)
             node.append_conf(filename=PG_CONF_FILE, line='\n')
-            node.append_conf(filename=PG_CONF_FILE, port=node.port)
+            node._default_conf__address()
+
+            # log_directory of a structured log is absolute, use our own
+            if node._structured_log_format is not None:
+                node.append_conf(log_directory=node.logs_dir)
 
             return node
 
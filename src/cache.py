@@ -8,6 +8,10 @@ from .consts import XLOG_CONTROL_FILE
 
 from .defaults import generate_system_id
 
+from .tracing import trace_span, traced
+
+from .impl.fast_copy import FastCopy
+
 from .exceptions import \
     InitNodeException, \
     ExecUtilException
@@ -20,6 +24,7 @@ from testgres.operations.local_ops import LocalOperations
 from testgres.operations.os_ops import OsOperations
 
 
+@traced("cached_initdb")
 def cached_initdb(data_dir, logfile=None, params=None, os_ops: OsOperations = None, bin_path=None, cached=True):
     """
     Perform initdb or use cached node files.
@@ -63,7 +68,11 @@ def cached_initdb(data_dir, logfile=None, params=None, os_ops: OsOperations = No
 
         try:
             # Copy cached initdb to current data dir
-            os_ops.copytree(cached_data_dir, data_dir)
+            with trace_span("cached_initdb.copy"):
+                if isinstance(os_ops, LocalOperations):
+                    FastCopy().copy_tree(cached_data_dir, data_dir)
+                else:
+                    os_ops.copytree(cached_data_dir, data_dir)
 
             # Assign this node a unique system id if asked to
             if testgres_config.cached_initdb_unique:
@@ -32,9 +32,15 @@ class GlobalConfig(object):
     cache_pg_config = True
     """ shall we cache pg_config results? """
 
+    use_port_lease_registry = False
+    """ reserve local ports through a registry shared by processes (see port_manager__lease_registry.py). """
+
     use_python_logging = False
     """ enable python logging subsystem (see logger.py). """
 
+    use_tracing = False
+    """ collect timing spans of testgres operations (see tracing.py). """
+
     error_log_lines = 20
     """ N of log lines to be shown in exceptions (0=inf). """
 
@@ -1,5 +1,6 @@
 # coding: utf-8
 import logging
+import os
 
 # we support both pg8000 and psycopg2
 try:
@@ -18,6 +19,8 @@ from .defaults import \
 
 from .exceptions import QueryException
 
+from .tracing import trace_span
+
 # export some exceptions
 DatabaseError = pglib.DatabaseError
 InternalError = pglib.InternalError
@@ -34,7 +37,8 @@ class NodeConnection(object):
                  dbname=None,
                  username=None,
                  password=None,
-                 autocommit=False):
+                 autocommit=False,
+                 replication=None):
 
         # Set default arguments
         dbname = dbname or default_dbname()
@@ -42,14 +46,32 @@ class NodeConnection(object):
 
         self._node = node
 
-        self._connection = pglib.connect(
+        conn_params = dict(
             database=dbname,
             user=username,
             password=password,
-            host=node.host,
-            port=node.port
         )
 
+        # "database" opens a logical WAL sender, it accepts replication commands
+        if replication is not None:
+            conn_params["replication"] = replication
+
+        if node.unix_socket_dir is None:
+            conn_params["host"] = node.host
+            conn_params["port"] = node.port
+        elif pglib.__name__ == "pg8000":
+            # pg8000 wants a path to the socket file
+            conn_params["unix_sock"] = os.path.join(
+                node.unix_socket_dir,
+                ".s.PGSQL.{}".format(node.port))
+        else:
+            # libpq treats an absolute path as a socket directory
+            conn_params["host"] = node.unix_socket_dir
+            conn_params["port"] = node.port
+
+        with trace_span("connect", node=node.name, dbname=dbname):
+            self._connection = pglib.connect(**conn_params)
+
         self._connection.autocommit = autocommit
         self._cursor = self.connection.cursor()
 
@@ -116,6 +138,21 @@ class NodeConnection(object):
             logging.error("Error executing query: {}\n {}".format(repr(e), query))
             return None
 
+    def copy(self, query, stream):
+        """
+        Execute COPY ... TO STDOUT or COPY ... FROM STDIN.
+
+        Args:
+            query: COPY statement.
+            stream: a binary file-like object to write to or read from.
+        """
+        if pglib.__name__ == "pg8000":
+            self.cursor.execute(query, stream=stream)
+        else:
+            self.cursor.copy_expert(query, stream)
+
+        return self
+
     def close(self):
         self.cursor.close()
         self.connection.close()
@@ -3,17 +3,21 @@
 # names for dirs in base_dir
 DATA_DIR = "data"
 LOGS_DIR = "logs"
+TAR_DIR = "tar"
 
 # prefixes for temp dirs
 TMP_NODE = 'tgsn_'
 TMP_DUMP = 'tgsd_'
 TMP_CACHE = 'tgsc_'
 TMP_BACKUP = 'tgsb_'
+TMP_SOCKET = 'tgss_'
 
 TMP_TESTGRES = "testgres"
 
 TMP_TESTGRES_PORTS = TMP_TESTGRES + "/ports"
 
+TMP_TESTGRES_PORT_LEASES = TMP_TESTGRES + "/port_leases.db"
+
 # path to control file
 XLOG_CONTROL_FILE = "global/pg_control"
 
@@ -26,6 +30,9 @@ HBA_CONF_FILE = "pg_hba.conf"
 
 # names for log files
 PG_LOG_FILE = "postgresql.log"
+# the logging collector replaces ".log" of PG_LOG_FILE
+PG_CSVLOG_FILE = "postgresql.csv"
+PG_JSONLOG_FILE = "postgresql.json"
 UTILS_LOG_FILE = "utils.log"
 BACKUP_LOG_FILE = "backup.log"
 
@@ -37,6 +44,9 @@ WAL_KEEP_SEGMENTS = 20
 WAL_KEEP_SIZE = 320
 MAX_WAL_SENDERS = 10
 
+# a port of unix-socket-only node (it defines a name of socket file only)
+UNIX_SOCKET_NODE_PORT = 5432
+
 # logical replication settings
 LOGICAL_REPL_MAX_CATCHUP_ATTEMPTS = 60
 
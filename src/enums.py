@@ -2,6 +2,8 @@ from enum import Enum, IntEnum
 from six import iteritems
 from psutil import NoSuchProcess
 
+import re
+
 
 class XLogMethod(Enum):
     """
@@ -13,6 +15,27 @@ class XLogMethod(Enum):
     stream = 'stream'
 
 
+class BackupFormat(Enum):
+    """
+    Available output formats of pg_basebackup for :class:`.NodeBackup`
+    """
+
+    plain = 'plain'
+    tar = 'tar'
+
+
+class BackupMethod(Enum):
+    """
+    Available methods of :class:`.NodeBackup`
+    """
+
+    # pg_basebackup over the replication protocol
+    Basebackup = 'basebackup'
+
+    # local copy of data directory (pg_backup_start/pg_backup_stop or a stopped node)
+    Filesystem = 'filesystem'
+
+
 class IsolationLevel(Enum):
     """
     Transaction isolation level for :class:`.NodeConnection`
@@ -59,37 +82,62 @@ class ProcessType(Enum):
 
     @staticmethod
     def from_process(process):
-        # legacy names for older releases of PG
-        alternative_names = {
-            ProcessType.LogicalReplicationLauncher: [
-                'logical replication worker'
-            ],
-            ProcessType.BackgroundWriter: [
-                'writer'
-            ],
-        }  # yapf: disable
-
         try:
             cmdline = ''.join(process.cmdline())
         except (FileNotFoundError, ProcessLookupError, NoSuchProcess):
             return ProcessType.Unknown
 
+        return ProcessType.from_cmdline(cmdline)
+
+    @staticmethod
+    def from_cmdline(cmdline: str):
+        """
+        Classify a process by its command line (ps display).
+        """
+        assert type(cmdline) is str
+
         # we deliberately cut special words and spaces
         cmdline = cmdline.replace('postgres:', '', 1) \
             .replace('bgworker:', '', 1) \
             .replace(' ', '')
 
-        for ptype in ProcessType:
-            if cmdline.startswith(ptype.value.replace(' ', '')):
-                return ptype
+        m = _C_PROCESS_TYPE_REGEX.match(cmdline)
+
+        if m is None:
+            # default
+            return ProcessType.Unknown
+
+        return _C_PROCESS_TYPE_PREFIXES[m.lastindex - 1][1]
+
+
+def _build_process_type_prefixes():
+    # legacy names for older releases of PG
+    alternative_names = {
+        ProcessType.LogicalReplicationLauncher: [
+            'logical replication worker'
+        ],
+        ProcessType.BackgroundWriter: [
+            'writer'
+        ],
+    }  # yapf: disable
+
+    # the order of prefixes is the order of checks
+    result = [(ptype.value.replace(' ', ''), ptype) for ptype in ProcessType]
+
+    for ptype, names in iteritems(alternative_names):
+        for name in names:
+            result.append((name.replace(' ', ''), ptype))
 
-        for ptype, names in iteritems(alternative_names):
-            for name in names:
-                if cmdline.startswith(name.replace(' ', '')):
-                    return ptype
+    return result
 
-        # default
-        return ProcessType.Unknown
+
+# (prefix without spaces, ProcessType)
+_C_PROCESS_TYPE_PREFIXES = _build_process_type_prefixes()
+
+# one group per prefix, the first matched alternative wins
+_C_PROCESS_TYPE_REGEX = re.compile(
+    '|'.join('({})'.format(re.escape(prefix)) for prefix, _ in _C_PROCESS_TYPE_PREFIXES)
+)
 
 
 class DumpFormat(Enum):
@@ -101,3 +149,12 @@ class DumpFormat(Enum):
     Custom = 'custom'
     Directory = 'directory'
     Tar = 'tar'
+
+
+class LogFormat(Enum):
+    """
+    Structured formats of server log (log_destination)
+    """
+
+    Csv = 'csvlog'
+    Json = 'jsonlog'
@@ -0,0 +1,215 @@
+# coding: utf-8
+
+import errno
+import os
+import shutil
+import stat
+import threading
+import typing
+
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class FastCopy:
+    """
+    Local copy of files and directory trees.
+
+    A file is cloned by reflink (FICLONE) when the file system supports
+    it (btrfs, XFS, ...), so data blocks are shared and copied on write.
+    Otherwise it is copied by copy_file_range/sendfile inside the kernel.
+
+    Hard links are never used: a server modifies its files in place, so
+    a hard-linked copy would be changed too.
+
+    Files of a tree are copied by several threads (jobs), the copying
+    itself is done by the kernel and does not hold the GIL.
+    """
+
+    # _IOW(0x94, 9, int)
+    _C_FICLONE = 0x40049409
+
+    _C_REFLINK_ERRORS = (
+        errno.EOPNOTSUPP,
+        errno.ENOTTY,
+        errno.EXDEV,
+        errno.EINVAL,
+        errno.EBADF,
+        errno.ETXTBSY,
+        errno.EPERM,
+    )
+
+    _C_DEFAULT_JOBS = 4
+
+    _use_reflink: bool
+    _jobs: int
+    _guard: threading.Lock
+    reflinked_files: int
+    reflinked_bytes: int
+    copied_files: int
+    copied_bytes: int
+
+    # --------------------------------------------------------------------
+    def __init__(self, use_reflink: bool = True, jobs: typing.Optional[int] = None):
+        assert type(use_reflink) is bool
+        assert jobs is None or type(jobs) is int
+
+        if jobs is None:
+            jobs = min(__class__._C_DEFAULT_JOBS, os.cpu_count() or 1)
+
+        assert jobs > 0
+
+        self._use_reflink = use_reflink and fcntl is not None
+        self._jobs = jobs
+        self._guard = threading.Lock()
+        self.reflinked_files = 0
+        self.reflinked_bytes = 0
+        self.copied_files = 0
+        self.copied_bytes = 0
+        return
+
+    @property
+    def use_reflink(self) -> bool:
+        return self._use_reflink
+
+    def copy_file(self, src: str, dst: str) -> None:
+        assert type(src) is str
+        assert type(dst) is str
+
+        if self._use_reflink and self._reflink(src, dst):
+            size = os.path.getsize(dst)
+
+            with self._guard:
+                self.reflinked_files += 1
+                self.reflinked_bytes += size
+            return
+
+        shutil.copyfile(src, dst)
+        shutil.copymode(src, dst)
+
+        size = os.path.getsize(dst)
+
+        with self._guard:
+            self.copied_files += 1
+            self.copied_bytes += size
+        return
+
+    def copy_tree(
+        self,
+        src: str,
+        dst: str,
+        skip_contents: typing.Iterable[str] = (),
+        skip: typing.Callable[[str], bool] = None,
+    ) -> None:
+        """
+        Copy a directory tree.
+
+        Args:
+            src: source directory.
+            dst: destination directory (it is created).
+            skip_contents: relative paths of directories which are created empty.
+            skip: a filter of relative paths of files and directories to skip.
+        """
+        assert type(src) is str
+        assert type(dst) is str
+
+        skip_contents = set(os.path.normpath(p) for p in skip_contents)
+
+        os.makedirs(dst, exist_ok=True)
+        shutil.copymode(src, dst)
+
+        # directories are created at once, files are copied later
+        files_to_copy: typing.List[typing.Tuple[str, str]] = []
+
+        for root, dirs, files in os.walk(src):
+            rel_root = os.path.relpath(root, src)
+
+            if rel_root in skip_contents:
+                dirs[:] = []
+                continue
+
+            dst_root = os.path.join(dst, rel_root) if rel_root != "." else dst
+
+            for name in list(dirs):
+                rel = os.path.normpath(os.path.join(rel_root, name))
+                src_path = os.path.join(root, name)
+
+                if skip is not None and skip(rel):
+                    dirs.remove(name)
+                    continue
+
+                if os.path.islink(src_path):
+                    os.symlink(os.readlink(src_path), os.path.join(dst_root, name))
+                    dirs.remove(name)
+                    continue
+
+                os.makedirs(os.path.join(dst_root, name), exist_ok=True)
+                shutil.copymode(src_path, os.path.join(dst_root, name))
+                continue
+
+            for name in files:
+                rel = os.path.normpath(os.path.join(rel_root, name))
+
+                if skip is not None and skip(rel):
+                    continue
+
+                src_path = os.path.join(root, name)
+                dst_path = os.path.join(dst_root, name)
+
+                try:
+                    st = os.lstat(src_path)
+                except FileNotFoundError:
+                    # a file of running server has been removed
+                    continue
+
+                if stat.S_ISLNK(st.st_mode):
+                    os.symlink(os.readlink(src_path), dst_path)
+                    continue
+
+                if not stat.S_ISREG(st.st_mode):
+                    continue
+
+                files_to_copy.append((src_path, dst_path))
+                continue
+            continue
+
+        if self._jobs == 1 or len(files_to_copy) < 2:
+            for src_path, dst_path in files_to_copy:
+                self._copy_tree_file(src_path, dst_path)
+                continue
+            return
+
+        with ThreadPoolExecutor(max_workers=self._jobs) as executor:
+            # list() rethrows an exception of a worker
+            list(executor.map(lambda x: self._copy_tree_file(x[0], x[1]), files_to_copy))
+        return
+
+    # --------------------------------------------------------------------
+    def _copy_tree_file(self, src: str, dst: str) -> None:
+        try:
+            self.copy_file(src, dst)
+        except FileNotFoundError:
+            # a file of running server has been removed
+            pass
+        return
+
+    def _reflink(self, src: str, dst: str) -> bool:
+        assert fcntl is not None
+
+        with open(src, "rb") as fsrc:
+            with open(dst, "wb") as fdst:
+                try:
+                    fcntl.ioctl(fdst.fileno(), __class__._C_FICLONE, fsrc.fileno())
+                except OSError as e:
+                    if e.errno not in __class__._C_REFLINK_ERRORS:
+                        raise
+                    # file system does not support it, don't try again
+                    self._use_reflink = False
+                    return False
+
+        shutil.copymode(src, dst)
+        return True
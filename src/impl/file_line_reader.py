@@ -2,18 +2,33 @@
 
 from . import internal_utils
 
+import codecs
 import typing
 
 from testgres.operations.os_ops import OsOperations
 
 
 class FileLineReader:
+    """
+    Reads a growing text file line by line.
+
+    File is read by blocks with a limited size. A block is decoded
+    incrementally (a multibyte character may be split between blocks),
+    and lines are extracted from it without copying the rest of the
+    buffer. Only an incomplete last line is kept between reads.
+    """
+
+    _C_READ_BLOCK_SIZE = 64 * 1024
+
     _os_ops: OsOperations
     _file_name: str
     _file_encoding: str
     _file_pos: int
-    _buffer_pos: int
-    _buffer: bytes
+    _read_block_size: int
+    _decoder: codecs.IncrementalDecoder
+    _text: str
+    _text_pos: int
+    _partial: typing.List[str]
 
     # --------------------------------------------------------------------
     def __init__(
@@ -21,67 +36,95 @@ class FileLineReader:
         os_ops: OsOperations,
         file_name: str,
         file_encoding: str = "utf-8",
-        file_pos: int = 0
+        file_pos: int = 0,
+        read_block_size: int = _C_READ_BLOCK_SIZE,
     ):
         assert isinstance(os_ops, OsOperations)
         assert type(file_encoding) is str
+        assert type(read_block_size) is int
+        assert read_block_size > 0
         self._os_ops = os_ops
         self._file_name = file_name
         self._file_encoding = file_encoding
         self._file_pos = file_pos
-        self._buffer_pos = 0
-        self._buffer = internal_utils.read_line_to_pos__bin(
+        self._read_block_size = read_block_size
+        self._decoder = codecs.getincrementaldecoder(file_encoding)()
+
+        # the beginning of the current line
+        prefix = internal_utils.read_line_to_pos__bin(
             os_ops,
             file_name,
             file_pos,
         )
+        assert type(prefix) is bytes
+
+        self._text = self._decoder.decode(prefix)
+        self._text_pos = 0
+        self._partial = []
         return
 
     # interface ----------------------------------------------------------
     def read_line(self) -> typing.Optional[str]:
+        lines = self.read_lines(1)
+        assert type(lines) is list
+        assert len(lines) <= 1
+
+        if len(lines) == 0:
+            return None
+
+        return lines[0]
+
+    def read_lines(self, max_n: int) -> typing.List[str]:
+        """
+        Read up to max_n complete lines.
+
+        Returns an empty list when there are not new complete lines.
+        """
+        assert type(max_n) is int
+        assert max_n > 0
         assert isinstance(self._os_ops, OsOperations)
-        assert type(self._buffer_pos) is int
-        assert type(self._buffer) is bytes
-        assert self._buffer_pos >= 0
-        assert self._buffer_pos <= len(self._buffer)
-
-        scan_pos = self._buffer_pos
-
-        while True:
-            sz1 = len(self._buffer)
-
-            if scan_pos == sz1:
-                block = self._os_ops.read_binary(
-                    self._file_name,
-                    self._file_pos,
-                )
-                assert type(block) is bytes
-                self._buffer += block
-                self._file_pos += len(block)
-
-            x = self._buffer.find(b'\n', scan_pos)
-
-            sz2 = len(self._buffer)
-
-            if x == -1:
-                if scan_pos == sz2:
-                    return None
-
-                if self._buffer_pos == 0:
-                    scan_pos = sz2
-                else:
-                    assert self._buffer_pos > 0
-                    self._buffer = self._buffer[self._buffer_pos:]
-                    scan_pos = sz2 - self._buffer_pos
-                    self._buffer_pos = 0
+        assert type(self._text) is str
+        assert type(self._text_pos) is int
+        assert self._text_pos >= 0
+        assert self._text_pos <= len(self._text)
+
+        result: typing.List[str] = []
+
+        while len(result) < max_n:
+            x = self._text.find("\n", self._text_pos)
+
+            if x != -1:
+                s = self._text[self._text_pos:(x + 1)]
+                self._text_pos = x + 1
+
+                if len(self._partial) > 0:
+                    self._partial.append(s)
+                    s = "".join(self._partial)
+                    self._partial = []
+
+                result.append(s)
                 continue
 
-            assert x >= 0
-            assert x < sz2
+            # keep an incomplete line and release the block
+            if self._text_pos < len(self._text):
+                self._partial.append(self._text[self._text_pos:])
+
+            self._text = ""
+            self._text_pos = 0
+
+            block = self._os_ops.read_binary(
+                self._file_name,
+                self._file_pos,
+                self._read_block_size,
+            )
+            assert type(block) is bytes
+            assert len(block) <= self._read_block_size
 
-            b = self._buffer[self._buffer_pos:(x+1)]
+            if len(block) == 0:
+                break
 
-            s = b.decode(self._file_encoding)
+            self._file_pos += len(block)
+            self._text = self._decoder.decode(block)
+            continue
 
-            self._buffer_pos = x + 1
-            return s
+        return result
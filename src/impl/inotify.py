@@ -0,0 +1,180 @@
+# coding: utf-8
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+import sys
+import typing
+
+
+class Inotify:
+    """
+    Thin wrapper around Linux inotify API (via ctypes).
+
+    Descriptor is non-blocking. Use fileno() with select/poll and call
+    read_events() when it is readable.
+    """
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+
+    _C_IN_NONBLOCK = 0o4000
+    _C_IN_CLOEXEC = 0o2000000
+
+    # struct inotify_event: wd, mask, cookie, len
+    _C_EVENT_HEADER = struct.Struct("iIII")
+
+    _C_READ_SIZE = 64 * 1024
+
+    class Event:
+        wd: int
+        mask: int
+        name: str
+
+        def __init__(self, wd: int, mask: int, name: str):
+            assert type(wd) is int
+            assert type(mask) is int
+            assert type(name) is str
+            self.wd = wd
+            self.mask = mask
+            self.name = name
+
+    sm_libc: typing.Optional[ctypes.CDLL] = None
+    sm_libc_is_loaded = False
+
+    _fd: typing.Optional[int]
+
+    # --------------------------------------------------------------------
+    def __init__(self):
+        libc = __class__._get_libc()
+
+        if libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not supported.")
+
+        fd = libc.inotify_init1(__class__._C_IN_NONBLOCK | __class__._C_IN_CLOEXEC)
+
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+        self._fd = fd
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    @staticmethod
+    def is_supported() -> bool:
+        return __class__._get_libc() is not None
+
+    def fileno(self) -> int:
+        assert type(self._fd) is int
+        return self._fd
+
+    def add_watch(self, path: str, mask: int) -> int:
+        assert type(path) is str
+        assert type(mask) is int
+        assert type(self._fd) is int
+
+        libc = __class__._get_libc()
+        assert libc is not None
+
+        wd = libc.inotify_add_watch(self._fd, os.fsencode(path), ctypes.c_uint32(mask))
+
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+
+        assert type(wd) is int
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        assert type(wd) is int
+        assert type(self._fd) is int
+
+        libc = __class__._get_libc()
+        assert libc is not None
+
+        if libc.inotify_rm_watch(self._fd, wd) < 0:
+            err = ctypes.get_errno()
+            # EINVAL: watch was removed by the kernel (directory is deleted)
+            if err != errno.EINVAL:
+                raise OSError(err, os.strerror(err))
+        return
+
+    def read_events(self) -> typing.List[Event]:
+        """
+        Read all the available events. Returns an empty list when there are not any.
+        """
+        assert type(self._fd) is int
+
+        try:
+            data = os.read(self._fd, __class__._C_READ_SIZE)
+        except BlockingIOError:
+            return []
+
+        result: typing.List[__class__.Event] = []
+
+        hdr = __class__._C_EVENT_HEADER
+        pos = 0
+
+        while pos < len(data):
+            wd, mask, _, name_len = hdr.unpack_from(data, pos)
+            pos += hdr.size
+            name = data[pos:pos + name_len].rstrip(b"\0")
+            pos += name_len
+            result.append(__class__.Event(wd, mask, os.fsdecode(name)))
+            continue
+
+        return result
+
+    def close(self) -> None:
+        if self._fd is None:
+            return
+
+        fd = self._fd
+        self._fd = None
+        os.close(fd)
+        return
+
+    # --------------------------------------------------------------------
+    @staticmethod
+    def _get_libc() -> typing.Optional[ctypes.CDLL]:
+        if __class__.sm_libc_is_loaded:
+            return __class__.sm_libc
+
+        libc = None
+
+        if sys.platform.startswith("linux"):
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            except OSError:
+                libc = None
+
+            if libc is not None and not hasattr(libc, "inotify_init1"):
+                libc = None
+
+        if libc is not None:
+            libc.inotify_init1.argtypes = [ctypes.c_int]
+            libc.inotify_init1.restype = ctypes.c_int
+            libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            libc.inotify_add_watch.restype = ctypes.c_int
+            libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+            libc.inotify_rm_watch.restype = ctypes.c_int
+
+        __class__.sm_libc = libc
+        __class__.sm_libc_is_loaded = True
+        return libc
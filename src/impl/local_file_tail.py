@@ -0,0 +1,151 @@
+# coding: utf-8
+
+import codecs
+import os
+import typing
+
+
+class LocalFileTail:
+    """
+    Follows a local text file through an open descriptor.
+
+    It returns complete lines only. Rotation (the file is replaced)
+    and truncation are detected when the end of the file is reached.
+    """
+
+    _C_READ_SIZE = 64 * 1024
+
+    _file_name: str
+    _file_encoding: str
+    _file: typing.Optional[typing.BinaryIO]
+    _file_ino: typing.Optional[int]
+    _file_pos: int
+    _tail: bytes
+
+    # --------------------------------------------------------------------
+    def __init__(
+        self,
+        file_name: str,
+        file_encoding: str = "utf-8",
+    ):
+        assert type(file_name) is str
+        assert type(file_encoding) is str
+
+        codecs.lookup(file_encoding)  # raise
+
+        self._file_name = file_name
+        self._file_encoding = file_encoding
+        self._file = None
+        self._file_ino = None
+        self._file_pos = 0
+        self._tail = b""
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    # interface ----------------------------------------------------------
+    @property
+    def file_name(self) -> str:
+        return self._file_name
+
+    def read_lines(self) -> typing.List[str]:
+        """
+        Read all the complete lines which are available now.
+        """
+        result: typing.List[str] = []
+
+        while True:
+            if self._file is None and not self._open():
+                break
+
+            self._read_available(result)
+
+            if not self._file_was_replaced():
+                break
+
+            # Read the rest of the old file and switch to the new one
+            self._read_available(result)
+            self._close_file()
+            continue
+
+        return result
+
+    def close(self) -> None:
+        self._close_file()
+        return
+
+    # --------------------------------------------------------------------
+    def _open(self) -> bool:
+        assert self._file is None
+
+        try:
+            f = open(self._file_name, "rb", buffering=0)
+        except FileNotFoundError:
+            return False
+
+        self._file = f
+        self._file_ino = os.fstat(f.fileno()).st_ino
+        self._file_pos = 0
+        self._tail = b""
+        return True
+
+    def _close_file(self) -> None:
+        if self._file is None:
+            return
+
+        f = self._file
+        self._file = None
+        self._file_ino = None
+        f.close()
+        return
+
+    def _read_available(self, result: typing.List[str]) -> None:
+        assert self._file is not None
+        assert type(result) is list
+
+        if os.fstat(self._file.fileno()).st_size < self._file_pos:
+            # truncated
+            self._file.seek(0)
+            self._file_pos = 0
+            self._tail = b""
+
+        while True:
+            block = self._file.read(__class__._C_READ_SIZE)
+
+            if not block:
+                break
+
+            self._file_pos += len(block)
+
+            data = self._tail + block
+            x = data.rfind(b"\n")
+
+            if x == -1:
+                self._tail = data
+                continue
+
+            self._tail = data[x + 1:]
+
+            start = 0
+            while start <= x:
+                end = data.index(b"\n", start, x + 1)
+                result.append(data[start:end + 1].decode(self._file_encoding))
+                start = end + 1
+                continue
+            continue
+        return
+
+    def _file_was_replaced(self) -> bool:
+        assert self._file is not None
+
+        try:
+            st = os.stat(self._file_name)
+        except FileNotFoundError:
+            # file was moved, but a new file is not created yet
+            return False
+
+        return st.st_ino != self._file_ino
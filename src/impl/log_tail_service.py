@@ -0,0 +1,431 @@
+# coding: utf-8
+
+from ..exceptions import ExecUtilException
+
+from .file_line_reader import FileLineReader
+from .inotify import Inotify
+from .local_file_tail import LocalFileTail
+
+from testgres.operations.os_ops import OsOperations
+from testgres.operations.local_ops import LocalOperations
+
+import logging
+import os
+import select
+import threading
+import time
+import typing
+
+
+class LogTailService:
+    """
+    One thread which follows log files of all the registered subscriptions.
+
+    Local files are watched through one inotify descriptor (a watch per
+    directory). Other files (remote, or when inotify is not supported)
+    are polled with an exponential backoff.
+    """
+
+    _C_SLEEP_MIN = 0.01
+    _C_SLEEP_MAX = 60
+
+    # max count of lines of polled file to dispatch at once
+    _C_POLL_BATCH_SIZE = 1000
+
+    _C_INOTIFY_MASK = (
+        Inotify.IN_MODIFY
+        | Inotify.IN_CLOSE_WRITE
+        | Inotify.IN_CREATE
+        | Inotify.IN_MOVED_TO
+        | Inotify.IN_DELETE
+    )
+
+    class Subscription:
+        """
+        Log file of one node. It is used once: register -> unregister.
+        """
+        file_name: str
+        file_encoding: str
+        os_ops: OsOperations
+        on_line: typing.Callable[[str], None]
+        on_error: typing.Callable[[Exception], None]
+
+        def __init__(
+            self,
+            file_name: str,
+            file_encoding: str,
+            os_ops: OsOperations,
+            on_line: typing.Callable[[str], None],
+            on_error: typing.Callable[[Exception], None],
+        ):
+            assert type(file_name) is str
+            assert type(file_encoding) is str
+            assert isinstance(os_ops, OsOperations)
+            assert callable(on_line)
+            assert callable(on_error)
+
+            self.file_name = file_name
+            self.file_encoding = file_encoding
+            self.os_ops = os_ops
+            self.on_line = on_line
+            self.on_error = on_error
+
+            self._is_registered = False
+            self._stopped = threading.Event()
+
+            # state of the service thread
+            self._reader: typing.Union[None, LocalFileTail, FileLineReader] = None
+            self._dir_wd: typing.Optional[int] = None
+            self._base_name = os.path.basename(file_name)
+            self._sleep_time = LogTailService._C_SLEEP_MIN
+            self._next_poll_time = 0.0
+            return
+
+        def is_active(self) -> bool:
+            return self._is_registered and not self._stopped.is_set()
+
+        def wait(self, timeout: typing.Optional[float] = None) -> bool:
+            return self._stopped.wait(timeout)
+
+    sm_single_instance: typing.Optional["LogTailService"] = None
+    sm_single_instance_guard = threading.Lock()
+
+    _guard: threading.Lock
+    _pid: typing.Optional[int]
+    _thread: typing.Optional[threading.Thread]
+    _pending_add: typing.List[Subscription]
+    _pending_remove: typing.List[Subscription]
+    _wakeup_r: typing.Optional[int]
+    _wakeup_w: typing.Optional[int]
+
+    # state of the service thread
+    _inotify: typing.Optional[Inotify]
+    _subscriptions: typing.List[Subscription]
+
+    # --------------------------------------------------------------------
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._reset()
+        return
+
+    @staticmethod
+    def get_single_instance() -> "LogTailService":
+        assert __class__ == LogTailService
+        assert __class__.sm_single_instance_guard is not None
+
+        if __class__.sm_single_instance is not None:
+            assert type(__class__.sm_single_instance) is __class__
+            return __class__.sm_single_instance
+
+        with __class__.sm_single_instance_guard:
+            if __class__.sm_single_instance is None:
+                __class__.sm_single_instance = __class__()
+        assert __class__.sm_single_instance is not None
+        assert type(__class__.sm_single_instance) is __class__
+        return __class__.sm_single_instance
+
+    # interface ----------------------------------------------------------
+    def register(self, subscription: Subscription) -> None:
+        assert type(subscription) is __class__.Subscription
+
+        with self._guard:
+            if subscription._is_registered:
+                raise RuntimeError("Log subscription can only be registered once.")
+
+            self._start_thread_if_needed()
+
+            subscription._is_registered = True
+            self._pending_add.append(subscription)
+            self._wakeup()
+        return
+
+    def unregister(self, subscription: Subscription, wait: bool = True) -> None:
+        """
+        Stop following the file. The lines which are already written are
+        dispatched before it.
+        """
+        assert type(subscription) is __class__.Subscription
+        assert type(wait) is bool
+
+        with self._guard:
+            if not subscription.is_active():
+                return
+
+            if self._pid != os.getpid():
+                # a service thread of the parent process does not exist here
+                subscription._stopped.set()
+                return
+
+            self._pending_remove.append(subscription)
+            self._wakeup()
+
+        if wait:
+            subscription.wait()
+        return
+
+    @property
+    def thread(self) -> typing.Optional[threading.Thread]:
+        return self._thread
+
+    # --------------------------------------------------------------------
+    def _reset(self) -> None:
+        self._pid = None
+        self._thread = None
+        self._pending_add = []
+        self._pending_remove = []
+        self._wakeup_r = None
+        self._wakeup_w = None
+        self._inotify = None
+        self._subscriptions = []
+        return
+
+    def _start_thread_if_needed(self) -> None:
+        # self._guard is locked
+
+        if self._pid != os.getpid():
+            # a new process (fork), threads and descriptors of parent are not our
+            self._reset()
+            self._pid = os.getpid()
+
+        if self._thread is not None:
+            return
+
+        self._wakeup_r, self._wakeup_w = os.pipe()
+
+        if Inotify.is_supported():
+            self._inotify = Inotify()
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name="testgres-log-tail",
+            daemon=True,
+        )
+        self._thread.start()
+        return
+
+    def _wakeup(self) -> None:
+        # self._guard is locked
+        assert type(self._wakeup_w) is int
+        os.write(self._wakeup_w, b"x")
+        return
+
+    def _run(self) -> None:
+        wakeup_r = self._wakeup_r
+        assert type(wakeup_r) is int
+
+        # None - all the watched files should be read
+        changed: typing.Optional[typing.Set[typing.Tuple[int, str]]] = set()
+
+        try:
+            while True:
+                with self._guard:
+                    added = self._pending_add
+                    removed = self._pending_remove
+                    self._pending_add = []
+                    self._pending_remove = []
+
+                for subscription in added:
+                    self._attach(subscription)
+                    continue
+
+                for subscription in removed:
+                    self._detach(subscription, drain=True)
+                    continue
+
+                timeout = self._dispatch(changed)
+
+                rlist = [wakeup_r]
+                if self._inotify is not None:
+                    rlist.append(self._inotify.fileno())
+
+                # no CPU is consumed while the watched files are not changed
+                ready, _, _ = select.select(rlist, [], [], timeout)
+
+                changed = set()
+
+                if wakeup_r in ready:
+                    os.read(wakeup_r, 4096)
+
+                if self._inotify is not None and self._inotify.fileno() in ready:
+                    changed = self._read_inotify_events()
+                continue
+        except Exception as e:
+            logging.error("[log tail service] {}".format(e))
+            raise
+        finally:
+            with self._guard:
+                for subscription in self._subscriptions + self._pending_add:
+                    subscription._stopped.set()
+                    continue
+                self._subscriptions = []
+                self._pending_add = []
+                self._pending_remove = []
+                self._thread = None
+        return
+
+    def _read_inotify_events(self) -> typing.Optional[typing.Set[typing.Tuple[int, str]]]:
+        assert self._inotify is not None
+
+        changed: typing.Optional[typing.Set[typing.Tuple[int, str]]] = set()
+
+        for e in self._inotify.read_events():
+            if e.mask & Inotify.IN_Q_OVERFLOW:
+                changed = None
+                continue
+
+            if e.mask & Inotify.IN_IGNORED:
+                # directory is deleted, these files will be polled
+                for subscription in self._subscriptions:
+                    if subscription._dir_wd == e.wd:
+                        subscription._dir_wd = None
+                    continue
+                continue
+
+            if changed is not None:
+                changed.add((e.wd, e.name))
+            continue
+
+        return changed
+
+    def _dispatch(
+        self,
+        changed: typing.Optional[typing.Set[typing.Tuple[int, str]]]
+    ) -> typing.Optional[float]:
+        """
+        Read the changed files. Returns a timeout to the next poll.
+        """
+        now = time.monotonic()
+        next_poll_time: typing.Optional[float] = None
+
+        for subscription in list(self._subscriptions):
+            if subscription._dir_wd is not None:
+                if changed is None or (subscription._dir_wd, subscription._base_name) in changed:
+                    self._read(subscription)
+                continue
+
+            if now >= subscription._next_poll_time:
+                if self._read(subscription):
+                    subscription._sleep_time = __class__._C_SLEEP_MIN
+                else:
+                    subscription._sleep_time = min(__class__._C_SLEEP_MAX, 2 * subscription._sleep_time)
+                subscription._next_poll_time = now + subscription._sleep_time
+
+            if subscription not in self._subscriptions:
+                continue
+
+            if next_poll_time is None or subscription._next_poll_time < next_poll_time:
+                next_poll_time = subscription._next_poll_time
+            continue
+
+        if next_poll_time is None:
+            return None
+
+        return max(0.0, next_poll_time - now)
+
+    def _attach(self, subscription: Subscription) -> None:
+        assert type(subscription) is __class__.Subscription
+        assert subscription._reader is None
+
+        try:
+            if self._inotify is not None and isinstance(subscription.os_ops, LocalOperations):
+                subscription._reader = LocalFileTail(subscription.file_name, subscription.file_encoding)
+
+                log_dir = os.path.dirname(os.path.abspath(subscription.file_name))
+
+                try:
+                    subscription._dir_wd = self._inotify.add_watch(log_dir, __class__._C_INOTIFY_MASK)
+                except OSError as e:
+                    logging.warning("[log tail service] Can't watch directory [{}]: {}".format(log_dir, e))
+                    subscription._dir_wd = None
+            elif isinstance(subscription.os_ops, LocalOperations):
+                subscription._reader = LocalFileTail(subscription.file_name, subscription.file_encoding)
+            else:
+                subscription._reader = FileLineReader(
+                    subscription.os_ops,
+                    subscription.file_name,
+                    subscription.file_encoding,
+                )
+        except Exception as e:
+            subscription.on_error(e)
+            subscription._stopped.set()
+            return
+
+        self._subscriptions.append(subscription)
+
+        # lines written before registration
+        self._read(subscription)
+        return
+
+    def _detach(self, subscription: Subscription, drain: bool) -> None:
+        assert type(subscription) is __class__.Subscription
+        assert type(drain) is bool
+
+        if subscription not in self._subscriptions:
+            subscription._stopped.set()
+            return
+
+        if drain:
+            self._read(subscription)
+
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+
+        wd = subscription._dir_wd
+        subscription._dir_wd = None
+
+        if wd is not None and not any(s._dir_wd == wd for s in self._subscriptions):
+            assert self._inotify is not None
+            self._inotify.rm_watch(wd)
+
+        if isinstance(subscription._reader, LocalFileTail):
+            subscription._reader.close()
+
+        subscription._reader = None
+        subscription._stopped.set()
+        return
+
+    def _read(self, subscription: Subscription) -> bool:
+        """
+        Dispatch new lines of file. Returns True when lines were read.
+        """
+        assert type(subscription) is __class__.Subscription
+
+        try:
+            if isinstance(subscription._reader, LocalFileTail):
+                lines = subscription._reader.read_lines()
+            else:
+                lines = __class__._read_lines__polling(subscription)
+
+            for line in lines:
+                subscription.on_line(line)
+                continue
+        except Exception as e:
+            subscription.on_error(e)
+            self._detach(subscription, drain=False)
+            return False
+
+        return len(lines) > 0
+
+    @staticmethod
+    def _read_lines__polling(subscription: Subscription) -> typing.List[str]:
+        assert type(subscription._reader) is FileLineReader
+
+        try:
+            # the rest is read by the next poll (it comes at once)
+            return subscription._reader.read_lines(__class__._C_POLL_BATCH_SIZE)  # raise
+        except Exception as e:
+            if __class__._is_file_not_found_exception(e):
+                if not subscription.os_ops.path_exists(subscription.file_name):
+                    return []
+            raise
+
+    @staticmethod
+    def _is_file_not_found_exception(e: Exception) -> bool:
+        if isinstance(e, FileNotFoundError):
+            return True
+
+        if isinstance(e, ExecUtilException):
+            if e.exit_code == 2:
+                return True
+
+        return False
@@ -1,9 +1,12 @@
 from testgres.operations.os_ops import OsOperations
+from testgres.operations.local_ops import LocalOperations
 
 from ..port_manager import PortManager
 from ..exceptions import PortForException
 from .. import consts
 
+import concurrent.futures
+import copy
 import threading
 import random
 import typing
@@ -40,15 +43,54 @@ class PortManager__Generic2(PortManager):
     _C_MIN_PORT_NUMBER = 1024
     _C_MAX_PORT_NUMBER = 65535
 
+    # How many candidates do we check in one reserve_port call?
+    _C_MAX_PROBE_COUNT = 100
+
+    # How many candidates do we check at once (in parallel) on a remote host?
+    _C_PROBE_BATCH_SIZE = 8
+
+    # Values of _port_states items
+    _C_PORT_IS_AVAILABLE = 0
+    _C_PORT_IS_RESERVED = 1
+
+    class Statistics:
+        reserve_count: int
+        release_count: int
+        probe_count: int
+        probe_failure_count: int
+        lock_failure_count: int
+
+        def __init__(self):
+            self.reserve_count = 0
+            self.release_count = 0
+            self.probe_count = 0
+            self.probe_failure_count = 0
+            self.lock_failure_count = 0
+            return
+
+        def __repr__(self) -> str:
+            return "{}(reserve_count={}, release_count={}, probe_count={}, probe_failure_count={}, lock_failure_count={})".format(
+                type(self).__name__,
+                self.reserve_count,
+                self.release_count,
+                self.probe_count,
+                self.probe_failure_count,
+                self.lock_failure_count,
+            )
+
     _os_ops: OsOperations
     _guard: typing.Any
 
-    # TODO: is there better to use bitmap fot _available_ports?
-    _available_ports: typing.Set[int]
+    # One byte per port: _C_PORT_IS_AVAILABLE or _C_PORT_IS_RESERVED
+    _port_states: bytearray
+    # Index of the next candidate in _port_states
+    _cursor: int
     _reserved_ports: typing.Dict[int, OsLockFsObj]
 
     _lock_dir: typing.Optional[str]
 
+    _stats: Statistics
+
     def __init__(self, os_ops: OsOperations):
         assert __class__._C_MIN_PORT_NUMBER <= __class__._C_MAX_PORT_NUMBER
 
@@ -57,19 +99,29 @@ class PortManager__Generic2(PortManager):
         self._os_ops = os_ops
         self._guard = threading.Lock()
 
-        self._available_ports = set(
-            range(__class__._C_MIN_PORT_NUMBER, __class__._C_MAX_PORT_NUMBER + 1)
-        )
-        assert len(self._available_ports) == (
-            (__class__._C_MAX_PORT_NUMBER - __class__._C_MIN_PORT_NUMBER) + 1
-        )
+        port_count = (__class__._C_MAX_PORT_NUMBER - __class__._C_MIN_PORT_NUMBER) + 1
+        self._port_states = bytearray(port_count)
+        assert len(self._port_states) == port_count
+        assert __class__._C_PORT_IS_AVAILABLE == 0
+
+        # Different managers (processes) start from different points
+        self._cursor = random.randrange(port_count)
         self._reserved_ports = dict()
         self._lock_dir = None
+        self._stats = __class__.Statistics()
         return
 
+    @property
+    def stats(self) -> Statistics:
+        """
+        Returns a copy of the current statistics.
+        """
+        with self._guard:
+            return copy.copy(self._stats)
+
     def reserve_port(self) -> int:
         assert self._guard is not None
-        assert type(self._available_ports) is set
+        assert type(self._port_states) is bytearray
         assert type(self._reserved_ports) is dict
         assert isinstance(self._os_ops, OsOperations)
 
@@ -85,43 +137,59 @@ class PortManager__Generic2(PortManager):
             assert self._lock_dir is not None
             assert type(self._lock_dir) is str
 
-            t = tuple(self._available_ports)
-            assert len(t) == len(self._available_ports)
-            sampled_ports = random.sample(t, min(len(t), 100))
-            t = None
-
-            for port in sampled_ports:
-                assert type(port) is int
-                assert port not in self._reserved_ports
-                assert port in self._available_ports
-
-                assert port >= __class__._C_MIN_PORT_NUMBER
-                assert port <= __class__._C_MAX_PORT_NUMBER
+            nProbe = 0
 
-                if not self._os_ops.is_port_free(port):
-                    continue
+            while nProbe < __class__._C_MAX_PROBE_COUNT:
+                batch_size = min(
+                    __class__._C_PROBE_BATCH_SIZE,
+                    __class__._C_MAX_PROBE_COUNT - nProbe,
+                )
 
-                try:
-                    lock_path = self.helper__make_lock_path(port)
-                    lock_obj = OsLockFsObj(self._os_ops, lock_path)  # raise
-                except:  # noqa: E722
-                    continue
+                candidates = self._get_candidates(batch_size)
+                assert type(candidates) is list
 
-                assert isinstance(lock_obj, OsLockFsObj)
-                assert self._os_ops.path_exists(lock_path)
+                if len(candidates) == 0:
+                    break
 
-                try:
-                    self._reserved_ports[port] = lock_obj
-                except:  # noqa: E722
+                for port, is_free in self._probe_ports(candidates):
+                    assert type(port) is int
+                    assert type(is_free) is bool
                     assert port not in self._reserved_ports
-                    lock_obj.release()
-                    raise
 
-                self._available_ports.discard(port)
-                assert port in self._reserved_ports
-                assert port not in self._available_ports
-                __class__.helper__send_debug_msg("Port {} is reserved.", port)
-                return port
+                    assert port >= __class__._C_MIN_PORT_NUMBER
+                    assert port <= __class__._C_MAX_PORT_NUMBER
+
+                    nProbe += 1
+                    self._stats.probe_count += 1
+
+                    if not is_free:
+                        self._stats.probe_failure_count += 1
+                        continue
+
+                    try:
+                        lock_path = self.helper__make_lock_path(port)
+                        lock_obj = OsLockFsObj(self._os_ops, lock_path)  # raise
+                    except:  # noqa: E722
+                        self._stats.lock_failure_count += 1
+                        continue
+
+                    assert isinstance(lock_obj, OsLockFsObj)
+                    assert self._os_ops.path_exists(lock_path)
+
+                    try:
+                        self._reserved_ports[port] = lock_obj
+                    except:  # noqa: E722
+                        assert port not in self._reserved_ports
+                        lock_obj.release()
+                        raise
+
+                    i = port - __class__._C_MIN_PORT_NUMBER
+                    assert self._port_states[i] == __class__._C_PORT_IS_AVAILABLE
+                    self._port_states[i] = __class__._C_PORT_IS_RESERVED
+                    self._stats.reserve_count += 1
+                    assert port in self._reserved_ports
+                    __class__.helper__send_debug_msg("Port {} is reserved.", port)
+                    return port
 
         raise PortForException("Can't select a port.")
 
@@ -133,18 +201,78 @@ class PortManager__Generic2(PortManager):
         assert self._guard is not None
         assert type(self._reserved_ports) is dict
 
+        i = number - __class__._C_MIN_PORT_NUMBER
+
         with self._guard:
             assert number in self._reserved_ports
-            assert number not in self._available_ports
-            self._available_ports.add(number)
+            assert self._port_states[i] == __class__._C_PORT_IS_RESERVED
+            self._port_states[i] = __class__._C_PORT_IS_AVAILABLE
             lock_obj = self._reserved_ports.pop(number)
+            self._stats.release_count += 1
             assert number not in self._reserved_ports
-            assert number in self._available_ports
             assert isinstance(lock_obj, OsLockFsObj)
             lock_obj.release()
             __class__.helper__send_debug_msg("Port {} is released.", number)
         return
 
+    def _get_candidates(self, count: int) -> typing.List[int]:
+        """
+        Returns up to 'count' available ports starting from the cursor and
+        moves the cursor after the last of them.
+        """
+        assert type(count) is int
+        assert count > 0
+        assert type(self._cursor) is int
+
+        port_states = self._port_states
+        cursor = self._cursor
+        assert cursor >= 0
+        assert cursor < len(port_states)
+
+        result: typing.List[int] = []
+
+        for start, stop in ((cursor, len(port_states)), (0, cursor)):
+            pos = start
+            while len(result) < count:
+                i = port_states.find(__class__._C_PORT_IS_AVAILABLE, pos, stop)
+                if i == -1:
+                    break
+                result.append(i + __class__._C_MIN_PORT_NUMBER)
+                pos = i + 1
+                continue
+
+            if len(result) == count:
+                break
+
+        if len(result) > 0:
+            next_i = result[-1] - __class__._C_MIN_PORT_NUMBER + 1
+            self._cursor = next_i % len(port_states)
+
+        return result
+
+    def _probe_ports(
+        self,
+        ports: typing.List[int],
+    ) -> typing.Iterator[typing.Tuple[int, bool]]:
+        assert type(ports) is list
+
+        # A local check is a cheap bind call, we do it one by one
+        if len(ports) == 1 or isinstance(self._os_ops, LocalOperations):
+            for port in ports:
+                yield (port, self._os_ops.is_port_free(port))
+            return
+
+        # threads of a batch are finished with it, a manager keeps none
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(ports),
+            thread_name_prefix="testgres_port_probe",
+        ) as executor:
+            results = list(executor.map(self._os_ops.is_port_free, ports))
+
+        for port, is_free in zip(ports, results):
+            yield (port, is_free)
+        return
+
     @staticmethod
     def helper__send_debug_msg(msg_template: str, *args) -> None:
         assert msg_template is not None
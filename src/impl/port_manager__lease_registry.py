@@ -0,0 +1,298 @@
+from testgres.operations.os_ops import OsOperations
+from testgres.operations.local_ops import LocalOperations
+
+from ..port_manager import PortManager
+from ..exceptions import PortForException
+from .. import consts
+
+import os
+import random
+import sqlite3
+import threading
+import typing
+import logging
+
+import psutil
+
+
+class PortManager__LeaseRegistry(PortManager):
+    """
+    Port manager for parallel test runners on the local host.
+
+    Processes share a registry (an SQLite database in the temp directory)
+    and lease ports from it by blocks. A leased port belongs to the owner
+    process until this process exits. Leases of dead processes are
+    reclaimed when a new block is leased.
+    """
+
+    _C_MIN_PORT_NUMBER = 1024
+    _C_MAX_PORT_NUMBER = 65535
+
+    _C_DEFAULT_BLOCK_SIZE = 16
+
+    # How long should we wait for the registry lock (seconds)?
+    _C_REGISTRY_TIMEOUT = 60
+
+    _os_ops: OsOperations
+    _guard: typing.Any
+    _registry_path: typing.Optional[str]
+    _block_size: int
+
+    # pid and start time of the owner process
+    _owner_pid: typing.Optional[int]
+    _owner_start_time: typing.Optional[float]
+
+    # leased ports which are not used now
+    _free_ports: typing.List[int]
+    _reserved_ports: typing.Set[int]
+
+    def __init__(
+        self,
+        registry_path: typing.Optional[str] = None,
+        block_size: int = _C_DEFAULT_BLOCK_SIZE,
+    ):
+        assert registry_path is None or type(registry_path) is str
+        assert type(block_size) is int
+        assert block_size > 0
+
+        super().__init__()
+
+        self._os_ops = LocalOperations.get_single_instance()
+        self._guard = threading.Lock()
+        self._registry_path = registry_path
+        self._block_size = block_size
+        self._owner_pid = None
+        self._owner_start_time = None
+        self._free_ports = []
+        self._reserved_ports = set()
+        return
+
+    @property
+    def registry_path(self) -> str:
+        if self._registry_path is None:
+            temp_dir = self._os_ops.get_tempdir()
+            assert type(temp_dir) is str
+            self._registry_path = self._os_ops.build_path(
+                temp_dir,
+                consts.TMP_TESTGRES_PORT_LEASES,
+            )
+
+        assert type(self._registry_path) is str
+        return self._registry_path
+
+    def is_reserved(self, number: int) -> bool:
+        assert type(number) is int
+
+        with self._guard:
+            return number in self._reserved_ports
+
+    def reserve_port(self) -> int:
+        with self._guard:
+            self._check_owner()
+
+            while True:
+                if len(self._free_ports) == 0:
+                    self._free_ports = self._lease_block()
+                    assert type(self._free_ports) is list
+                    assert len(self._free_ports) > 0
+
+                port = self._free_ports.pop()
+                assert type(port) is int
+                assert port not in self._reserved_ports
+
+                # Another application (not testgres) may use this port
+                if not self._os_ops.is_port_free(port):
+                    __class__.helper__send_debug_msg("Leased port {} is busy. It is returned.", port)
+                    self._return_leases([port])
+                    continue
+
+                self._reserved_ports.add(port)
+                __class__.helper__send_debug_msg("Port {} is reserved.", port)
+                return port
+
+    def release_port(self, number: int) -> None:
+        assert type(number) is int
+        assert number >= __class__._C_MIN_PORT_NUMBER
+        assert number <= __class__._C_MAX_PORT_NUMBER
+
+        with self._guard:
+            assert number in self._reserved_ports
+            self._reserved_ports.discard(number)
+
+            # A port stays leased to this process
+            self._free_ports.append(number)
+            __class__.helper__send_debug_msg("Port {} is released.", number)
+        return
+
+    def release_leases(self) -> None:
+        """
+        Return all the leased ports of this process to the registry.
+        Reserved (used) ports are kept.
+        """
+        with self._guard:
+            if self._owner_pid != os.getpid():
+                return
+
+            if len(self._free_ports) == 0:
+                return
+
+            self._return_leases(self._free_ports)
+            self._free_ports = []
+        return
+
+    # --------------------------------------------------------------------
+    def _check_owner(self) -> None:
+        pid = os.getpid()
+
+        if self._owner_pid == pid:
+            return
+
+        # A new process (fork). Leases of a parent are not our leases.
+        self._owner_pid = pid
+        self._owner_start_time = psutil.Process(pid).create_time()
+        self._free_ports = []
+        self._reserved_ports = set()
+        return
+
+    def _connect(self) -> sqlite3.Connection:
+        path = self.registry_path
+        self._os_ops.makedirs(self._os_ops.get_dirname(path))
+
+        cn = sqlite3.connect(
+            path,
+            timeout=__class__._C_REGISTRY_TIMEOUT,
+            isolation_level=None,  # we control transactions
+        )
+
+        try:
+            cn.execute(
+                "create table if not exists port_lease ("
+                " port integer primary key,"
+                " pid integer not null,"
+                " pid_start_time real not null)"
+            )
+        except:  # noqa: E722
+            cn.close()
+            raise
+
+        return cn
+
+    def _lease_block(self) -> typing.List[int]:
+        assert type(self._owner_pid) is int
+        assert type(self._owner_start_time) is float
+
+        cn = self._connect()
+
+        try:
+            cn.execute("begin immediate")
+
+            try:
+                self._reclaim_dead_leases(cn)
+
+                leased = set(r[0] for r in cn.execute("select port from port_lease"))
+
+                result = self._select_free_ports(leased)
+                assert type(result) is list
+
+                if len(result) == 0:
+                    raise PortForException("Can't select a port.")
+
+                cn.executemany(
+                    "insert into port_lease (port, pid, pid_start_time) values (?, ?, ?)",
+                    [(port, self._owner_pid, self._owner_start_time) for port in result],
+                )
+            except:  # noqa: E722
+                cn.execute("rollback")
+                raise
+
+            cn.execute("commit")
+        finally:
+            cn.close()
+
+        __class__.helper__send_debug_msg("Ports {} are leased.", result)
+        return result
+
+    def _select_free_ports(self, leased: typing.Set[int]) -> typing.List[int]:
+        assert type(leased) is set
+
+        port_count = __class__._C_MAX_PORT_NUMBER - __class__._C_MIN_PORT_NUMBER + 1
+        start = random.randrange(port_count)
+
+        result: typing.List[int] = []
+
+        for i in range(port_count):
+            port = __class__._C_MIN_PORT_NUMBER + (start + i) % port_count
+
+            if port in leased:
+                continue
+
+            if not self._os_ops.is_port_free(port):
+                continue
+
+            result.append(port)
+
+            if len(result) == self._block_size:
+                break
+            continue
+
+        return result
+
+    def _return_leases(self, ports: typing.List[int]) -> None:
+        assert type(ports) is list
+        assert type(self._owner_pid) is int
+
+        cn = self._connect()
+
+        try:
+            with cn:
+                cn.executemany(
+                    "delete from port_lease where port = ? and pid = ?",
+                    [(port, self._owner_pid) for port in ports],
+                )
+        finally:
+            cn.close()
+        return
+
+    @staticmethod
+    def _reclaim_dead_leases(cn: sqlite3.Connection) -> None:
+        assert type(cn) is sqlite3.Connection
+
+        owners = cn.execute("select distinct pid, pid_start_time from port_lease").fetchall()
+
+        for pid, pid_start_time in owners:
+            if __class__._process_is_alive(pid, pid_start_time):
+                continue
+
+            cn.execute(
+                "delete from port_lease where pid = ? and pid_start_time = ?",
+                (pid, pid_start_time),
+            )
+
+            __class__.helper__send_debug_msg("Leases of dead process {} are reclaimed.", pid)
+            continue
+        return
+
+    @staticmethod
+    def _process_is_alive(pid: int, pid_start_time: float) -> bool:
+        assert type(pid) is int
+
+        try:
+            p = psutil.Process(pid)
+            # pid may be reused by a new process
+            return p.create_time() == pid_start_time
+        except psutil.NoSuchProcess:
+            return False
+        except psutil.AccessDenied:
+            # we can't say anything about this process
+            return True
+
+    @staticmethod
+    def helper__send_debug_msg(msg_template: str, *args) -> None:
+        assert msg_template is not None
+        assert args is not None
+        assert type(msg_template) is str
+        assert type(args) is tuple
+        assert msg_template != ""
+        s = "[port manager] "
+        s += msg_template.format(*args)
+        logging.debug(s)
@@ -1,23 +1,22 @@
 # coding: utf-8
 
 from .config import testgres_config as tconf
-from .exceptions import ExecUtilException
-from .impl.file_line_reader import FileLineReader
+from .impl.log_tail_service import LogTailService
 
 from testgres.operations.os_ops import OsOperations
 
 import logging
-import threading
-import time
 import typing
 
 
-class TestgresLogger(threading.Thread):
-    _C_SLEEP_MIN = 0.01
-    _C_SLEEP_MAX = 60
-
+class TestgresLogger:
     """
     Helper class to implement reading from log files.
+
+    Log files of all the nodes are followed by one shared thread
+    (see LogTailService). This object is a node's subscription to it
+    and has the interface of the old per-node thread:
+    start(), stop() and is_alive().
     """
     def __init__(
         self,
@@ -31,86 +30,47 @@ class TestgresLogger(threading.Thread):
         assert type(log_file_encoding) is str
         assert os_ops is None or isinstance(os_ops, OsOperations)
 
-        threading.Thread.__init__(self)
-
         if os_ops is None:
             os_ops = tconf.os_ops
 
-        assert os_ops is None or isinstance(os_ops, OsOperations)
+        assert isinstance(os_ops, OsOperations)
 
         self._os_ops = os_ops
         self._node_name = node_name
         self._log_file_name = log_file_name
         self._log_file_encoding = log_file_encoding
-        self._stop_event = threading.Event()
         self._logger = logging.getLogger(node_name)
         self._logger.setLevel(logging.INFO)
-        return
-
-    def run(self):
-        # open log file for reading
-        file_line_reader = FileLineReader(
-            self._os_ops,
-            self._log_file_name,
-            self._log_file_encoding,
+        self._subscription = LogTailService.Subscription(
+            log_file_name,
+            log_file_encoding,
+            os_ops,
+            self._log_line,
+            self._log_error,
         )
+        return
 
-        sleep_time = __class__._C_SLEEP_MIN
-
-        try:
-            # work until we're asked to stop
-            while not self._stop_event.is_set():
-                line = None
-
-                while True:
-                    try:
-                        line = file_line_reader.read_line()  # raise
-                    except Exception as e:
-                        if __class__._is_file_not_found_exception(e):
-                            if not self._os_ops.path_exists(self._log_file_name):
-                                break
-                        raise
-                    break
-
-                if line is None:
-                    time.sleep(sleep_time)
-                    sleep_time = min(__class__._C_SLEEP_MAX, 2 * sleep_time)
-                    continue
-
-                assert type(line) is str
-
-                sleep_time = __class__._C_SLEEP_MIN
-
-                # do we have new lines?
-                line = line.strip()
-
-                extra = {'node': self._node_name}
-                self._logger.info(line, extra=extra)
-                continue
-        except Exception as e:
-            self._logger.error(e)
-            raise
-        finally:
-            # don't forget to clear event
-            # [2026-07-10] legacy cargo cult, thread is single-use only.
-            # self._stop_event.clear()
-            pass
+    def start(self):
+        LogTailService.get_single_instance().register(self._subscription)
         return
 
     def stop(self, wait=True):
-        self._stop_event.set()
-
-        if wait:
-            self.join()
+        LogTailService.get_single_instance().unregister(self._subscription, wait=wait)
         return
 
-    @staticmethod
-    def _is_file_not_found_exception(e: Exception) -> bool:
-        if isinstance(e, FileNotFoundError):
-            return True
+    def is_alive(self) -> bool:
+        return self._subscription.is_active()
+
+    def _log_line(self, line: str) -> None:
+        assert type(line) is str
 
-        if isinstance(e, ExecUtilException):
-            if e.exit_code == 2:
-                return True
+        # do we have new lines?
+        line = line.strip()
 
-        return False
+        extra = {'node': self._node_name}
+        self._logger.info(line, extra=extra)
+        return
+
+    def _log_error(self, e: Exception) -> None:
+        self._logger.error(e)
+        return
@@ -0,0 +1,557 @@
+# coding: utf-8
+
+from .exceptions import InvalidOperationException
+from .utils import PgVer
+
+import re
+import struct
+import time
+import typing
+
+
+class LogicalChange:
+    """
+    A change decoded from a logical replication slot.
+
+    Values of tuples are dictionaries {column: text}. None is NULL, columns
+    with unchanged TOAST values are absent.
+
+    Args:
+        lsn: LSN of the change (text).
+        xid: transaction id.
+        kind: begin, commit, insert, update, delete, truncate or message.
+        table: qualified name of the table (None for begin, commit and message).
+        new: values of the new tuple (insert, update) or None.
+        old: values of the old tuple or of its replica identity (update,
+            delete) or None.
+        data: raw output of the plugin.
+    """
+    __slots__ = (
+        "lsn",
+        "xid",
+        "kind",
+        "table",
+        "new",
+        "old",
+        "data",
+    )
+
+    lsn: str
+    xid: int
+    kind: str
+    table: typing.Optional[str]
+    new: typing.Optional[typing.Dict[str, typing.Optional[str]]]
+    old: typing.Optional[typing.Dict[str, typing.Optional[str]]]
+    data: typing.Union[str, bytes]
+
+    # "table public.t: INSERT: x[integer]:1"
+    _C_TABLE_REGEX = re.compile(r"^table (.+?): (INSERT|UPDATE|DELETE|TRUNCATE):(.*)$", re.DOTALL)
+
+    def __init__(self, lsn, xid, kind, table=None, new=None, old=None, data=None):
+        assert type(lsn) is str
+        assert type(xid) is int
+        assert type(kind) is str
+        assert table is None or type(table) is str
+        assert new is None or type(new) is dict
+        assert old is None or type(old) is dict
+        self.lsn = lsn
+        self.xid = xid
+        self.kind = kind
+        self.table = table
+        self.new = new
+        self.old = old
+        self.data = data
+        return
+
+    def __repr__(self):
+        return "{}(lsn={}, xid={}, kind={}, table={}, new={}, old={})".format(
+            __class__.__name__,
+            self.lsn,
+            self.xid,
+            self.kind,
+            self.table,
+            self.new,
+            self.old,
+        )
+
+    @staticmethod
+    def from_test_decoding(lsn: str, xid: int, data: str) -> typing.List["LogicalChange"]:
+        """
+        Decode a row of test_decoding output (include-xids is expected).
+
+        Returns:
+            A list of changes (TRUNCATE produces one change per table).
+        """
+        assert type(lsn) is str
+        assert type(xid) is int
+        assert type(data) is str
+
+        if data.startswith("BEGIN"):
+            return [LogicalChange(lsn, xid, "begin", data=data)]
+
+        if data.startswith("COMMIT"):
+            return [LogicalChange(lsn, xid, "commit", data=data)]
+
+        m = __class__._C_TABLE_REGEX.match(data)
+
+        if m is None:
+            return [LogicalChange(lsn, xid, "message", data=data)]
+
+        table = m.group(1)
+        kind = m.group(2).lower()
+        tail = m.group(3).strip()
+
+        if kind == "truncate":
+            return [LogicalChange(lsn, xid, kind, table=t, data=data) for t in table.split(", ")]
+
+        if kind == "insert":
+            return [LogicalChange(lsn, xid, kind, table, new=__class__._parse_tuple(tail), data=data)]
+
+        if kind == "delete":
+            return [LogicalChange(lsn, xid, kind, table, old=__class__._parse_tuple(tail), data=data)]
+
+        assert kind == "update"
+
+        old = None
+
+        # "old-key: ... new-tuple: ..." if the replica identity is changed
+        if tail.startswith("old-key:"):
+            i = tail.index(" new-tuple:")
+            old = __class__._parse_tuple(tail[len("old-key:"):i].strip())
+            tail = tail[i + len(" new-tuple:"):].strip()
+
+        return [LogicalChange(lsn, xid, kind, table, new=__class__._parse_tuple(tail), old=old, data=data)]
+
+    @staticmethod
+    def _parse_tuple(text: str) -> typing.Optional[typing.Dict[str, typing.Optional[str]]]:
+        # name[type]:value ... where value is null, 'quoted' or a plain token
+        assert type(text) is str
+
+        if text == "(no-tuple-data)":
+            return None
+
+        result = dict()
+        pos = 0
+        n = len(text)
+
+        while pos < n:
+            if text[pos] == " ":
+                pos += 1
+                continue
+
+            if text[pos] == '"':
+                end = pos + 1
+                while True:
+                    end = text.index('"', end)
+                    if text.startswith('""', end):
+                        end += 2
+                        continue
+                    break
+                name = text[pos + 1:end].replace('""', '"')
+                pos = end + 1
+            else:
+                end = text.index("[", pos)
+                name = text[pos:end]
+                pos = end
+
+            # type may contain brackets: x[integer[]]:'{1}'
+            pos = text.index("]:", pos) + 2
+
+            if text.startswith("'", pos):
+                end = pos + 1
+                while True:
+                    end = text.index("'", end)
+                    if text.startswith("''", end):
+                        end += 2
+                        continue
+                    break
+                result[name] = text[pos + 1:end].replace("''", "'")
+                pos = end + 1
+                continue
+
+            end = text.find(" ", pos)
+            if end < 0:
+                end = n
+            value = text[pos:end]
+            pos = end
+
+            if value == "null":
+                result[name] = None
+            elif value != "unchanged-toast-datum":
+                result[name] = value
+            continue
+
+        return result
+
+
+class PgOutputDecoder:
+    """
+    Decoder of the binary output of pgoutput (protocol version 1).
+
+    Relation messages are kept, they describe the columns of the following
+    changes. Relation, type and origin messages are not returned as changes.
+    """
+
+    # relid -> (qualified name, columns, columns of replica identity)
+    _relations: typing.Dict[int, typing.Tuple[str, typing.List[str], typing.Set[str]]]
+
+    def __init__(self):
+        self._relations = dict()
+        return
+
+    def decode(self, lsn: str, xid: int, data: bytes) -> typing.List[LogicalChange]:
+        """
+        Returns:
+            A list of changes of one message.
+        """
+        assert type(lsn) is str
+        assert type(xid) is int
+        assert type(data) is bytes
+
+        kind = data[0:1]
+        pos = 1
+
+        if kind == b"B":
+            xid = struct.unpack_from(">QqI", data, pos)[2]
+            return [LogicalChange(lsn, xid, "begin", data=data)]
+
+        if kind == b"C":
+            return [LogicalChange(lsn, xid, "commit", data=data)]
+
+        if kind == b"R":
+            relid, = struct.unpack_from(">I", data, pos)
+            pos += 4
+            nspname, pos = __class__._read_string(data, pos)
+            relname, pos = __class__._read_string(data, pos)
+            pos += 1  # replica identity
+            ncols, = struct.unpack_from(">H", data, pos)
+            pos += 2
+
+            columns = []
+            keys = set()
+            for _ in range(ncols):
+                flags = data[pos]
+                name, pos = __class__._read_string(data, pos + 1)
+                pos += 8  # type oid, typmod
+                columns.append(name)
+                if flags & 1:
+                    keys.add(name)
+                continue
+
+            table = "{}.{}".format(nspname, relname) if nspname else relname
+            self._relations[relid] = (table, columns, keys)
+            return []
+
+        if kind == b"I":
+            relid, = struct.unpack_from(">I", data, pos)
+            table, columns, _ = self._relation(relid)
+            assert data[pos + 4:pos + 5] == b"N"
+            new, pos = __class__._read_tuple(data, pos + 5, columns)
+            return [LogicalChange(lsn, xid, "insert", table, new=new, data=data)]
+
+        if kind == b"U":
+            relid, = struct.unpack_from(">I", data, pos)
+            table, columns, keys = self._relation(relid)
+            old, pos = __class__._read_old(data, pos + 4, columns, keys)
+            assert data[pos:pos + 1] == b"N"
+            new, pos = __class__._read_tuple(data, pos + 1, columns)
+            return [LogicalChange(lsn, xid, "update", table, new=new, old=old, data=data)]
+
+        if kind == b"D":
+            relid, = struct.unpack_from(">I", data, pos)
+            table, columns, keys = self._relation(relid)
+            old, pos = __class__._read_old(data, pos + 4, columns, keys)
+            return [LogicalChange(lsn, xid, "delete", table, old=old, data=data)]
+
+        if kind == b"T":
+            nrels, = struct.unpack_from(">I", data, pos)
+            relids = struct.unpack_from(">{}I".format(nrels), data, pos + 5)
+            return [LogicalChange(lsn, xid, "truncate", self._relation(r)[0], data=data) for r in relids]
+
+        # origin, type
+        return []
+
+    def _relation(self, relid: int) -> typing.Tuple[str, typing.List[str], typing.Set[str]]:
+        if relid not in self._relations:
+            raise InvalidOperationException("Unknown relation {} in pgoutput stream.".format(relid))
+        return self._relations[relid]
+
+    @staticmethod
+    def _read_string(data: bytes, pos: int) -> typing.Tuple[str, int]:
+        end = data.index(b"\0", pos)
+        return data[pos:end].decode("utf-8"), end + 1
+
+    @staticmethod
+    def _read_old(data: bytes, pos: int, columns: typing.List[str], keys: typing.Set[str]) -> typing.Tuple[typing.Optional[dict], int]:
+        # "K" is followed by a key (other columns are null), "O" by an old tuple
+        kind = data[pos:pos + 1]
+
+        if kind == b"O":
+            return __class__._read_tuple(data, pos + 1, columns)
+
+        if kind != b"K":
+            return None, pos
+
+        old, pos = __class__._read_tuple(data, pos + 1, columns)
+        return {k: v for k, v in old.items() if k in keys}, pos
+
+    @staticmethod
+    def _read_tuple(data: bytes, pos: int, columns: typing.List[str]) -> typing.Tuple[dict, int]:
+        ncols, = struct.unpack_from(">H", data, pos)
+        pos += 2
+
+        result = dict()
+
+        for i in range(ncols):
+            kind = data[pos:pos + 1]
+            pos += 1
+
+            if kind == b"n":
+                result[columns[i]] = None
+            elif kind in (b"t", b"b"):
+                size, = struct.unpack_from(">I", data, pos)
+                value = data[pos + 4:pos + 4 + size]
+                result[columns[i]] = value.decode("utf-8") if kind == b"t" else value
+                pos += 4 + size
+            else:
+                assert kind == b"u"  # unchanged TOAST value
+            continue
+
+        return result, pos
+
+
+class LogicalStream:
+    """
+    Consumer of changes of a logical replication slot.
+
+    Changes are read by ``pg_logical_slot_peek_changes`` (or its binary
+    version for pgoutput) in batches of at most ``batch_size`` rows, so only
+    one batch is kept in memory (a batch always ends at a commit, one big
+    transaction is not split). The slot is advanced (its confirmed flush
+    position is fed back) to the last delivered commit before the next
+    batch is read, by :meth:`flush` and on close. Changes of a transaction
+    that was not delivered up to its commit are read again by the next
+    consumer.
+
+    Requires PostgreSQL 11+ (pg_replication_slot_advance).
+
+    Examples:
+        with node.logical_stream("slot", plugin="test_decoding") as stream:
+            for change in stream:
+                print(change.kind, change.table, change.new)
+    """
+
+    _C_PLUGINS = ["pgoutput", "test_decoding"]
+
+    _node: typing.Any
+    _slot: str
+    _plugin: str
+    _publications: typing.List[str]
+    _batch_size: int
+    _idle_timeout: typing.Optional[float]
+    _poll_interval: float
+    _dbname: typing.Optional[str]
+    _username: typing.Optional[str]
+    _con: typing.Any
+    _pending_lsn: typing.Optional[str]
+    _flushed_lsn: typing.Optional[str]
+    _count: int
+    _transactions: int
+
+    # --------------------------------------------------------------------
+    def __init__(
+        self,
+        node: typing.Any,
+        slot: str,
+        plugin: str = "pgoutput",
+        publications: typing.Optional[typing.List[str]] = None,
+        batch_size: int = 1000,
+        idle_timeout: typing.Optional[float] = 0,
+        poll_interval: float = 0.1,
+        create_slot: bool = False,
+        dbname: typing.Optional[str] = None,
+        username: typing.Optional[str] = None,
+    ):
+        """
+        Args:
+            node: a PostgresNode (PostgreSQL 11+, wal_level = logical).
+            slot: name of a logical replication slot.
+            plugin: pgoutput or test_decoding.
+            publications: names of publications (pgoutput only).
+            batch_size: maximum count of rows read at once.
+            idle_timeout: iteration stops when there are no new changes
+                during this time (seconds, None means never).
+            poll_interval: sleep between reads when the slot is drained.
+            create_slot: create the slot if it does not exist.
+            dbname: database name to connect to.
+            username: database user name.
+        """
+        assert node is not None
+        assert type(slot) is str
+        assert type(plugin) is str
+        assert publications is None or type(publications) is list
+        assert type(batch_size) is int
+        assert batch_size > 0
+        assert idle_timeout is None or type(idle_timeout) in [int, float]
+        assert type(poll_interval) in [int, float]
+        assert type(create_slot) is bool
+        assert dbname is None or type(dbname) is str
+        assert username is None or type(username) is str
+
+        if node.version < PgVer("11"):
+            raise InvalidOperationException("Logical stream requires PostgreSQL 11+.")
+
+        if plugin not in __class__._C_PLUGINS:
+            raise InvalidOperationException("Unknown plugin \"{}\".".format(plugin))
+
+        if plugin == "pgoutput" and not publications:
+            raise InvalidOperationException("Publications are not defined.")
+
+        self._node = node
+        self._slot = slot
+        self._plugin = plugin
+        self._publications = publications or []
+        self._batch_size = batch_size
+        self._idle_timeout = idle_timeout
+        self._poll_interval = poll_interval
+        self._dbname = dbname
+        self._username = username
+        self._con = None
+        self._pending_lsn = None
+        self._flushed_lsn = None
+        self._count = 0
+        self._transactions = 0
+
+        if create_slot:
+            try:
+                self._connect().execute(
+                    "select pg_catalog.pg_create_logical_replication_slot(%s, %s)"
+                    " where not exists (select 1 from pg_catalog.pg_replication_slots where slot_name = %s)",
+                    slot,
+                    plugin,
+                    slot,
+                )
+            except Exception:
+                self.close()
+                raise
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+        return
+
+    def __iter__(self) -> typing.Iterator[LogicalChange]:
+        decoder = PgOutputDecoder() if self._plugin == "pgoutput" else None
+        last_change = time.monotonic()
+
+        while True:
+            # feedback: the delivered transactions are not read again
+            self.flush()
+
+            rows = self._read_batch()
+
+            if len(rows) == 0:
+                if self._idle_timeout is not None and time.monotonic() - last_change >= self._idle_timeout:
+                    break
+                time.sleep(self._poll_interval)
+                continue
+
+            last_change = time.monotonic()
+
+            for lsn, xid, data in rows:
+                if decoder is not None:
+                    changes = decoder.decode(lsn, int(xid), bytes(data))
+                else:
+                    changes = LogicalChange.from_test_decoding(lsn, int(xid), data)
+
+                for change in changes:
+                    if change.kind == "commit":
+                        self._pending_lsn = lsn
+                        self._transactions += 1
+                    self._count += 1
+                    yield change
+                    continue
+                continue
+            continue
+        return
+
+    # interface ----------------------------------------------------------
+    @property
+    def flushed_lsn(self) -> typing.Optional[str]:
+        """
+        The last position confirmed by this stream (None if nothing yet).
+        """
+        return self._flushed_lsn
+
+    @property
+    def count(self) -> int:
+        """
+        Count of delivered changes (begin and commit included).
+        """
+        return self._count
+
+    @property
+    def transactions(self) -> int:
+        """
+        Count of delivered transactions.
+        """
+        return self._transactions
+
+    def flush(self) -> None:
+        """
+        Advance the slot to the commit of the last delivered transaction.
+        """
+        if self._pending_lsn is None:
+            return
+
+        self._connect().execute(
+            "select pg_catalog.pg_replication_slot_advance(%s, %s::pg_lsn)",
+            self._slot,
+            self._pending_lsn,
+        )
+        self._flushed_lsn = self._pending_lsn
+        self._pending_lsn = None
+        return
+
+    def close(self) -> None:
+        if self._con is None:
+            return
+
+        try:
+            self.flush()
+        finally:
+            self._con.close()
+            self._con = None
+        return
+
+    # --------------------------------------------------------------------
+    def _connect(self):
+        if self._con is None:
+            self._con = self._node.connect(
+                dbname=self._dbname,
+                username=self._username,
+                autocommit=True,
+            )
+        return self._con
+
+    def _read_batch(self) -> list:
+        if self._plugin == "pgoutput":
+            return self._connect().execute(
+                "select lsn::text, xid::text::bigint, data"
+                " from pg_catalog.pg_logical_slot_peek_binary_changes(%s, NULL, %s,"
+                " 'proto_version', '1', 'publication_names', %s)",
+                self._slot,
+                self._batch_size,
+                ",".join(self._publications),
+            )
+
+        return self._connect().execute(
+            "select lsn::text, xid::text::bigint, data"
+            " from pg_catalog.pg_logical_slot_peek_changes(%s, NULL, %s,"
+            " 'include-xids', '1', 'skip-empty-xacts', '1')",
+            self._slot,
+            self._batch_size,
+        )
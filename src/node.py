@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import logging
 import signal
+import threading
 import subprocess
 
 import time
@@ -23,11 +24,13 @@ except ImportError:
         raise ImportError("You must have psycopg2 or pg8000 modules installed")
 
 from six import raise_from, iteritems, text_type
+from psutil import NoSuchProcess
 
 from .enums import \
     NodeStatus, \
     ProcessType, \
-    DumpFormat
+    DumpFormat, \
+    LogFormat
 
 from .cache import cached_initdb
 
@@ -40,11 +43,14 @@ from .consts import \
     LOGS_DIR, \
     TMP_NODE, \
     TMP_DUMP, \
+    TMP_SOCKET, \
     PG_CONF_FILE, \
     PG_AUTO_CONF_FILE, \
     HBA_CONF_FILE, \
     RECOVERY_CONF_FILE, \
     PG_LOG_FILE, \
+    PG_CSVLOG_FILE, \
+    PG_JSONLOG_FILE, \
     UTILS_LOG_FILE
 
 from .consts import \
@@ -53,7 +59,8 @@ from .consts import \
     MAX_WORKER_PROCESSES, \
     MAX_WAL_SENDERS, \
     WAL_KEEP_SEGMENTS, \
-    WAL_KEEP_SIZE
+    WAL_KEEP_SIZE, \
+    UNIX_SOCKET_NODE_PORT
 
 from .decorators import \
     method_decorator, \
@@ -81,6 +88,16 @@ from .impl.port_manager__generic2 import PortManager__Generic2
 from .impl import internal_utils
 
 from .logger import TestgresLogger
+from .node_log import PostgresNodeLog
+from .structured_log import StructuredLogReader
+from .resource_sampler import NodeResourceSampler
+from .tracing import trace_span
+from .tracing import traced_node_method
+from .stats_profile import StatsProfile
+from .replication_monitor import ReplicationMonitor
+from .logical_stream import LogicalStream
+from .sync_benchmark import SyncReplicationBenchmark, SyncBenchmarkResult
+from .pgbench_result import PgbenchResult
 
 from .pubsub import Publication, Subscription
 
@@ -155,6 +172,90 @@ class ProcessProxy(object):
         return self._ptype
 
 
+class ProcessTreeSnapshot:
+    """
+    Child processes of a node at some moment.
+
+    Children are enumerated once, auxiliary processes and pids are
+    computed on the first access.
+
+    Attributes:
+        postmaster_pid: pid of postmaster.
+        timestamp: time.monotonic() of the snapshot.
+        child_processes: list of :class:`.ProcessProxy` objects.
+    """
+
+    _postmaster_pid: int
+    _timestamp: float
+    _child_processes: typing.List[ProcessProxy]
+    _auxiliary_processes: typing.Optional[typing.List[ProcessProxy]]
+    _auxiliary_pids: typing.Optional[typing.Dict[ProcessType, typing.List[int]]]
+
+    def __init__(
+        self,
+        postmaster_pid: int,
+        child_processes: typing.List[ProcessProxy],
+    ):
+        assert type(postmaster_pid) is int
+        assert type(child_processes) is list
+
+        self._postmaster_pid = postmaster_pid
+        self._timestamp = time.monotonic()
+        self._child_processes = child_processes
+        self._auxiliary_processes = None
+        self._auxiliary_pids = None
+        return
+
+    def __repr__(self):
+        return '{}(postmaster_pid={}, child_count={})'.format(
+            self.__class__.__name__,
+            self._postmaster_pid,
+            len(self._child_processes))
+
+    @property
+    def postmaster_pid(self) -> int:
+        assert type(self._postmaster_pid) is int
+        return self._postmaster_pid
+
+    @property
+    def timestamp(self) -> float:
+        assert type(self._timestamp) is float
+        return self._timestamp
+
+    @property
+    def child_processes(self) -> typing.List[ProcessProxy]:
+        assert type(self._child_processes) is list
+        return self._child_processes
+
+    @property
+    def auxiliary_processes(self) -> typing.List[ProcessProxy]:
+        if self._auxiliary_processes is None:
+            self._auxiliary_processes = [
+                p for p in self._child_processes
+                if p.ptype != ProcessType.Unknown
+            ]
+
+        assert type(self._auxiliary_processes) is list
+        return self._auxiliary_processes
+
+    @property
+    def auxiliary_pids(self) -> typing.Dict[ProcessType, typing.List[int]]:
+        if self._auxiliary_pids is None:
+            result: typing.Dict[ProcessType, typing.List[int]] = {}
+
+            for process in self.auxiliary_processes:
+                assert type(process) is ProcessProxy
+                if process.ptype not in result:
+                    result[process.ptype] = []
+
+                result[process.ptype].append(process.pid)
+
+            self._auxiliary_pids = result
+
+        assert type(self._auxiliary_pids) is dict
+        return self._auxiliary_pids
+
+
 class PostgresNode(object):
     # a max number of node start attempts
     _C_MAX_START_ATEMPTS = 5
@@ -163,6 +264,9 @@ class PostgresNode(object):
 
     _C_PM_PID__IS_NOT_DETECTED = -1
 
+    # a prefix of command line of postgres child process
+    _C_PS_DISPLAY_PREFIX = "postgres:"
+
     _name: typing.Optional[str]
     _host: str
     _port: typing.Optional[int]
@@ -170,7 +274,12 @@ class PostgresNode(object):
     _should_free_port: bool
     _os_ops: OsOperations
     _port_manager: typing.Optional[PortManager]
+    _unix_socket_dir: typing.Optional[str]
     _manually_started_pm_pid: typing.Optional[int]
+    _process_snapshot: typing.Optional[ProcessTreeSnapshot]
+    _process_types: typing.Dict[typing.Tuple[int, typing.Optional[float]], ProcessType]
+    _process_types_pm_pid: typing.Optional[int]
+    _process_guard: threading.Lock
 
     def __init__(
         self,
@@ -182,6 +291,7 @@ class PostgresNode(object):
         os_ops: typing.Optional[OsOperations] = None,
         port_manager: typing.Optional[PortManager] = None,
         host: typing.Optional[str] = None,
+        unix_socket_only: bool = False,
     ):
         """
         PostgresNode constructor.
@@ -194,12 +304,14 @@ class PostgresNode(object):
             os_ops: None or correct OS operation object.
             port_manager: None or correct port manager object.
             host: None or valid address of node host.
+            unix_socket_only: listen on a private unix socket directory only (no TCP port).
         """
         assert port is None or type(port) is int
         assert bin_dir is None or type(bin_dir) is str
         assert os_ops is None or isinstance(os_ops, OsOperations)
         assert port_manager is None or isinstance(port_manager, PortManager)
         assert host is None or type(host) is str
+        assert type(unix_socket_only) is bool
 
         # private
         if os_ops is None:
@@ -223,12 +335,37 @@ class PostgresNode(object):
         self._base_dir = base_dir
         self._prefix = prefix
         self._logger = None
+        self._log = None
+        self._structured_log_format = None
+        self._process_snapshot = None
+        self._process_types = dict()
+        self._process_types_pm_pid = None
+        # snapshot and types are used by samplers from their threads too
+        self._process_guard = threading.Lock()
         self._master = None
 
         # basic
         self._name = name or generate_app_name()
 
-        if host is not None:
+        self._unix_socket_dir = None
+
+        if unix_socket_only:
+            if host is not None:
+                raise InvalidOperationException("Unix-socket-only node does not accept a host.")
+
+            if port_manager is not None:
+                raise InvalidOperationException("Unix-socket-only node does not use a port manager.")
+
+            if not isinstance(self._os_ops, LocalOperations):
+                raise InvalidOperationException("Unix-socket-only node is supported on the local host only.")
+
+            # Socket path is limited (~107 bytes), so we do not use base_dir
+            self._unix_socket_dir = self._os_ops.mkdtemp(prefix=TMP_SOCKET)
+            assert type(self._unix_socket_dir) is str
+
+            # libpq and the server interpret this host as a socket directory
+            self._host = self._unix_socket_dir
+        elif host is not None:
             assert type(host) is str
             self._host = host
         else:
@@ -238,7 +375,13 @@ class PostgresNode(object):
         if self._host == "":
             raise RuntimeError("PostgresNode host is empty.")
 
-        if port is not None:
+        if unix_socket_only:
+            # A port number only defines a name of socket file.
+            # Each node has its own socket directory, so there is no contention.
+            self._port = port if port is not None else UNIX_SOCKET_NODE_PORT
+            self._should_free_port = False
+            self._port_manager = None
+        elif port is not None:
             assert type(port) is int
             assert port_manager is None
             self._port = port
@@ -325,6 +468,18 @@ class PostgresNode(object):
 
         assert __class__ == PostgresNode
 
+        if self._unix_socket_dir is not None:
+            node = PostgresNode(
+                name=name,
+                base_dir=base_dir,
+                bin_dir=self._bin_dir,
+                prefix=self._prefix,
+                os_ops=self._os_ops,
+                unix_socket_only=True,
+            )
+            node._structured_log_format = self._structured_log_format
+            return node
+
         if self._port_manager is None:
             raise InvalidOperationException("PostgresNode without PortManager can't be cloned.")
 
@@ -344,6 +499,8 @@ class PostgresNode(object):
             host=self._host,
         )
 
+        # a copy of data directory has the same log settings
+        node._structured_log_format = self._structured_log_format
         return node
 
     @property
@@ -370,6 +527,14 @@ class PostgresNode(object):
         assert type(self._host) is str
         return self._host
 
+    @property
+    def unix_socket_dir(self) -> typing.Optional[str]:
+        """
+        Private socket directory of unix-socket-only node or None.
+        """
+        assert self._unix_socket_dir is None or type(self._unix_socket_dir) is str
+        return self._unix_socket_dir
+
     @property
     def port(self) -> int:
         if self._port is None:
@@ -414,17 +579,7 @@ class PostgresNode(object):
         """
         Returns a dict of { ProcessType : PID }.
         """
-
-        result = {}
-
-        for process in self.auxiliary_processes:
-            assert type(process) is ProcessProxy
-            if process.ptype not in result:
-                result[process.ptype] = []
-
-            result[process.ptype].append(process.pid)
-
-        return result
+        return self.process_snapshot().auxiliary_pids
 
     @property
     def auxiliary_processes(self) -> typing.List[ProcessProxy]:
@@ -432,11 +587,7 @@ class PostgresNode(object):
         Returns a list of auxiliary processes.
         Each process is represented by :class:`.ProcessProxy` object.
         """
-        def is_aux(process: ProcessProxy) -> bool:
-            assert type(process) is ProcessProxy
-            return process.ptype != ProcessType.Unknown
-
-        return list(filter(is_aux, self.child_processes))
+        return self.process_snapshot().auxiliary_processes
 
     @property
     def child_processes(self) -> typing.List[ProcessProxy]:
@@ -444,6 +595,21 @@ class PostgresNode(object):
         Returns a list of all child processes.
         Each process is represented by :class:`.ProcessProxy` object.
         """
+        return self.process_snapshot().child_processes
+
+    def process_snapshot(self, max_age: float = 0) -> ProcessTreeSnapshot:
+        """
+        Returns child processes of the running node.
+
+        Types of processes are remembered while postmaster is the same,
+        so a new snapshot reads command lines of new processes only.
+
+        Args:
+            max_age: the previous snapshot is returned if it is not older
+                than max_age seconds and postmaster is the same.
+        """
+        assert type(max_age) in [int, float]
+        assert max_age >= 0
 
         # get a list of postmaster's children
         x = self._get_node_state()
@@ -456,9 +622,22 @@ class PostgresNode(object):
 
         assert x.node_status != NodeStatus.Stopped
         assert type(x.pid) is int
-        return self._get_child_processes(x.pid)
+
+        with self._process_guard:
+            snapshot = self._process_snapshot
+
+            if snapshot is not None \
+                    and snapshot.postmaster_pid == x.pid \
+                    and time.monotonic() - snapshot.timestamp <= max_age:
+                return snapshot
+
+            snapshot = ProcessTreeSnapshot(x.pid, self._get_child_processes(x.pid))
+            self._process_snapshot = snapshot
+
+        return snapshot
 
     def _get_child_processes(self, pid: int) -> typing.List[ProcessProxy]:
+        # a caller holds _process_guard
         assert type(pid) is int
         assert isinstance(self._os_ops, OsOperations)
 
@@ -466,6 +645,11 @@ class PostgresNode(object):
         assert type(C_MAX_ATTEMPT_COUNT) is int
         assert C_MAX_ATTEMPT_COUNT > 0
 
+        if self._process_types_pm_pid != pid:
+            # a new postmaster, a new set of children
+            self._process_types = dict()
+            self._process_types_pm_pid = pid
+
         failures: typing.List[Exception] = []
 
         nAttempt = 0
@@ -480,11 +664,12 @@ class PostgresNode(object):
             assert type(children) is list
 
             result: typing.List[ProcessProxy] = []
+            process_types = dict()
 
             for p in children:
                 assert hasattr(p, "pid")
                 try:
-                    proxy = ProcessProxy(p)  # raise
+                    proxy = self._create_process_proxy(p, process_types)  # raise
                 except Exception as e:
                     internal_utils.send_log_debug(
                         "Failed to process a node child process [pid: {}]. Exception ({}): {}".format(
@@ -501,6 +686,8 @@ class PostgresNode(object):
                 continue
 
             if len(result) == len(children):
+                # forget finished processes
+                self._process_types = process_types
                 return result
 
             assert len(result) < len(children)
@@ -522,6 +709,42 @@ class PostgresNode(object):
             failures,
         )
 
+    def _create_process_proxy(
+        self,
+        process: typing.Any,
+        process_types: typing.Dict[typing.Tuple[int, typing.Optional[float]], ProcessType],
+    ) -> ProcessProxy:
+        assert process is not None
+        assert type(process_types) is dict
+
+        # psutil.Process knows its creation time, so a reused pid is not confused
+        create_time = None
+        if hasattr(process, "create_time"):
+            create_time = process.create_time()
+
+        key = (process.pid, create_time)
+
+        ptype = self._process_types.get(key)
+
+        if ptype is not None:
+            process_types[key] = ptype
+            return ProcessProxy(process, ptype)
+
+        try:
+            cmdline = ''.join(process.cmdline())
+        except (FileNotFoundError, ProcessLookupError, NoSuchProcess):
+            return ProcessProxy(process, ProcessType.Unknown)
+
+        ptype = ProcessType.from_cmdline(cmdline)
+        assert type(ptype) is ProcessType
+
+        # A just forked process may have a command line of postmaster yet.
+        # Its type is not remembered until it sets its own title.
+        if cmdline.startswith(__class__._C_PS_DISPLAY_PREFIX):
+            process_types[key] = ptype
+
+        return ProcessProxy(process, ptype)
+
     @property
     def source_walsender(self):
         """
@@ -539,8 +762,9 @@ class PostgresNode(object):
 
         assert type(self.master) is PostgresNode
 
-        # master should be on the same host
-        assert self.master.host == self._host
+        # master should be on the same machine (a host of unix_socket_only
+        # node is its private socket directory)
+        assert self.master.os_ops.host == self._os_ops.host
 
         with self.master.connect() as con:
             for row in con.execute(sql, self.name):
@@ -613,6 +837,140 @@ class PostgresNode(object):
         assert type(path) is str
         return path
 
+    @property
+    def structured_log_file(self) -> str:
+        """
+        Path to csvlog/jsonlog file (see default_conf(structured_log=...)).
+        """
+        if self._structured_log_format is None:
+            raise InvalidOperationException("Structured log is not configured.")
+
+        assert type(self._structured_log_format) is LogFormat
+
+        if self._structured_log_format == LogFormat.Json:
+            file_name = PG_JSONLOG_FILE
+        else:
+            file_name = PG_CSVLOG_FILE
+
+        path = self._os_ops.build_path(self.logs_dir, file_name)
+        assert type(path) is str
+        return path
+
+    def structured_log(self) -> StructuredLogReader:
+        """
+        Create a new reader of csvlog/jsonlog records of this node.
+
+        Example:
+            node = get_new_node().init(structured_log=LogFormat.Json).start()
+            reader = node.structured_log()
+            for r in reader.read(severities=['ERROR', 'FATAL', 'PANIC']):
+                print(r.pid, r.sqlstate, r.message)
+        """
+        return StructuredLogReader(
+            self._os_ops,
+            self.structured_log_file,
+            self._structured_log_format,
+        )
+
+    @property
+    def log(self) -> PostgresNodeLog:
+        """
+        Search in the server log file (local nodes only).
+        See :class:`.PostgresNodeLog`.
+
+        Example:
+            node.log.mark()
+            node.psql("select 1/0")
+            node.log.wait_for_log("division by zero")
+        """
+        if not isinstance(self._os_ops, LocalOperations):
+            raise InvalidOperationException("Log search is supported for local nodes only.")
+
+        if self._log is None:
+            self._log = PostgresNodeLog(self.pg_log_file)
+
+        assert type(self._log) is PostgresNodeLog
+        return self._log
+
+    def resource_sampler(
+        self,
+        interval: float = 1.0,
+        capacity: int = 10000,
+        with_pss: bool = False,
+    ) -> NodeResourceSampler:
+        """
+        Create a sampler of resources consumed by the node processes (local nodes only).
+        See :class:`.NodeResourceSampler`.
+
+        Example:
+            with node.resource_sampler(interval=0.5) as sampler:
+                node.pgbench_run(time=10)
+            print(sampler.summary())
+        """
+        if not isinstance(self._os_ops, LocalOperations):
+            raise InvalidOperationException("Resource sampling is supported for local nodes only.")
+
+        return NodeResourceSampler(self, interval, capacity, with_pss)
+
+    def replication_monitor(
+        self,
+        interval: float = 1.0,
+        capacity: int = 100000,
+        dbname: typing.Optional[str] = None,
+        username: typing.Optional[str] = None,
+    ) -> ReplicationMonitor:
+        """
+        Create a sampler of replication lag of the standbys of this node.
+        See :class:`.ReplicationMonitor`.
+
+        Example:
+            with master.replication_monitor(interval=0.1) as monitor:
+                master.pgbench_run(time=10)
+            print(monitor.summary())
+        """
+        return ReplicationMonitor(self, interval, capacity, dbname, username)
+
+    def logical_stream(
+        self,
+        slot: str,
+        plugin: str = "pgoutput",
+        **kwargs,
+    ) -> LogicalStream:
+        """
+        Create a consumer of changes of a logical replication slot.
+        See :class:`.LogicalStream`.
+
+        Example:
+            with node.logical_stream("slot", publications=["pub"]) as stream:
+                for change in stream:
+                    print(change.kind, change.table, change.new)
+        """
+        return LogicalStream(self, slot, plugin=plugin, **kwargs)
+
+    def stats_profile(
+        self,
+        dbname: typing.Optional[str] = None,
+        username: typing.Optional[str] = None,
+        statements: bool = False,
+        settle: float = 0,
+    ) -> StatsProfile:
+        """
+        Create a profile of cumulative statistics views (a context manager).
+        See :class:`.StatsProfile`.
+
+        Args:
+            dbname: database name to connect to.
+            username: database user name.
+            statements: collect pg_stat_statements (the node may be restarted to preload it).
+            settle: how long should we wait before the final snapshot (seconds)?
+
+        Example:
+            with node.stats_profile() as prof:
+                node.pgbench_run(time=10)
+            print(prof.delta("pg_stat_database", "postgres"))
+        """
+        return StatsProfile(self, dbname, username, statements, settle)
+
     # NOTE: for compatibility
     @property
     def utils_log_name(self) -> str:
@@ -668,7 +1026,8 @@ class PostgresNode(object):
 
         ps_command = ['ps', '-o', 'pid=', '-p', str(node_pid)]
 
-        ps_output = self._os_ops.exec_command(cmd=ps_command, shell=True, ignore_errors=True).decode('utf-8')
+        with trace_span("execute_utility", node=self.name, util="ps", args=ps_command):
+            ps_output = self._os_ops.exec_command(cmd=ps_command, shell=True, ignore_errors=True).decode('utf-8')
         assert type(ps_output) is str
 
         if ps_output == "":
@@ -687,7 +1046,8 @@ class PostgresNode(object):
             pass
 
         # Check that node stopped - print only column pid without headers
-        ps_output = self._os_ops.exec_command(cmd=ps_command, shell=True, ignore_errors=True).decode('utf-8')
+        with trace_span("execute_utility", node=self.name, util="ps", args=ps_command):
+            ps_output = self._os_ops.exec_command(cmd=ps_command, shell=True, ignore_errors=True).decode('utf-8')
         assert type(ps_output) is str
 
         if ps_output == "":
@@ -826,6 +1186,7 @@ class PostgresNode(object):
 
         return result
 
+    @traced_node_method("node.init")
     def init(self, initdb_params=None, cached=True, **kwargs):
         """
         Perform initdb for this node.
@@ -862,7 +1223,8 @@ class PostgresNode(object):
                      unix_sockets=True,
                      allow_streaming=True,
                      allow_logical=False,
-                     log_statement='all'):
+                     log_statement='all',
+                     structured_log: typing.Optional[LogFormat] = None):
         """
         Apply default settings to this node.
 
@@ -872,6 +1234,7 @@ class PostgresNode(object):
             allow_streaming: (ignored) should this node add a hba entry for replication?
             allow_logical: can this node be used as a logical replication publisher?
             log_statement: one of ('all', 'off', 'mod', 'ddl').
+            structured_log: None or LogFormat of additional log file (see structured_log_file).
 
         Returns:
             This instance of :class:`.PostgresNode`.
@@ -890,9 +1253,9 @@ class PostgresNode(object):
 
         self.append_conf(fsync=fsync,
                          max_worker_processes=MAX_WORKER_PROCESSES,
-                         log_statement=log_statement,
-                         listen_addresses=self._host,
-                         port=self.port)  # yapf:disable
+                         log_statement=log_statement)  # yapf:disable
+
+        self._default_conf__address()
 
         # common replication settings
         if allow_streaming or allow_logical:
@@ -923,12 +1286,51 @@ class PostgresNode(object):
                 max_logical_replication_workers=MAX_LOGICAL_REPLICATION_WORKERS,
                 wal_level='logical')
 
+        # structured log (csvlog or jsonlog)
+        if structured_log is not None:
+            self._default_conf__structured_log(structured_log)
+        else:
+            self._structured_log_format = None
+
         # disable UNIX sockets if asked to
         if not unix_sockets:
+            if self._unix_socket_dir is not None:
+                raise InvalidOperationException("Unix-socket-only node can't disable UNIX sockets.")
+
             self.append_conf(unix_socket_directories='')
 
         return self
 
+    def _default_conf__structured_log(self, log_format: LogFormat) -> None:
+        assert type(log_format) is LogFormat
+
+        if log_format == LogFormat.Json and self._pg_version < PgVer('15'):
+            raise InitNodeException("jsonlog is only available on PostgreSQL 15 and newer")
+
+        # The collector writes stderr to the same pg_log_file (both files
+        # are opened in append mode) and a structured log near it.
+        self.append_conf(logging_collector=True,
+                         log_destination='stderr,{}'.format(log_format.value),
+                         log_directory=self.logs_dir,
+                         log_filename=PG_LOG_FILE,
+                         log_rotation_age=0,
+                         log_rotation_size=0)  # yapf: disable
+
+        self._structured_log_format = log_format
+        return
+
+    def _default_conf__address(self) -> None:
+        if self._unix_socket_dir is None:
+            self.append_conf(listen_addresses=self._host,
+                             port=self.port)  # yapf:disable
+            return
+
+        # no TCP at all
+        self.append_conf(listen_addresses='',
+                         port=self.port,
+                         unix_socket_directories=self._unix_socket_dir)  # yapf:disable
+        return
+
     def _default_conf__hba(self) -> None:
         hba_conf = self._os_ops.build_path(self.data_dir, HBA_CONF_FILE)
 
@@ -1063,6 +1465,7 @@ class PostgresNode(object):
         assert type(x) is utils.PostgresNodeState
         return x.node_status
 
+    @traced_node_method("get_pg_node_state")
     def _get_node_state(self) -> utils.PostgresNodeState:
         if self._base_dir is None:
             return utils.PostgresNodeState(
@@ -1211,6 +1614,7 @@ class PostgresNode(object):
         self._start(params, wait, exec_env)
         return
 
+    @traced_node_method("node.start")
     def _start(
         self,
         params: typing.Optional[typing.List[str]] = None,
@@ -1228,6 +1632,10 @@ class PostgresNode(object):
 
         assert type(self._port) is int
 
+        if self._unix_socket_dir is not None:
+            # it could be removed by _release_resources
+            self._os_ops.makedirs(self._unix_socket_dir)
+
         _params = [
             self._get_bin_path("pg_ctl"),
             "start",
@@ -1313,6 +1721,7 @@ class PostgresNode(object):
         files = self._collect_special_files()
         raise_from(StartNodeException(msg, files), from_exception)
 
+    @traced_node_method("node.stop")
     def stop(self, params=[], wait=True):
         """
         Stops the PostgreSQL node using pg_ctl if the node has been started.
@@ -1363,7 +1772,8 @@ class PostgresNode(object):
             self._os_ops.kill(x.pid, sig)
             self._manually_started_pm_pid = None
         else:
-            childs = self._get_child_processes(x.pid)
+            with self._process_guard:
+                childs = self._get_child_processes(x.pid)
             for c in childs:
                 assert type(c) is ProcessProxy
                 if c.ptype == someone:
@@ -1371,6 +1781,7 @@ class PostgresNode(object):
                 continue
         return
 
+    @traced_node_method("node.restart")
     def restart(self, params=[]):
         """
         Restart this node using pg_ctl.
@@ -1513,6 +1924,10 @@ class PostgresNode(object):
         else:
             rm_dir = self.data_dir    # just data, save logs
 
+        if self._log is not None:
+            # its file will be deleted
+            self._log.close()
+
         self._os_ops.rmdirs(rm_dir, ignore_errors=False)
 
         if release_resources:
@@ -1628,13 +2043,14 @@ class PostgresNode(object):
         else:
             raise QueryException('Query or filename must be provided')
 
-        return self._os_ops.exec_command(
-            psql_params,
-            verbose=True,
-            input=input,
-            stderr=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            ignore_errors=ignore_errors)
+        with trace_span("execute_utility", node=self.name, util="psql", args=psql_params):
+            return self._os_ops.exec_command(
+                psql_params,
+                verbose=True,
+                input=input,
+                stderr=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                ignore_errors=ignore_errors)
 
     @method_decorator(positional_args_hack(['dbname', 'query']))
     def safe_psql(self, query=None, expect_error=False, **kwargs):
@@ -1870,12 +2286,16 @@ class PostgresNode(object):
 
     def backup(self, **kwargs):
         """
-        Perform pg_basebackup.
+        Perform pg_basebackup (or a filesystem level backup).
 
         Args:
             username: database user name.
             xlog_method: a method for collecting the logs ('fetch' | 'stream').
             base_dir: the base directory for data files and logs
+            method: BackupMethod.Basebackup (default) | BackupMethod.Filesystem
+            format, compress, max_rate, checkpoint, incremental, progress:
+                options of pg_basebackup (see :class:`.NodeBackup`)
+            summarize_wal: enable WAL summarization for incremental backups.
 
         Returns:
             A smart object of type NodeBackup.
@@ -1899,12 +2319,13 @@ class PostgresNode(object):
         with clean_on_error(self.backup(**kwargs)) as backup:
             return backup.spawn_replica(name=name, destroy=True, slot=slot)
 
-    def set_synchronous_standbys(self, standbys):
+    def set_synchronous_standbys(self, standbys, reload=False):
         """
         Set standby synchronization options. This corresponds to
         `synchronous_standby_names <https://www.postgresql.org/docs/current/static/runtime-config-replication.html#GUC-SYNCHRONOUS-STANDBY-NAMES>`_
         option. Note that :meth:`~.PostgresNode.reload` or
-        :meth:`~.PostgresNode.restart` is needed for changes to take place.
+        :meth:`~.PostgresNode.restart` is needed for changes to take place
+        unless reload is True.
 
         Args:
             standbys: either :class:`.First` or :class:`.Any` object specifying
@@ -1913,6 +2334,8 @@ class PostgresNode(object):
                 to passing ``First(1, <list>)``. For PostgreSQL 9.5 and below
                 it is only possible to specify a plain list of standbys as
                 `FIRST` and `ANY` keywords aren't supported.
+            reload: apply the option to the running node at once (it is
+                written by ALTER SYSTEM, see :meth:`apply_settings`).
 
         Example::
 
@@ -1936,8 +2359,31 @@ class PostgresNode(object):
                 raise TestgresException("Feature isn't supported in "
                                         "Postgres 9.5 and below")
 
+        if reload:
+            self.apply_settings({"synchronous_standby_names": str(standbys)})
+            return
+
         self.append_conf("synchronous_standby_names = '{}'".format(standbys))
 
+    def sync_replication_benchmark(self, configs, **kwargs) -> typing.List[SyncBenchmarkResult]:
+        """
+        Run pgbench for each configuration of synchronous standbys and each
+        level of synchronous_commit. Settings are applied by a reload.
+        See :class:`.SyncReplicationBenchmark`.
+
+        Args:
+            configs: a list of :class:`.First`, :class:`.Any` or None (async).
+            kwargs: levels, time, clients, scale, dbname, username, options.
+
+        Returns:
+            A list of :class:`.SyncBenchmarkResult`.
+
+        Example:
+            for r in master.sync_replication_benchmark([None, First(1, [r1]), Any(1, [r1, r2])]):
+                print(r)
+        """
+        return SyncReplicationBenchmark(self, configs, **kwargs).run()
+
     def catchup(self, dbname=None, username=None):
         """
         Wait until async replica catches up with its master.
@@ -2036,7 +2482,9 @@ class PostgresNode(object):
         # should be the last one
         _params.append(dbname)
 
-        proc = self._os_ops.exec_command(_params, stdout=stdout, stderr=stderr, get_process=True)
+        # NOTE: a span covers only a start of process
+        with trace_span("execute_utility", node=self.name, util="pgbench", args=_params):
+            proc = self._os_ops.exec_command(_params, stdout=stdout, stderr=stderr, get_process=True)
 
         # [2026-06-21] It is so
         assert isinstance(proc, subprocess.Popen)
@@ -2099,6 +2547,37 @@ class PostgresNode(object):
             >>> pgbench_run(time=10)
         """
 
+        _params = self._pgbench_params(dbname, username, options, kwargs)
+
+        return execute_utility2(self._os_ops, _params, self.utils_log_file)
+
+    def pgbench_result(self, dbname=None, username=None, options=[], **kwargs):
+        """
+        Run pgbench with some options and parse its output.
+        This event is logged (see self.utils_log_file).
+
+        Args:
+            dbname: database name to connect to.
+            username: database user name.
+            options: additional options for pgbench (list).
+
+            **kwargs: named options for pgbench (see pgbench_run()).
+
+        Returns:
+            A :class:`.PgbenchResult` object (with the time series of
+            progress=N and per-command statistics of report_per_command=True).
+
+        Examples:
+            >>> pgbench_result(time=10, progress=1, report_per_command=True)
+        """
+
+        _params = self._pgbench_params(dbname, username, options, kwargs)
+
+        _, out, err = execute_utility2(self._os_ops, _params, self.utils_log_file, verbose=True)
+
+        return PgbenchResult(out, err)
+
+    def _pgbench_params(self, dbname, username, options, kwargs) -> typing.List[str]:
         dbname = dbname or default_dbname()
 
         _params = [
@@ -2122,13 +2601,14 @@ class PostgresNode(object):
         # should be the last one
         _params.append(dbname)
 
-        return execute_utility2(self._os_ops, _params, self.utils_log_file)
+        return _params
 
     def connect(self,
                 dbname=None,
                 username=None,
                 password=None,
-                autocommit=False):
+                autocommit=False,
+                replication=None):
         """
         Connect to a database.
 
@@ -2139,6 +2619,8 @@ class PostgresNode(object):
             autocommit: commit each statement automatically. Also it should be
                 set to `True` for statements requiring to be run outside
                 a transaction? such as `VACUUM` or `CREATE DATABASE`.
+            replication: "database" opens a connection of logical replication
+                (replication commands are accepted).
 
         Returns:
             An instance of :class:`.NodeConnection`.
@@ -2148,7 +2630,8 @@ class PostgresNode(object):
                               dbname=dbname,
                               username=username,
                               password=password,
-                              autocommit=autocommit)  # yapf: disable
+                              autocommit=autocommit,
+                              replication=replication)  # yapf: disable
 
     def table_checksum(
         self,
@@ -2246,7 +2729,10 @@ class PostgresNode(object):
             value = options[option]
             valueType = type(value)
 
-            if valueType is str:
+            if valueType in [list, tuple]:
+                # the server splits a list parameter of a configuration file
+                value = __class__._escape_config_value(", ".join(str(v) for v in value))
+            elif valueType is str:
                 value = __class__._escape_config_value(value)
             elif valueType is bool:
                 value = "on" if value else "off"
@@ -2262,6 +2748,210 @@ class PostgresNode(object):
 
         self._os_ops.write(path, auto_conf, truncate=True)
 
+    def apply_settings(
+        self,
+        settings: typing.Dict[str, typing.Any],
+        dbname: typing.Optional[str] = None,
+        username: typing.Optional[str] = None,
+        reload_timeout: typing.Union[int, float] = 10,
+    ) -> bool:
+        """
+        Apply configuration parameters to the running node with the cheapest
+        possible action.
+
+        Parameters are written with ALTER SYSTEM and the configuration is
+        reloaded by pg_reload_conf(). The node is restarted only when a
+        parameter with 'postmaster' context really got a new value (it is
+        detected through pg_settings.pending_restart).
+
+        If the node is not running, parameters are written to
+        postgresql.auto.conf and will be applied by the next start.
+
+        PostgreSQL 9.4+ is required (ALTER SYSTEM).
+
+        Args:
+            settings: a dict { name: value }. None value resets a parameter.
+                A list (tuple) value sets a list parameter. Note that a str
+                is one element for parameters like shared_preload_libraries
+                or search_path, even if it contains commas.
+            dbname: database name to connect to.
+            username: database user name.
+            reload_timeout: how long should we wait for a configuration reload?
+
+        Returns:
+            True if the node has been restarted.
+
+        Examples:
+            >>> apply_settings({"work_mem": "8MB"})  # reload
+            >>> apply_settings({"shared_buffers": "64MB"})  # restart
+            >>> apply_settings({"search_path": ["s1", "public"]})
+        """
+        assert type(settings) is dict
+        assert dbname is None or type(dbname) is str
+        assert username is None or type(username) is str
+        assert type(reload_timeout) in [int, float]
+        assert reload_timeout > 0
+
+        for name in settings.keys():
+            __class__._check_setting_name(name)
+
+        if self._pg_version < PgVer('9.4'):
+            raise InvalidOperationException("ALTER SYSTEM is not supported in Postgres 9.3 and below.")
+
+        if len(settings) == 0:
+            return False
+
+        if self.status() != NodeStatus.Running:
+            self.set_auto_conf(
+                {k: v for k, v in settings.items() if v is not None},
+                rm_options={k for k, v in settings.items() if v is None},
+            )
+            return False
+
+        names = list(settings.keys())
+
+        with self.connect(dbname=dbname,
+                          username=username,
+                          autocommit=True) as con:  # yapf: disable
+            contexts = self._get_setting_contexts(con, names)
+            assert type(contexts) is dict
+
+            for name in names:
+                if contexts.get(name) == "internal":
+                    raise InvalidOperationException(
+                        "Parameter \"{}\" can't be changed.".format(name)
+                    )
+
+            load_time = con.execute("select pg_catalog.pg_conf_load_time()")[0][0]
+
+            for name in names:
+                value = settings[name]
+                if value is None:
+                    con.execute("alter system reset {}".format(name))
+                else:
+                    con.execute("alter system set {} = {}".format(
+                        name,
+                        __class__._format_setting_value(value),
+                    ))
+                continue
+
+            con.execute("select pg_catalog.pg_reload_conf()")
+
+            # A backend rereads configuration files at the start of a query
+            # after receiving SIGHUP, so we just wait for a new load time.
+            query = "select pg_catalog.pg_conf_load_time() > %s"
+            deadline = time.monotonic() + reload_timeout
+            while not con.execute(query, load_time)[0][0]:
+                if time.monotonic() > deadline:
+                    raise TimeoutException("Configuration has not been reloaded.")
+                time.sleep(0.01)
+
+            restart_names = [n for n in names if contexts.get(n) == "postmaster"]
+
+            if len(restart_names) == 0:
+                return False
+
+            if self._pg_version < PgVer('9.5'):
+                # pg_settings.pending_restart is not supported
+                pending_names = restart_names
+            else:
+                pending_names = __class__._get_pending_restart(con, restart_names)
+
+        if len(pending_names) == 0:
+            return False
+
+        self.restart()
+
+        with self.connect(dbname=dbname, username=username) as con:
+            if self._pg_version >= PgVer('9.5'):
+                pending_names = __class__._get_pending_restart(con, restart_names)
+                if len(pending_names) != 0:
+                    raise TestgresException(
+                        "Parameters {} are still pending restart.".format(pending_names)
+                    )
+
+        return True
+
+    # { version: { setting name: context } }
+    sm_setting_contexts: typing.Dict[str, typing.Dict[str, str]] = dict()
+    sm_setting_contexts_guard = threading.Lock()
+
+    def _get_setting_contexts(
+        self,
+        con: NodeConnection,
+        names: typing.List[str],
+    ) -> typing.Dict[str, str]:
+        assert type(con) is NodeConnection
+        assert type(names) is list
+
+        cache_key = str(self._pg_version)
+
+        with __class__.sm_setting_contexts_guard:
+            contexts = __class__.sm_setting_contexts.setdefault(cache_key, dict())
+            assert type(contexts) is dict
+            # pg_settings has names in lower case
+            unknown_names = [n for n in names if n.lower() not in contexts]
+
+        if len(unknown_names) > 0:
+            rows = con.execute(
+                "select name, context from pg_catalog.pg_settings where name = any(%s)",
+                [n.lower() for n in unknown_names]
+            )
+
+            # NOTE: custom (placeholder) parameters are not cached
+            with __class__.sm_setting_contexts_guard:
+                for name, context in rows:
+                    contexts[name] = context
+
+        result = dict()
+        for name in names:
+            context = contexts.get(name.lower())
+            if context is not None:
+                result[name] = context
+            continue
+
+        return result
+
+    @staticmethod
+    def _get_pending_restart(
+        con: NodeConnection,
+        names: typing.List[str],
+    ) -> typing.List[str]:
+        assert type(con) is NodeConnection
+        assert type(names) is list
+
+        rows = con.execute(
+            "select name from pg_catalog.pg_settings where pending_restart and name = any(%s)",
+            [n.lower() for n in names]
+        )
+
+        return [r[0] for r in rows]
+
+    @staticmethod
+    def _check_setting_name(name: str) -> None:
+        if type(name) is not str:
+            raise ValueError("Parameter name must be str.")
+
+        if name == "" or not all(ch.isalnum() or ch in "_." for ch in name):
+            raise ValueError("Bad parameter name \"{}\".".format(name))
+        return
+
+    @staticmethod
+    def _format_setting_value(value: typing.Any) -> str:
+        if type(value) is bool:
+            return "on" if value else "off"
+
+        if type(value) in [int, float]:
+            return str(value)
+
+        # a list parameter: each element is a separate literal
+        if type(value) in [list, tuple]:
+            if len(value) == 0:
+                return "''"
+            return ", ".join(__class__._format_setting_value(v) for v in value)
+
+        return "E" + __class__._escape_config_value(str(value))
+
     def upgrade_from(self, old_node, options=None, expect_error=False):
         """
         Upgrade this node from an old node using pg_upgrade.
@@ -2295,10 +2985,23 @@ class PostgresNode(object):
         ]
         upgrade_command += options
 
-        return self._os_ops.exec_command(upgrade_command, expect_error=expect_error)
+        with trace_span("execute_utility", node=self.name, util="pg_upgrade", args=upgrade_command):
+            return self._os_ops.exec_command(upgrade_command, expect_error=expect_error)
 
     def _release_resources(self):
         self._free_port()
+        self._free_unix_socket_dir()
+
+        if self._log is not None:
+            self._log.close()
+
+    def _free_unix_socket_dir(self):
+        if self._unix_socket_dir is None:
+            return
+
+        # host and port are kept, _start creates this directory again
+        self._os_ops.rmdirs(self._unix_socket_dir, ignore_errors=True)
+        return
 
     def _free_port(self):
         assert type(self._should_free_port) is bool
@@ -2478,16 +3181,85 @@ class PostgresNodeLogReader:
             return self._data
 
     # --------------------------------------------------------------------
+    class LogLineBatch:
+        """
+        Complete lines (without decoding) of a log file.
+        """
+        _file_name: str
+        _position: int
+        _lines: typing.List[bytes]
+
+        def __init__(
+            self,
+            file_name: str,
+            position: int,
+            lines: typing.List[bytes]
+        ):
+            assert type(file_name) is str
+            assert type(position) is int
+            assert type(lines) is list
+            assert file_name != ""
+            assert position >= 0
+            self._file_name = file_name
+            self._position = position
+            self._lines = lines
+
+        @property
+        def file_name(self) -> str:
+            assert type(self._file_name) is str
+            return self._file_name
+
+        @property
+        def position(self) -> int:
+            """
+            Offset of the first line in the file.
+            """
+            assert type(self._position) is int
+            return self._position
+
+        @property
+        def lines(self) -> typing.List[bytes]:
+            assert type(self._lines) is list
+            return self._lines
+
+        def decode(self, encoding: str = "utf-8") -> typing.List[str]:
+            return [b.decode(encoding, errors="replace") for b in self._lines]
+
+    # --------------------------------------------------------------------
+    # a size of one read_binary call
+    _C_READ_BLOCK_SIZE = 64 * 1024
+
+    # a max size of data that is read from one file per call
+    _C_MAX_READ_SIZE = 16 * 1024 * 1024
+
+    _C_MAX_BATCH_LINES = 1000
+
     _node: PostgresNode
     _logs: typing.Dict[str, LogInfo]
+    _max_read_size: int
 
     # --------------------------------------------------------------------
-    def __init__(self, node: PostgresNode, from_beginnig: bool):
+    def __init__(
+        self,
+        node: PostgresNode,
+        from_beginnig: bool,
+        max_read_size: int = _C_MAX_READ_SIZE,
+    ):
+        """
+        Args:
+            node: node.
+            from_beginnig: read logs from the beginning or from their current end?
+            max_read_size: a max size of data that is read from one log file per call.
+                The rest of data is read by the next call.
+        """
         assert node is not None
         assert isinstance(node, PostgresNode)
         assert type(from_beginnig) is bool
+        assert type(max_read_size) is int
+        assert max_read_size > 0
 
         self._node = node
+        self._max_read_size = max_read_size
 
         if from_beginnig:
             self._logs = dict()
@@ -2498,83 +3270,176 @@ class PostgresNodeLogReader:
         return
 
     def read(self) -> typing.List[LogDataBlock]:
+        """
+        Read new complete lines as one decoded block per log file.
+        """
         assert self._node is not None
         assert isinstance(self._node, PostgresNode)
 
-        cur_logs = self._collect_logs(find_line_start=False)
-        assert cur_logs is not None
-        assert type(cur_logs) is dict
+        chunks: typing.Dict[str, typing.List[bytes]] = dict()
+        positions: typing.Dict[str, int] = dict()
 
-        assert type(self._logs) is dict
+        for file_name, position, chunk in self._read_chunks():
+            if file_name not in chunks:
+                chunks[file_name] = []
+                positions[file_name] = position
+
+            if chunk is not None:
+                chunks[file_name].append(chunk)
+            continue
 
         result: typing.List[__class__.LogDataBlock] = []
 
-        for file_name, cur_log_info in cur_logs.items():
-            assert type(file_name) is str
-            assert type(cur_log_info) is __class__.LogInfo
+        for file_name, file_chunks in chunks.items():
+            block = __class__.LogDataBlock(
+                file_name,
+                positions[file_name],
+                b"".join(file_chunks).decode(),
+            )
 
-            if file_name not in self._logs.keys():
-                read_pos = 0
-                file_content_b = b''
-            else:
-                prev_log_info = self._logs[file_name]
-                assert type(prev_log_info) is __class__.LogInfo
-                read_pos = prev_log_info.position  # the previous size
-                file_content_b = prev_log_info.tail
+            result.append(block)
+            continue
+
+        return result
+
+    def read_line_batches(self, max_lines: int = _C_MAX_BATCH_LINES) -> typing.Iterator[LogLineBatch]:
+        """
+        Yield new complete lines by batches. Lines are not decoded.
+        """
+        assert type(max_lines) is int
+        assert max_lines > 0
 
-            prev_data_sz = len(file_content_b)
-            assert prev_data_sz <= read_pos
+        for file_name, position, chunk in self._read_chunks():
+            if chunk is None:
+                continue
 
-            file_content_b += self._node.os_ops.read_binary(file_name, read_pos)
-            assert type(file_content_b) is bytes
+            assert type(chunk) is bytes
 
-            assert prev_data_sz <= len(file_content_b)
+            lines: typing.List[bytes] = []
+            batch_position = position
+            start = 0
 
-            #
-            # We will process completed lines only
-            #
-            completed_data_size = file_content_b.rfind(b"\n") + 1
+            while start < len(chunk):
+                x = chunk.index(b"\n", start)
+                lines.append(chunk[start:x + 1])
+                start = x + 1
 
-            assert completed_data_size >= 0
-            assert completed_data_size <= len(file_content_b)
+                if len(lines) == max_lines:
+                    yield __class__.LogLineBatch(file_name, batch_position, lines)
+                    lines = []
+                    batch_position = position + start
+                continue
 
-            completed_data = file_content_b[:completed_data_size]
-            assert type(completed_data) is bytes
-            assert len(completed_data) == completed_data_size
+            if len(lines) > 0:
+                yield __class__.LogLineBatch(file_name, batch_position, lines)
+            continue
+        return
 
-            new_tail = file_content_b[completed_data_size:]
-            assert type(new_tail) is bytes
-            assert len(new_tail) == len(file_content_b) - completed_data_size
+    def find_lines(self, patterns: typing.Iterable[bytes]) -> typing.List[str]:
+        """
+        Read new complete lines and return (decoded) lines which contain any of patterns.
 
-            completed_data_s = completed_data.decode()
-            assert type(completed_data_s) is str
+        Data is searched as bytes, so lines without patterns are not decoded at all.
+        """
+        patterns = list(patterns)
+        assert len(patterns) > 0
 
-            next_read_pos = read_pos - prev_data_sz + len(file_content_b)
+        result: typing.List[str] = []
 
-            assert read_pos <= next_read_pos
+        for _, _, chunk in self._read_chunks():
+            if chunk is None:
+                continue
 
-            # It is a FINAL paranoja check.
-            # [2026-07-10] Verified
-            assert cur_log_info.position <= next_read_pos
+            assert type(chunk) is bytes
 
-            block = __class__.LogDataBlock(
-                file_name,
-                read_pos,
-                completed_data_s,
-            )
+            line_starts: typing.Set[int] = set()
 
-            result.append(block)
+            for pattern in patterns:
+                assert type(pattern) is bytes
+                x = chunk.find(pattern)
 
-            # Save information to next iteration
-            cur_log_info.position = next_read_pos
-            cur_log_info.tail = new_tail
-            continue
+                while x != -1:
+                    line_start = chunk.rfind(b"\n", 0, x) + 1
+                    line_starts.add(line_start)
+                    # next line
+                    x = chunk.find(pattern, chunk.index(b"\n", x) + 1)
+                    continue
+                continue
 
-        # A new check point
-        self._logs = cur_logs
+            for line_start in sorted(line_starts):
+                line_end = chunk.index(b"\n", line_start) + 1
+                result.append(chunk[line_start:line_end].decode(errors="replace"))
+                continue
+            continue
 
         return result
 
+    def _read_chunks(self) -> typing.Iterator[typing.Tuple[str, int, typing.Optional[bytes]]]:
+        """
+        Yield (file_name, position, data) where data is complete lines or None.
+
+        Each file is read by blocks, up to self._max_read_size bytes.
+        State is saved before each yield.
+        """
+        cur_logs = self._collect_logs(find_line_start=False)
+        assert cur_logs is not None
+        assert type(cur_logs) is dict
+
+        assert type(self._logs) is dict
+
+        # A new check point. Deleted files are forgotten.
+        self._logs = {
+            file_name: self._logs.get(file_name, __class__.LogInfo(0))
+            for file_name in cur_logs.keys()
+        }
+
+        for file_name in list(self._logs.keys()):
+            log_info = self._logs[file_name]
+            assert type(log_info) is __class__.LogInfo
+            assert len(log_info.tail) <= log_info.position
+
+            budget = self._max_read_size
+            has_data = False
+
+            while budget > 0:
+                block = self._node.os_ops.read_binary(
+                    file_name,
+                    log_info.position,
+                    min(__class__._C_READ_BLOCK_SIZE, budget),
+                )
+                assert type(block) is bytes
+
+                if len(block) == 0:
+                    break
+
+                budget -= len(block)
+
+                data_position = log_info.position - len(log_info.tail)
+                data = log_info.tail + block
+
+                #
+                # We will process completed lines only
+                #
+                completed_data_size = data.rfind(b"\n") + 1
+
+                assert completed_data_size >= 0
+                assert completed_data_size <= len(data)
+
+                log_info.position += len(block)
+                log_info.tail = data[completed_data_size:]
+
+                if completed_data_size == 0:
+                    continue
+
+                has_data = True
+                yield file_name, data_position, data[:completed_data_size]
+                continue
+
+            if not has_data:
+                yield file_name, log_info.position - len(log_info.tail), None
+            continue
+        return
+
     def _collect_logs(self, find_line_start: bool) -> typing.Dict[str, LogInfo]:
         assert type(find_line_start) is bool
         assert self._node is not None
@@ -2641,13 +3506,7 @@ class PostgresNodeUtils:
     def detect_port_conflict(log_reader: PostgresNodeLogReader) -> bool:
         assert type(log_reader) is PostgresNodeLogReader
 
-        blocks = log_reader.read()
-        assert type(blocks) is list
-
-        for block in blocks:
-            assert type(block) is PostgresNodeLogReader.LogDataBlock
-
-            if 'Is another postmaster already running on port' in block.data:
-                return True
+        lines = log_reader.find_lines([b'Is another postmaster already running on port'])
+        assert type(lines) is list
 
-        return False
+        return len(lines) > 0
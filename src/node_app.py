@@ -70,11 +70,13 @@ class NodeApp:
             self,
             base_dir: str,
             port: typing.Optional[int] = None,
-            bin_dir: typing.Optional[str] = None
+            bin_dir: typing.Optional[str] = None,
+            unix_socket_only: bool = False,
     ) -> PostgresNode:
         assert type(base_dir) is str
         assert port is None or type(port) is int
         assert bin_dir is None or type(bin_dir) is str
+        assert type(unix_socket_only) is bool
 
         assert isinstance(self._os_ops, OsOperations)
         assert type(self._test_path) is str
@@ -91,7 +93,7 @@ class NodeApp:
 
         port_manager: typing.Optional[PortManager] = None
 
-        if port is None:
+        if port is None and not unix_socket_only:
             port_manager = self._port_manager
 
         node = PostgresNode(
@@ -100,6 +102,7 @@ class NodeApp:
             bin_dir=bin_dir,
             os_ops=self._os_ops,
             port_manager=port_manager,
+            unix_socket_only=unix_socket_only,
         )
 
         try:
@@ -120,7 +123,8 @@ class NodeApp:
             initdb_params: typing.Optional[T_LIST_STR] = None,
             pg_options: typing.Optional[T_DICT_STR_STR] = None,
             checksum: bool = True,
-            bin_dir: typing.Optional[str] = None
+            bin_dir: typing.Optional[str] = None,
+            unix_socket_only: bool = False,
     ) -> PostgresNode:
         assert type(base_dir) is str
         assert port is None or type(port) is int
@@ -130,11 +134,13 @@ class NodeApp:
         assert pg_options is None or type(pg_options) is dict
         assert type(checksum) is bool
         assert bin_dir is None or type(bin_dir) is str
+        assert type(unix_socket_only) is bool
 
         node = self.make_empty(
             base_dir,
             port,
-            bin_dir=bin_dir
+            bin_dir=bin_dir,
+            unix_socket_only=unix_socket_only,
         )
 
         final_initdb_params = initdb_params
@@ -199,7 +205,10 @@ class NodeApp:
                 options[option_name] = option_value
 
         # Define delayed propertyes
-        if "unix_socket_directories" not in options.keys():
+        if node.unix_socket_dir is not None:
+            # node has its own socket directory
+            pass
+        elif "unix_socket_directories" not in options.keys():
             options["unix_socket_directories"] = self._gettempdir_for_socket()
 
         # Set config values
@@ -0,0 +1,425 @@
+# coding: utf-8
+
+from .exceptions import TimeoutException
+from .impl.inotify import Inotify
+
+import array
+import bisect
+import mmap
+import os
+import re
+import select
+import time
+import typing
+
+T_PATTERN = typing.Union[str, bytes, typing.Pattern]
+
+_C_PATTERN_TYPE = type(re.compile(""))
+
+
+class PostgresNodeLog:
+    """
+    Search in a local server log file.
+
+    File is memory-mapped and an index of line offsets is extended
+    incrementally when the file grows, so a search never rereads the file
+    from the beginning. Searches start from a remembered position which
+    is moved past the last found line.
+
+    Examples:
+        node.log.mark()
+        node.safe_psql("select pg_reload_conf()")
+        node.log.wait_for_log("received SIGHUP", timeout=10)
+    """
+
+    class Match:
+        """
+        A line of log file that matches a pattern.
+
+        Args:
+            line_number: number of line (0-based).
+            position: offset of line in file.
+            line: text of line without the line feed.
+            groups: groups of pattern.
+        """
+        line_number: int
+        position: int
+        line: str
+        groups: typing.Tuple[typing.Optional[str], ...]
+
+        def __init__(
+            self,
+            line_number: int,
+            position: int,
+            line: str,
+            groups: typing.Tuple[typing.Optional[str], ...],
+        ):
+            assert type(line_number) is int
+            assert type(position) is int
+            assert type(line) is str
+            assert type(groups) is tuple
+            self.line_number = line_number
+            self.position = position
+            self.line = line
+            self.groups = groups
+            return
+
+        def __repr__(self):
+            return "{}(line_number={}, position={}, line={!r})".format(
+                __class__.__name__,
+                self.line_number,
+                self.position,
+                self.line,
+            )
+
+    _C_WAIT_MASK = (
+        Inotify.IN_MODIFY
+        | Inotify.IN_CLOSE_WRITE
+        | Inotify.IN_CREATE
+        | Inotify.IN_MOVED_TO
+    )
+
+    # check interval when inotify is not available
+    _C_WAIT_POLL_INTERVAL = 0.05
+
+    _file_name: str
+    _file_encoding: str
+    _fd: typing.Optional[int]
+    _file_ino: typing.Optional[int]
+    _mmap: typing.Optional[mmap.mmap]
+    _line_starts: array.array
+    _indexed_size: int
+    _position: int
+
+    # --------------------------------------------------------------------
+    def __init__(self, file_name: str, file_encoding: str = "utf-8"):
+        assert type(file_name) is str
+        assert type(file_encoding) is str
+
+        self._file_name = file_name
+        self._file_encoding = file_encoding
+        self._fd = None
+        self._file_ino = None
+        self._mmap = None
+        self._reset_index()
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    # interface ----------------------------------------------------------
+    @property
+    def file_name(self) -> str:
+        return self._file_name
+
+    @property
+    def position(self) -> int:
+        """
+        Offset in the file where the next search starts.
+        """
+        return self._position
+
+    @position.setter
+    def position(self, value: int) -> None:
+        assert type(value) is int
+        assert value >= 0
+        self._position = value
+
+    @property
+    def line_count(self) -> int:
+        """
+        Count of the complete lines (the file is refreshed).
+        """
+        self.refresh()
+        return len(self._line_starts) - 1
+
+    def refresh(self) -> None:
+        """
+        Map new data of the file and index its complete lines.
+        """
+        try:
+            st = os.stat(self._file_name)
+        except FileNotFoundError:
+            self.close()
+            self._reset_index()
+            return
+
+        if self._fd is not None and (st.st_ino != self._file_ino or st.st_size < self._indexed_size):
+            # file is replaced or truncated
+            self.close()
+            self._reset_index()
+
+        if self._fd is None:
+            self._fd = os.open(self._file_name, os.O_RDONLY)
+            self._file_ino = os.fstat(self._fd).st_ino
+
+        size = os.fstat(self._fd).st_size
+
+        if size == 0:
+            return
+
+        if self._mmap is None or len(self._mmap) < size:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+            self._mmap = mmap.mmap(self._fd, size, access=mmap.ACCESS_READ)
+
+        self._extend_index(size)
+        return
+
+    def mark(self) -> int:
+        """
+        Remember the end of the file. The next search will see new lines only.
+        """
+        self.refresh()
+        self._position = self._indexed_size
+        return self._position
+
+    def line(self, line_number: int) -> str:
+        assert type(line_number) is int
+
+        self.refresh()
+
+        if line_number < 0 or line_number >= len(self._line_starts) - 1:
+            raise IndexError("Line number {} is out of range.".format(line_number))
+
+        return self._decode(self._line_starts[line_number], self._line_starts[line_number + 1])
+
+    def search(
+        self,
+        pattern: T_PATTERN,
+        from_position: typing.Optional[int] = None,
+    ) -> typing.Optional[Match]:
+        """
+        Find the first line which matches the pattern.
+
+        Args:
+            pattern: regular expression (str, bytes or compiled).
+            from_position: offset to start from. The remembered position is used by default.
+
+        Returns:
+            None or the found line. The remembered position is moved after this line.
+        """
+        assert from_position is None or type(from_position) is int
+
+        regex = __class__._compile(pattern, self._file_encoding)
+
+        self.refresh()
+
+        start = self._position if from_position is None else from_position
+
+        if self._mmap is None or start >= self._indexed_size:
+            return None
+
+        m = regex.search(self._mmap, start, self._indexed_size)
+
+        if m is None:
+            return None
+
+        result = self._make_match(m)
+        self._position = self._line_starts[result.line_number + 1]
+        return result
+
+    def find_all(
+        self,
+        pattern: T_PATTERN,
+        from_position: typing.Optional[int] = None,
+    ) -> typing.List[Match]:
+        """
+        Find all the lines which match the pattern. The remembered position is not changed.
+        """
+        assert from_position is None or type(from_position) is int
+
+        regex = __class__._compile(pattern, self._file_encoding)
+
+        self.refresh()
+
+        start = self._position if from_position is None else from_position
+
+        result: typing.List[__class__.Match] = []
+
+        if self._mmap is None:
+            return result
+
+        while start < self._indexed_size:
+            m = regex.search(self._mmap, start, self._indexed_size)
+
+            if m is None:
+                break
+
+            match = self._make_match(m)
+            result.append(match)
+
+            # one result per line
+            start = self._line_starts[match.line_number + 1]
+            continue
+
+        return result
+
+    def wait_for_log(
+        self,
+        pattern: T_PATTERN,
+        timeout: float = 10,
+        from_position: typing.Optional[int] = None,
+    ) -> Match:
+        """
+        Wait for a line which matches the pattern.
+
+        Args:
+            pattern: regular expression (str, bytes or compiled).
+            timeout: how long should we wait (seconds)?
+            from_position: offset to start from. The remembered position is used by default.
+
+        Returns:
+            The found line. The remembered position is moved after this line.
+        """
+        assert type(timeout) in [int, float]
+        assert from_position is None or type(from_position) is int
+
+        # raise an error for a bad pattern at once
+        __class__._compile(pattern, self._file_encoding)
+
+        if from_position is not None:
+            self._position = from_position
+
+        deadline = time.monotonic() + timeout
+
+        inotify: typing.Optional[Inotify] = None
+
+        try:
+            if Inotify.is_supported():
+                inotify = Inotify()
+                try:
+                    inotify.add_watch(os.path.dirname(os.path.abspath(self._file_name)), __class__._C_WAIT_MASK)
+                except OSError:
+                    inotify.close()
+                    inotify = None
+
+            while True:
+                # search after the start of watch, so we don't lose an event
+                result = self.search(pattern)
+
+                if result is not None:
+                    return result
+
+                remaining = deadline - time.monotonic()
+
+                if remaining <= 0:
+                    raise TimeoutException(
+                        "Log line matching {!r} is not found in {} seconds.".format(
+                            __class__._pattern_text(pattern),
+                            timeout,
+                        )
+                    )
+
+                if inotify is None:
+                    time.sleep(min(remaining, __class__._C_WAIT_POLL_INTERVAL))
+                    continue
+
+                ready, _, _ = select.select([inotify.fileno()], [], [], remaining)
+
+                if ready:
+                    inotify.read_events()
+                continue
+        finally:
+            if inotify is not None:
+                inotify.close()
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+        if self._fd is not None:
+            fd = self._fd
+            self._fd = None
+            self._file_ino = None
+            os.close(fd)
+        return
+
+    # --------------------------------------------------------------------
+    def _reset_index(self) -> None:
+        # offsets of line starts, the last item is the end of the last complete line
+        self._line_starts = array.array("q", [0])
+        self._indexed_size = 0
+        self._position = 0
+        return
+
+    def _extend_index(self, size: int) -> None:
+        assert self._mmap is not None
+        assert type(size) is int
+
+        mm = self._mmap
+        line_starts = self._line_starts
+        pos = self._indexed_size
+
+        while pos < size:
+            x = mm.find(b"\n", pos, size)
+
+            if x == -1:
+                break
+
+            pos = x + 1
+            line_starts.append(pos)
+            continue
+
+        self._indexed_size = line_starts[-1]
+        return
+
+    def _make_match(self, m: typing.Match) -> Match:
+        line_number = bisect.bisect_right(self._line_starts, m.start()) - 1
+        assert line_number >= 0
+        assert line_number < len(self._line_starts) - 1
+
+        line_start = self._line_starts[line_number]
+        line_end = self._line_starts[line_number + 1]
+
+        groups = tuple(
+            None if g is None else g.decode(self._file_encoding, errors="replace")
+            for g in m.groups()
+        )
+
+        return __class__.Match(
+            line_number,
+            line_start,
+            self._decode(line_start, line_end),
+            groups,
+        )
+
+    def _decode(self, start: int, end: int) -> str:
+        assert self._mmap is not None
+        data = self._mmap[start:end]
+        return data.decode(self._file_encoding, errors="replace").rstrip("\r\n")
+
+    @staticmethod
+    def _compile(pattern: T_PATTERN, encoding: str) -> typing.Pattern:
+        flags = 0
+
+        if type(pattern) is _C_PATTERN_TYPE:
+            if type(pattern.pattern) is bytes:
+                return pattern
+            # bytes pattern can't be unicode
+            flags = pattern.flags & ~re.UNICODE
+            pattern = pattern.pattern
+
+        if type(pattern) is str:
+            pattern = pattern.encode(encoding)
+
+        if type(pattern) is not bytes:
+            raise TypeError("Pattern has a bad type: {}.".format(type(pattern).__name__))
+
+        # "^" and "$" work for each line
+        return re.compile(pattern, flags | re.MULTILINE)
+
+    @staticmethod
+    def _pattern_text(pattern: T_PATTERN) -> str:
+        if type(pattern) is _C_PATTERN_TYPE:
+            pattern = pattern.pattern
+
+        if type(pattern) is bytes:
+            return pattern.decode(errors="replace")
+
+        return pattern
@@ -0,0 +1,424 @@
+# coding: utf-8
+
+from .exceptions import InvalidOperationException
+
+import csv
+import re
+import typing
+
+
+class PgbenchInterval:
+    """
+    One line of pgbench --progress output.
+
+    Args:
+        time: seconds since the start of the run (end of the interval).
+        tps: transactions per second in this interval.
+        latency_avg: average latency (milliseconds).
+        latency_stddev: standard deviation of latency (milliseconds, NaN
+            if there were no transactions).
+        failed: count of failed transactions (0 for pgbench before 15).
+        lag: average schedule lag (milliseconds, --rate only) or None.
+    """
+    __slots__ = (
+        "time",
+        "tps",
+        "latency_avg",
+        "latency_stddev",
+        "failed",
+        "lag",
+    )
+
+    time: float
+    tps: float
+    latency_avg: float
+    latency_stddev: float
+    failed: int
+    lag: typing.Optional[float]
+
+    def __init__(self, time, tps, latency_avg, latency_stddev, failed=0, lag=None):
+        assert type(time) is float
+        assert type(tps) is float
+        assert type(latency_avg) is float
+        assert type(latency_stddev) is float
+        assert type(failed) is int
+        assert lag is None or type(lag) is float
+        self.time = time
+        self.tps = tps
+        self.latency_avg = latency_avg
+        self.latency_stddev = latency_stddev
+        self.failed = failed
+        self.lag = lag
+        return
+
+    def __repr__(self):
+        return "{}(time={:.1f}, tps={:.1f}, latency_avg={:.3f})".format(
+            __class__.__name__,
+            self.time,
+            self.tps,
+            self.latency_avg,
+        )
+
+
+class PgbenchCommand:
+    """
+    Statistics of one command of a script (pgbench --report-per-command).
+
+    Args:
+        latency: average latency (milliseconds).
+        failures: count of failures (None for pgbench before 15).
+        command: text of the command.
+    """
+    __slots__ = (
+        "latency",
+        "failures",
+        "command",
+    )
+
+    latency: float
+    failures: typing.Optional[int]
+    command: str
+
+    def __init__(self, latency, failures, command):
+        assert type(latency) is float
+        assert failures is None or type(failures) is int
+        assert type(command) is str
+        self.latency = latency
+        self.failures = failures
+        self.command = command
+        return
+
+    def __repr__(self):
+        return "{}(latency={:.3f}, command='{}')".format(
+            __class__.__name__,
+            self.latency,
+            self.command,
+        )
+
+
+class PgbenchScript:
+    """
+    Statistics of one script. A run of one script has one script with
+    the statistics of the whole run.
+
+    Args:
+        name: name of the script ("<builtin: TPC-B (sort of)>", a file name).
+        weight: weight of the script.
+        transactions: count of processed transactions.
+        tps: transactions per second.
+        failed: count of failed transactions.
+        latency_avg: average latency (milliseconds) or None.
+        latency_stddev: standard deviation of latency (milliseconds) or None.
+        commands: statistics of commands (with --report-per-command).
+    """
+    __slots__ = (
+        "name",
+        "weight",
+        "transactions",
+        "tps",
+        "failed",
+        "latency_avg",
+        "latency_stddev",
+        "commands",
+    )
+
+    name: str
+    weight: int
+    transactions: int
+    tps: float
+    failed: int
+    latency_avg: typing.Optional[float]
+    latency_stddev: typing.Optional[float]
+    commands: typing.List[PgbenchCommand]
+
+    def __init__(self, name: str):
+        assert type(name) is str
+        self.name = name
+        self.weight = 1
+        self.transactions = 0
+        self.tps = 0.0
+        self.failed = 0
+        self.latency_avg = None
+        self.latency_stddev = None
+        self.commands = []
+        return
+
+    def __repr__(self):
+        return "{}(name='{}', transactions={}, tps={:.1f})".format(
+            __class__.__name__,
+            self.name,
+            self.transactions,
+            self.tps,
+        )
+
+
+class PgbenchResult:
+    """
+    Result of a pgbench run parsed from its output.
+
+    The summary is taken from stdout, the time series of --progress is
+    taken from stderr. Latencies are in milliseconds. Fields which are not
+    reported by this run (or by this version of pgbench) are None.
+
+    Results of runs can be compared by :meth:`change` and
+    :meth:`is_regression`.
+
+    Examples:
+        result = node.pgbench_result(time=10, progress=1, report_per_command=True)
+        print(result.tps, result.latency_avg, result.failed)
+        print([i.tps for i in result.progress])
+        assert not result.is_regression(baseline, tolerance=0.1)
+    """
+
+    transaction_type: typing.Optional[str]
+    scaling_factor: typing.Optional[int]
+    query_mode: typing.Optional[str]
+    clients: typing.Optional[int]
+    threads: typing.Optional[int]
+    duration: typing.Optional[int]
+    transactions: int
+    failed: int
+    latency_avg: typing.Optional[float]
+    latency_stddev: typing.Optional[float]
+    initial_connection_time: typing.Optional[float]
+    tps: float
+    scripts: typing.List[PgbenchScript]
+    progress: typing.List[PgbenchInterval]
+    output: str
+
+    # pgbench 14+ prints "(without initial connection time)", older
+    # versions print two lines "(including/excluding connections establishing)"
+    _C_TPS_REGEX = re.compile(r"^tps = ([0-9.]+) \((?:without|excluding)")
+
+    _C_SUMMARY_REGEXES = [
+        ("transaction_type", str, re.compile(r"^transaction type: (.+)$")),
+        ("scaling_factor", int, re.compile(r"^scaling factor: (\d+)$")),
+        ("query_mode", str, re.compile(r"^query mode: (\w+)$")),
+        ("clients", int, re.compile(r"^number of clients: (\d+)$")),
+        ("threads", int, re.compile(r"^number of threads: (\d+)$")),
+        ("duration", int, re.compile(r"^duration: (\d+) s$")),
+        ("transactions", int, re.compile(r"^number of transactions actually processed: (\d+)")),
+        ("failed", int, re.compile(r"^number of failed transactions: (\d+)")),
+        ("latency_avg", float, re.compile(r"^latency average ?[=:] ([0-9.]+) ms")),
+        ("latency_stddev", float, re.compile(r"^latency stddev ?[=:] ([0-9.]+) ms")),
+        ("initial_connection_time", float, re.compile(r"^initial connection time = ([0-9.]+) ms")),
+    ]  # yapf: disable
+
+    # lines of a script section start with " - "
+    _C_SCRIPT_REGEXES = [
+        ("weight", int, re.compile(r"^weight: (\d+)")),
+        ("failed", int, re.compile(r"^number of failed transactions: (\d+)")),
+        ("latency_avg", float, re.compile(r"^latency average = ([0-9.]+) ms")),
+        ("latency_stddev", float, re.compile(r"^latency stddev = ([0-9.]+) ms")),
+    ]  # yapf: disable
+
+    _C_SCRIPT_REGEX = re.compile(r"^SQL script \d+: (.+)$")
+    _C_SCRIPT_TPS_REGEX = re.compile(r"^(\d+) transactions \(.*tps = ([0-9.]+)\)")
+    _C_COMMANDS_REGEX = re.compile(r"^(?: - )?statement latencies in milliseconds")
+
+    # latency, failures [and retries] (pgbench 15+), command
+    _C_COMMAND_REGEX = re.compile(r"^\s+([0-9.]+)\s+((?:\d+\s+)*)(\S.*)$")
+
+    _C_PROGRESS_REGEX = re.compile(
+        r"^progress: ([0-9.]+) s, ([0-9.]+) tps, lat ([0-9.]+) ms stddev ([0-9.]+|nan|NaN)"
+        r"(?:, (\d+) failed)?(?:, lag ([0-9.]+) ms)?"
+    )
+
+    # --------------------------------------------------------------------
+    def __init__(self, output: str, errors: typing.Optional[str] = None):
+        """
+        Args:
+            output: stdout of pgbench.
+            errors: stderr of pgbench (the progress is there).
+        """
+        assert type(output) is str
+        assert errors is None or type(errors) is str
+
+        self.transaction_type = None
+        self.scaling_factor = None
+        self.query_mode = None
+        self.clients = None
+        self.threads = None
+        self.duration = None
+        self.transactions = 0
+        self.failed = 0
+        self.latency_avg = None
+        self.latency_stddev = None
+        self.initial_connection_time = None
+        self.tps = None
+        self.scripts = []
+        self.progress = []
+        self.output = output
+
+        self._parse_summary(output)
+
+        if self.tps is None:
+            raise InvalidOperationException("Unexpected output of pgbench:\n{}".format(output))
+
+        if errors:
+            self._parse_progress(errors)
+        return
+
+    def __repr__(self):
+        return "{}(tps={:.1f}, latency_avg={}, transactions={}, failed={})".format(
+            __class__.__name__,
+            self.tps,
+            self.latency_avg,
+            self.transactions,
+            self.failed,
+        )
+
+    # interface ----------------------------------------------------------
+    def change(self, baseline: "PgbenchResult") -> typing.Dict[str, float]:
+        """
+        Relative changes against a baseline run: new / old - 1.
+
+        Returns:
+            A dictionary of tps, latency_avg and latency_stddev (only the
+            fields reported by both runs).
+        """
+        assert isinstance(baseline, PgbenchResult)
+
+        result = dict()
+
+        for name in ["tps", "latency_avg", "latency_stddev"]:
+            old = getattr(baseline, name)
+            new = getattr(self, name)
+
+            if old is None or new is None or old == 0:
+                continue
+
+            result[name] = new / old - 1
+            continue
+
+        return result
+
+    def is_regression(self, baseline: "PgbenchResult", tolerance: float = 0.05) -> bool:
+        """
+        Is this run worse than a baseline run: TPS is lower or average
+        latency is higher by more than tolerance (a fraction), or there are
+        more failed transactions?
+        """
+        assert isinstance(baseline, PgbenchResult)
+        assert type(tolerance) in [int, float]
+        assert tolerance >= 0
+
+        change = self.change(baseline)
+
+        if change.get("tps", 0) < -tolerance:
+            return True
+
+        if change.get("latency_avg", 0) > tolerance:
+            return True
+
+        return self.failed > baseline.failed
+
+    def to_csv(self, path: str) -> None:
+        """
+        Write the progress time series to a CSV file.
+        """
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(PgbenchInterval.__slots__)
+            for i in self.progress:
+                writer.writerow([getattr(i, name) for name in PgbenchInterval.__slots__])
+                continue
+        return
+
+    # --------------------------------------------------------------------
+    def _parse_summary(self, output: str) -> None:
+        script = None
+        commands = None
+
+        for line in output.splitlines():
+            if commands is not None:
+                m = __class__._C_COMMAND_REGEX.match(line)
+                if m is not None:
+                    failures = m.group(2).split()
+                    commands.append(PgbenchCommand(
+                        float(m.group(1)),
+                        int(failures[0]) if failures else None,
+                        m.group(3),
+                    ))
+                    continue
+                commands = None
+
+            if __class__._C_COMMANDS_REGEX.match(line):
+                if script is None:
+                    # one script, its statistics are the statistics of the run
+                    script = self._add_script(self.transaction_type or "")
+                commands = script.commands
+                continue
+
+            m = __class__._C_SCRIPT_REGEX.match(line)
+            if m is not None:
+                script = self._add_script(m.group(1))
+                continue
+
+            if script is not None and line.startswith(" - "):
+                __class__._parse_script_line(script, line[3:])
+                continue
+
+            m = __class__._C_TPS_REGEX.match(line)
+            if m is not None:
+                self.tps = float(m.group(1))
+                continue
+
+            for name, conv, regex in __class__._C_SUMMARY_REGEXES:
+                m = regex.match(line)
+                if m is not None:
+                    setattr(self, name, conv(m.group(1)))
+                    break
+                continue
+            continue
+
+        if len(self.scripts) == 0:
+            self._add_script(self.transaction_type or "")
+
+        # a single script has the statistics of the whole run
+        if len(self.scripts) == 1 and self.transaction_type != "multiple scripts":
+            script = self.scripts[0]
+            script.transactions = self.transactions
+            script.tps = self.tps or 0.0
+            script.failed = self.failed
+            script.latency_avg = self.latency_avg
+            script.latency_stddev = self.latency_stddev
+        return
+
+    def _add_script(self, name: str) -> PgbenchScript:
+        script = PgbenchScript(name)
+        self.scripts.append(script)
+        return script
+
+    @staticmethod
+    def _parse_script_line(script: PgbenchScript, line: str) -> None:
+        m = __class__._C_SCRIPT_TPS_REGEX.match(line)
+        if m is not None:
+            script.transactions = int(m.group(1))
+            script.tps = float(m.group(2))
+            return
+
+        for name, conv, regex in __class__._C_SCRIPT_REGEXES:
+            m = regex.match(line)
+            if m is not None:
+                setattr(script, name, conv(m.group(1)))
+                break
+            continue
+        return
+
+    def _parse_progress(self, errors: str) -> None:
+        for line in errors.splitlines():
+            m = __class__._C_PROGRESS_REGEX.match(line)
+            if m is None:
+                continue
+
+            self.progress.append(PgbenchInterval(
+                float(m.group(1)),
+                float(m.group(2)),
+                float(m.group(3)),
+                float(m.group(4)),
+                int(m.group(5) or 0),
+                None if m.group(6) is None else float(m.group(6)),
+            ))
+            continue
+        return
@@ -44,10 +44,20 @@ PostgresNode(name='...', port=..., base_dir='...')
 
 from six import raise_from
 
+from concurrent.futures import ThreadPoolExecutor
+
 from .consts import LOGICAL_REPL_MAX_CATCHUP_ATTEMPTS
 from .defaults import default_dbname, default_username2
+from .enums import IsolationLevel
 from .exceptions import CatchUpException
-from .utils import options_string
+from .tracing import trace_span
+from .utils import options_string, execute_utility2, get_bin_path2
+
+import logging
+import os
+import threading
+import time
+import typing
 
 
 class Publication(object):
@@ -133,6 +143,201 @@ class Publication(object):
             username=self.username,
         )
 
+    def tables(self):
+        """
+        Returns:
+            Qualified names of the published tables (list).
+        """
+        rows = self.node.execute(
+            "select pg_catalog.quote_ident(schemaname) || '.' || pg_catalog.quote_ident(tablename)"
+            " from pg_catalog.pg_publication_tables"
+            " where pubname = '{}' order by 1".format(self.name),
+            dbname=self.dbname,
+            username=self.username,
+        )
+        return [r[0] for r in rows]
+
+    def clone_schema(self, node, dbname=None, username=None):
+        """
+        Clone the schema of the publisher's database to a subscriber:
+        output of ``pg_dump --schema-only`` is passed to psql of the
+        subscriber. Publications, subscriptions, owners and privileges
+        are not cloned.
+
+        Args:
+            node: subscriber's node.
+            dbname: database of the subscriber.
+            username: user of the subscriber.
+        """
+        assert node is not None
+        assert dbname is None or type(dbname) is str
+        assert username is None or type(username) is str
+
+        _params = [
+            get_bin_path2(self.node.os_ops, "pg_dump"),
+            "-p", str(self.node.port),
+            "-h", self.node.host,
+            "-U", self.username,
+            "-d", self.dbname,
+            "--schema-only",
+            "--no-publications",
+            "--no-subscriptions",
+            "--no-owner",
+            "--no-privileges",
+        ]  # yapf: disable
+
+        with trace_span("pubsub.clone_schema", node=node.name):
+            schema = execute_utility2(self.node.os_ops, _params, self.node.utils_log_file)
+
+            node.safe_psql(
+                filename="-",
+                input=schema.encode("utf-8"),
+                dbname=dbname,
+                username=username,
+            )
+
+    def seed(self,
+             node,
+             name,
+             schema=True,
+             preload=True,
+             jobs=4,
+             dbname=None,
+             username=None,
+             **params):
+        """
+        Create a subscription of a new subscriber.
+
+        The schema is cloned (see :meth:`clone_schema`). The replication slot
+        is created by a replication connection, the snapshot exported at its
+        consistent point is used to copy the published tables by parallel
+        COPY streams (triggers and foreign keys of the subscriber are not
+        fired). Then the subscription uses this slot and is created with
+        ``copy_data=false``, so the changes after the snapshot are streamed.
+
+        A superuser is required on the subscriber for preloading.
+
+        Args:
+            node: subscriber's node.
+            name: subscription name (and the name of its slot).
+            schema: clone the schema?
+            preload: copy the data by COPY streams? Otherwise the initial
+                synchronization of the subscription copies it.
+            jobs: count of tables copied in parallel.
+            dbname: database of the subscriber.
+            username: user of the subscriber.
+            params: other subscription parameters.
+
+        Returns:
+            A :class:`.Subscription` object.
+        """
+        assert node is not None
+        assert type(name) is str
+        assert type(schema) is bool
+        assert type(preload) is bool
+        assert type(jobs) is int
+        assert jobs > 0
+        assert dbname is None or type(dbname) is str
+        assert username is None or type(username) is str
+
+        if schema:
+            self.clone_schema(node, dbname=dbname, username=username)
+
+        if not preload:
+            return Subscription(node=node, publication=self, name=name,
+                                dbname=dbname, username=username, **params)
+
+        tables = self.tables()
+
+        # a slot with this name may belong to another subscription
+        created = False
+
+        try:
+            with self.node.connect(dbname=self.dbname,
+                                   username=self.username,
+                                   autocommit=True,
+                                   replication="database") as con:
+                # the snapshot is valid until the next command of this connection
+                res = con.execute(
+                    "CREATE_REPLICATION_SLOT \"{}\" LOGICAL pgoutput EXPORT_SNAPSHOT".format(name))
+                snapshot = res[0][2]
+                created = True
+
+                def copy(table):
+                    self._copy_table(table, snapshot, node, dbname, username)
+
+                with trace_span("pubsub.preload", node=node.name, tables=len(tables)):
+                    with ThreadPoolExecutor(max_workers=min(jobs, max(len(tables), 1))) as executor:
+                        # list() rethrows an exception of a worker
+                        list(executor.map(copy, tables))
+
+            params.update(create_slot=False, slot_name=name, copy_data=False)
+
+            return Subscription(node=node, publication=self, name=name,
+                                dbname=dbname, username=username, **params)
+        except Exception:
+            if created:
+                try:
+                    self.node.execute(
+                        "select pg_catalog.pg_drop_replication_slot(slot_name)"
+                        " from pg_catalog.pg_replication_slots where slot_name = '{}'".format(name),
+                        dbname=self.dbname,
+                        username=self.username,
+                    )
+                except Exception as e:
+                    # the original exception is more important
+                    logging.warning("Failed to drop replication slot {}: {}".format(name, e))
+            raise
+
+    def _copy_table(self, table, snapshot, node, dbname, username):
+        assert type(table) is str
+        assert type(snapshot) is str
+
+        r, w = os.pipe()
+        reader = os.fdopen(r, "rb")
+        writer = os.fdopen(w, "wb")
+
+        errors = []
+
+        def load():
+            try:
+                with node.connect(dbname=dbname, username=username) as con:
+                    con.execute("set local session_replication_role = replica")
+                    con.copy("copy {} from stdin".format(table), reader)
+
+                    # the end of stream is reached on an error of the writer too
+                    if errors:
+                        return
+                    con.commit()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                # a writer gets EPIPE if loading has failed
+                reader.close()
+
+        loader = threading.Thread(target=load)
+        loader.start()
+
+        try:
+            with self.node.connect(dbname=self.dbname, username=self.username) as con:
+                con.begin(IsolationLevel.RepeatableRead)
+                con.execute("set transaction snapshot '{}'".format(snapshot))
+                con.copy("copy {} to stdout".format(table), writer)
+                con.commit()
+        except Exception as e:
+            errors.append(e)
+
+        try:
+            writer.close()
+        except Exception as e:
+            errors.append(e)
+
+        loader.join()
+
+        # the first error is the cause (EPIPE follows an error of loading)
+        if errors:
+            raise errors[0]
+
 
 class Subscription(object):
     def __init__(self,
@@ -183,7 +388,7 @@ class Subscription(object):
 
         # additional parameters
         if params:
-            query += " with ({})".format(options_string(**params))
+            query += " with ({})".format(options_string(", ", **params))
 
         # Note: cannot run 'create subscription' query in transaction mode
         self.node.execute(
@@ -280,12 +485,14 @@ class Subscription(object):
             username=self.username,
         )
 
-    def catchup(self, username=None):
+    def catchup(self, username=None, timeout=None):
         """
         Wait until subscription catches up with publication.
+        See :class:`.LogicalCatchup`.
 
         Args:
             username: remote node's user name.
+            timeout: how long should we wait (seconds)?
         """
         assert username is None or type(username) is str
 
@@ -296,47 +503,183 @@ class Subscription(object):
         #
         assert username is None or username == self.username
 
-        try:
-            #
-            # [2026-07-10]
-            #   About dbname=None and username=None
-            #   We will try to use self.pub.xxx the next time. OK?
-            #
-            pub_lsn = self.pub.node.execute(
-                query="select pg_current_wal_lsn()",
-                dbname=None,
-                username=None,
-            )[0][0]  # yapf: disable
-            # create dummy xact, as LR replicates only on commit.
-            self.pub.node.execute(
-                query="select txid_current()",
-                dbname=None,
-                username=None,
-            )
-            query = """
-            select '{}'::pg_lsn - replay_lsn <= 0
-            from pg_catalog.pg_stat_replication where application_name = '{}'
-            """.format(pub_lsn, self.name)
-
-            # wait until this LSN reaches subscriber
-            self.pub.node.poll_query_until(
-                query=query,
-                dbname=self.pub.dbname,
-                username=self.pub.username,
-                max_attempts=LOGICAL_REPL_MAX_CATCHUP_ATTEMPTS,
-            )
+        LogicalCatchup([self], timeout=timeout).wait()
 
-            # Now, wait until there are no tablesync workers: probably
-            # replay_lsn above was sent with changes of new tables just skipped;
-            # they will be eaten by tablesync workers.
-            query = """
-            select count(*) = 0 from pg_subscription_rel where srsubstate != 'r'
-            """
-            self.node.poll_query_until(
-                query=query,
-                dbname=self.dbname,
-                username=self.username,
-                max_attempts=LOGICAL_REPL_MAX_CATCHUP_ATTEMPTS,
-            )
+
+class LogicalCatchup(object):
+    """
+    Waits until subscriptions catch up with their publications.
+
+    At first the initial synchronization of all the tables of a
+    subscription has to be finished (pg_subscription_rel). Then the
+    replay position of its WAL sender has to reach the current WAL position
+    of the publisher taken at the start.
+
+    The replay position is used instead of confirmed_flush_lsn of the slot:
+    it is reported when a change is applied, while the confirmed flush
+    waits for a flush of WAL of the subscriber (its synchronous_commit is
+    off by default).
+
+    Many subscriptions (of many nodes) are checked at once: one query per
+    connection and round. Connections are opened once, the pause between
+    rounds grows while there is no progress.
+
+    Example:
+        LogicalCatchup([sub1, sub2, sub3], timeout=30).wait()
+    """
+
+    _C_MIN_SLEEP = 0.005
+    _C_MAX_SLEEP = 0.5
+
+    _C_SYNCED_QUERY = """
+        select s.subname
+        from pg_catalog.pg_subscription s
+        where s.subname = any(%s)
+          and s.subdbid = (select oid from pg_catalog.pg_database where datname = pg_catalog.current_database())
+          and not exists (
+            select from pg_catalog.pg_subscription_rel r
+            where r.srsubid = s.oid and r.srsubstate <> 'r'
+          )
+        """
+
+    # application_name of WAL sender is the name of subscription
+    _C_REPLAYED_QUERY = """
+        select application_name from pg_catalog.pg_stat_replication
+        where application_name = any(%s) and replay_lsn >= %s::pg_lsn
+        """
+
+    _subscriptions: typing.List[Subscription]
+    _timeout: float
+    _connections: typing.Dict[typing.Tuple[int, str, str], typing.Any]
+
+    def __init__(self, subscriptions, timeout=None):
+        """
+        Args:
+            subscriptions: a list of :class:`.Subscription`.
+            timeout: how long should we wait (seconds)?
+        """
+        assert type(subscriptions) is list
+        assert timeout is None or type(timeout) in [int, float]
+
+        for sub in subscriptions:
+            assert isinstance(sub, Subscription)
+            continue
+
+        self._subscriptions = subscriptions
+        self._timeout = float(LOGICAL_REPL_MAX_CATCHUP_ATTEMPTS if timeout is None else timeout)
+        self._connections = {}
+        return
+
+    def wait(self):
+        try:
+            self._wait()
+        except CatchUpException:
+            raise
         except Exception as e:
             raise_from(CatchUpException("Failed to catch up"), e)
+        finally:
+            for con in self._connections.values():
+                con.close()
+                continue
+            self._connections.clear()
+        return
+
+    # --------------------------------------------------------------------
+    def _connect(self, node, dbname, username):
+        key = (id(node), dbname, username)
+        con = self._connections.get(key)
+
+        if con is None:
+            con = node.connect(dbname=dbname, username=username, autocommit=True)
+            self._connections[key] = con
+
+        return con
+
+    def _subscriber_connect(self, sub):
+        return self._connect(sub.node, sub.dbname, sub.username)
+
+    def _publisher_connect(self, sub):
+        return self._connect(sub.pub.node, sub.pub.dbname, sub.pub.username)
+
+    @staticmethod
+    def _group(subs, key_func):
+        groups = dict()
+
+        for sub in subs:
+            groups.setdefault(key_func(sub), []).append(sub)
+            continue
+
+        return groups.values()
+
+    def _wait(self):
+        deadline = time.monotonic() + self._timeout
+
+        # a target LSN per publisher
+        targets = dict()
+
+        for subs in __class__._group(self._subscriptions, lambda x: (id(x.pub.node), x.pub.dbname, x.pub.username)):
+            con = self._publisher_connect(subs[0])
+            lsn = con.execute("select pg_catalog.pg_current_wal_lsn()::text")[0][0]
+
+            # create dummy xact, as LR replicates only on commit.
+            con.execute("select pg_catalog.txid_current()")
+
+            for sub in subs:
+                targets[sub] = lsn
+                continue
+            continue
+
+        not_synced = list(self._subscriptions)
+        not_replayed = []
+        sleep_time = __class__._C_MIN_SLEEP
+
+        while len(not_synced) > 0 or len(not_replayed) > 0:
+            progress = False
+
+            # initial synchronization of tables
+            for subs in __class__._group(not_synced, lambda x: (id(x.node), x.dbname, x.username)):
+                con = self._subscriber_connect(subs[0])
+                rows = con.execute(__class__._C_SYNCED_QUERY, [sub.name for sub in subs])
+                synced = set(r[0] for r in rows)
+
+                for sub in subs:
+                    if sub.name in synced:
+                        not_synced.remove(sub)
+                        not_replayed.append(sub)
+                        progress = True
+                    continue
+                continue
+
+            # replay positions of WAL senders
+            for subs in __class__._group(not_replayed, lambda x: (id(x.pub.node), x.pub.dbname, x.pub.username)):
+                con = self._publisher_connect(subs[0])
+                rows = con.execute(
+                    __class__._C_REPLAYED_QUERY,
+                    [sub.name for sub in subs],
+                    targets[subs[0]],
+                )
+                replayed = set(r[0] for r in rows)
+
+                for sub in subs:
+                    if sub.name in replayed:
+                        not_replayed.remove(sub)
+                        progress = True
+                    continue
+                continue
+
+            if len(not_synced) == 0 and len(not_replayed) == 0:
+                break
+
+            if time.monotonic() > deadline:
+                raise CatchUpException("Failed to catch up: {}".format(
+                    ", ".join(sub.name for sub in not_synced + not_replayed)
+                ))
+
+            if progress:
+                sleep_time = __class__._C_MIN_SLEEP
+            else:
+                sleep_time = min(sleep_time * 2, __class__._C_MAX_SLEEP)
+
+            time.sleep(sleep_time)
+            continue
+        return
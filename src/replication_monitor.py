@@ -0,0 +1,457 @@
+# coding: utf-8
+
+from .exceptions import InvalidOperationException
+from .utils import PgVer
+
+import collections
+import csv
+import logging
+import math
+import threading
+import time
+import typing
+
+
+class ReplicationSample:
+    """
+    State of one standby in pg_stat_replication at one moment.
+
+    LSNs are byte positions in WAL. Lags are in seconds, they are 0 when
+    the server reports NULL (a standby has caught up and is idle).
+
+    Args:
+        timestamp: time.time() of the sample.
+        application_name: application_name of the standby.
+        state: state of its WAL sender (streaming, catchup, ...).
+        sync_state: async, sync, potential or quorum.
+        current_lsn: current WAL position of the sampled node.
+        sent_lsn, write_lsn, flush_lsn, replay_lsn: positions of the standby.
+        write_lag, flush_lag, replay_lag: lags reported by the server.
+    """
+    __slots__ = (
+        "timestamp",
+        "application_name",
+        "state",
+        "sync_state",
+        "current_lsn",
+        "sent_lsn",
+        "write_lsn",
+        "flush_lsn",
+        "replay_lsn",
+        "write_lag",
+        "flush_lag",
+        "replay_lag",
+    )
+
+    timestamp: float
+    application_name: str
+    state: str
+    sync_state: str
+    current_lsn: int
+    sent_lsn: int
+    write_lsn: int
+    flush_lsn: int
+    replay_lsn: int
+    write_lag: float
+    flush_lag: float
+    replay_lag: float
+
+    def __init__(self, timestamp: float, row: typing.Sequence):
+        assert type(timestamp) is float
+        assert len(row) == 11
+        self.timestamp = timestamp
+        self.application_name = row[0]
+        self.state = row[1]
+        self.sync_state = row[2]
+        self.current_lsn = __class__._to_int(row[3])
+        self.sent_lsn = __class__._to_int(row[4])
+        self.write_lsn = __class__._to_int(row[5])
+        self.flush_lsn = __class__._to_int(row[6])
+        self.replay_lsn = __class__._to_int(row[7])
+        self.write_lag = __class__._to_float(row[8])
+        self.flush_lag = __class__._to_float(row[9])
+        self.replay_lag = __class__._to_float(row[10])
+        return
+
+    @property
+    def sent_lag_bytes(self) -> int:
+        return max(0, self.current_lsn - self.sent_lsn)
+
+    @property
+    def flush_lag_bytes(self) -> int:
+        return max(0, self.current_lsn - self.flush_lsn)
+
+    @property
+    def replay_lag_bytes(self) -> int:
+        return max(0, self.current_lsn - self.replay_lsn)
+
+    def __repr__(self):
+        return "{}(application_name={}, state={}, replay_lag={:.6f}, replay_lag_bytes={})".format(
+            __class__.__name__,
+            self.application_name,
+            self.state,
+            self.replay_lag,
+            self.replay_lag_bytes,
+        )
+
+    @staticmethod
+    def _to_int(value) -> int:
+        return 0 if value is None else int(value)
+
+    @staticmethod
+    def _to_float(value) -> float:
+        return 0.0 if value is None else float(value)
+
+
+class ReplicationLagStats:
+    """
+    Distribution of one metric of a standby over all the samples.
+    """
+    __slots__ = ("_values",)
+
+    _values: typing.List[float]
+
+    def __init__(self, values: typing.Iterable[float]):
+        self._values = sorted(values)
+        return
+
+    @property
+    def count(self) -> int:
+        return len(self._values)
+
+    @property
+    def max(self) -> float:
+        return self._values[-1] if self._values else 0.0
+
+    @property
+    def mean(self) -> float:
+        return sum(self._values) / len(self._values) if self._values else 0.0
+
+    def percentile(self, p: float) -> float:
+        """
+        Nearest-rank percentile.
+
+        Args:
+            p: a fraction in [0, 1] (0.99 is p99).
+        """
+        assert type(p) in [int, float]
+        assert p >= 0 and p <= 1
+
+        if not self._values:
+            return 0.0
+
+        rank = max(1, math.ceil(p * len(self._values)))
+        return self._values[rank - 1]
+
+    def __repr__(self):
+        return "{}(count={}, p50={}, p99={}, max={})".format(
+            __class__.__name__,
+            self.count,
+            self.percentile(0.5),
+            self.percentile(0.99),
+            self.max,
+        )
+
+
+class ReplicationLagSummary:
+    """
+    Replication lag of one standby during all the samples.
+
+    Lags in seconds: write_lag, flush_lag, replay_lag.
+    Lags in bytes: sent_lag_bytes, flush_lag_bytes, replay_lag_bytes.
+    replay_rate is WAL replayed by the standby per second.
+    """
+    application_name: str
+    sample_count: int
+    write_lag: ReplicationLagStats
+    flush_lag: ReplicationLagStats
+    replay_lag: ReplicationLagStats
+    sent_lag_bytes: ReplicationLagStats
+    flush_lag_bytes: ReplicationLagStats
+    replay_lag_bytes: ReplicationLagStats
+    replay_rate: float
+
+    def __init__(self, application_name: str, samples: typing.List[ReplicationSample]):
+        assert type(application_name) is str
+        assert type(samples) is list
+        assert len(samples) > 0
+
+        self.application_name = application_name
+        self.sample_count = len(samples)
+        self.write_lag = ReplicationLagStats(s.write_lag for s in samples)
+        self.flush_lag = ReplicationLagStats(s.flush_lag for s in samples)
+        self.replay_lag = ReplicationLagStats(s.replay_lag for s in samples)
+        self.sent_lag_bytes = ReplicationLagStats(s.sent_lag_bytes for s in samples)
+        self.flush_lag_bytes = ReplicationLagStats(s.flush_lag_bytes for s in samples)
+        self.replay_lag_bytes = ReplicationLagStats(s.replay_lag_bytes for s in samples)
+
+        first = samples[0]
+        last = samples[-1]
+        duration = last.timestamp - first.timestamp
+
+        if duration > 0:
+            self.replay_rate = max(0, last.replay_lsn - first.replay_lsn) / duration
+        else:
+            self.replay_rate = 0.0
+        return
+
+    def __repr__(self):
+        return "{}(application_name={}, sample_count={}, replay_lag={}, replay_lag_bytes={}, replay_rate={:.1f})".format(
+            __class__.__name__,
+            self.application_name,
+            self.sample_count,
+            self.replay_lag,
+            self.replay_lag_bytes,
+            self.replay_rate,
+        )
+
+
+class ReplicationMonitor:
+    """
+    Background sampler of pg_stat_replication of a node (PostgreSQL 10+).
+
+    All the standbys connected to the node are sampled through a dedicated
+    connection. On a standby the receive position is used as the current
+    LSN, so cascades can be monitored too.
+
+    The samples are kept in a ring buffer of the given capacity, so the
+    oldest ones are discarded in long runs.
+
+    Examples:
+        with primary.replication_monitor(interval=0.1) as monitor:
+            primary.pgbench_run(time=10)
+
+        summary = monitor.summary()["replica"]
+        print(summary.replay_lag.percentile(0.99), summary.replay_lag_bytes.max)
+    """
+
+    _C_QUERY = (
+        "select application_name, state, sync_state,"
+        " (case when pg_catalog.pg_is_in_recovery()"
+        " then pg_catalog.pg_last_wal_receive_lsn()"
+        " else pg_catalog.pg_current_wal_lsn() end - '0/0'::pg_lsn)::bigint,"
+        " (sent_lsn - '0/0'::pg_lsn)::bigint,"
+        " (write_lsn - '0/0'::pg_lsn)::bigint,"
+        " (flush_lsn - '0/0'::pg_lsn)::bigint,"
+        " (replay_lsn - '0/0'::pg_lsn)::bigint,"
+        " extract(epoch from write_lag)::float8,"
+        " extract(epoch from flush_lag)::float8,"
+        " extract(epoch from replay_lag)::float8"
+        " from pg_catalog.pg_stat_replication"
+    )
+
+    _C_CSV_COLUMNS = [
+        "timestamp",
+        "application_name",
+        "state",
+        "sync_state",
+        "current_lsn",
+        "sent_lsn",
+        "write_lsn",
+        "flush_lsn",
+        "replay_lsn",
+        "write_lag",
+        "flush_lag",
+        "replay_lag",
+    ]
+
+    _node: typing.Any
+    _interval: float
+    _dbname: typing.Optional[str]
+    _username: typing.Optional[str]
+    _samples: typing.Deque[ReplicationSample]
+    _guard: threading.Lock
+    _con_guard: threading.Lock
+    _con: typing.Any
+    _stop_event: threading.Event
+    _thread: typing.Optional[threading.Thread]
+
+    # --------------------------------------------------------------------
+    def __init__(
+        self,
+        node: typing.Any,
+        interval: float = 1.0,
+        capacity: int = 100000,
+        dbname: typing.Optional[str] = None,
+        username: typing.Optional[str] = None,
+    ):
+        """
+        Args:
+            node: a PostgresNode (a primary or an upstream standby).
+            interval: seconds between samples.
+            capacity: a max count of kept samples (of all the standbys).
+            dbname: database name to connect to.
+            username: database user name.
+        """
+        assert node is not None
+        assert type(interval) in [int, float]
+        assert type(capacity) is int
+        assert dbname is None or type(dbname) is str
+        assert username is None or type(username) is str
+
+        if interval <= 0:
+            raise InvalidOperationException("Sampling interval must be positive.")
+
+        if capacity <= 0:
+            raise InvalidOperationException("Sample capacity must be positive.")
+
+        if node.version < PgVer("10"):
+            raise InvalidOperationException("Replication monitor requires PostgreSQL 10+.")
+
+        self._node = node
+        self._interval = float(interval)
+        self._dbname = dbname
+        self._username = username
+        self._samples = collections.deque(maxlen=capacity)
+        self._guard = threading.Lock()
+        self._con_guard = threading.Lock()
+        self._con = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        return
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.stop()
+
+    # interface ----------------------------------------------------------
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            raise InvalidOperationException("Replication monitor is already started.")
+
+        self._stop_event.clear()
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name="testgres-replication-monitor",
+            daemon=True,
+        )
+        self._thread.start()
+        return
+
+    def stop(self) -> None:
+        """
+        Stop the sampling thread and close its connection. A final sample is taken.
+        """
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+
+        with self._con_guard:
+            if self._con is not None:
+                self._con.close()
+                self._con = None
+        return
+
+    def sample(self) -> typing.List[ReplicationSample]:
+        """
+        Take one sample of all the standbys now.
+
+        Returns:
+            New samples (one per standby).
+        """
+        with self._con_guard:
+            if self._con is None:
+                self._con = self._node.connect(
+                    dbname=self._dbname,
+                    username=self._username,
+                    autocommit=True,
+                )
+
+            rows = self._con.execute(__class__._C_QUERY)
+
+        timestamp = time.time()
+        result = [ReplicationSample(timestamp, row) for row in rows]
+
+        with self._guard:
+            self._samples.extend(result)
+
+        return result
+
+    def samples(
+        self,
+        application_name: typing.Optional[str] = None,
+    ) -> typing.List[ReplicationSample]:
+        assert application_name is None or type(application_name) is str
+
+        with self._guard:
+            samples = list(self._samples)
+
+        if application_name is None:
+            return samples
+
+        return [s for s in samples if s.application_name == application_name]
+
+    def summary(self) -> typing.Dict[str, ReplicationLagSummary]:
+        """
+        Returns:
+            A dict { application_name: ReplicationLagSummary }.
+        """
+        groups: typing.Dict[str, typing.List[ReplicationSample]] = dict()
+
+        for s in self.samples():
+            groups.setdefault(s.application_name, []).append(s)
+            continue
+
+        return {name: ReplicationLagSummary(name, samples) for name, samples in groups.items()}
+
+    def to_csv(self, file: typing.Union[str, typing.TextIO]) -> None:
+        """
+        Write all the kept samples as CSV.
+
+        Args:
+            file: a file name or a text file object.
+        """
+        if type(file) is str:
+            with open(file, "w", newline="") as f:
+                self.to_csv(f)
+            return
+
+        writer = csv.writer(file)
+        writer.writerow(__class__._C_CSV_COLUMNS)
+
+        for s in self.samples():
+            writer.writerow([
+                "{:.6f}".format(s.timestamp),
+                s.application_name,
+                s.state,
+                s.sync_state,
+                s.current_lsn,
+                s.sent_lsn,
+                s.write_lsn,
+                s.flush_lsn,
+                s.replay_lsn,
+                "{:.6f}".format(s.write_lag),
+                "{:.6f}".format(s.flush_lag),
+                "{:.6f}".format(s.replay_lag),
+            ])
+            continue
+        return
+
+    # --------------------------------------------------------------------
+    def _run(self) -> None:
+        try:
+            while True:
+                self.sample()
+
+                if self._stop_event.wait(self._interval):
+                    break
+                continue
+
+            # the last interval
+            self.sample()
+        except Exception as e:
+            logging.error("[replication monitor] {}".format(e))
+            raise
+        return
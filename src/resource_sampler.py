@@ -0,0 +1,430 @@
+# coding: utf-8
+
+from .enums import ProcessType
+from .exceptions import InvalidOperationException
+
+from psutil import AccessDenied, NoSuchProcess
+
+import collections
+import csv
+import logging
+import threading
+import time
+import typing
+
+
+class ResourceSample:
+    """
+    Resources consumed by the processes of one type during one interval.
+
+    Args:
+        timestamp: time.time() of the sample.
+        ptype: type of processes.
+        process_count: count of the processes.
+        cpu_user: user CPU time (seconds) spent since the previous sample.
+        cpu_system: system CPU time (seconds) spent since the previous sample.
+        rss: total RSS (bytes).
+        pss: total PSS (bytes) or 0 when it is not collected.
+        read_bytes: bytes read from storage since the previous sample.
+        write_bytes: bytes written to storage since the previous sample.
+    """
+    __slots__ = (
+        "timestamp",
+        "ptype",
+        "process_count",
+        "cpu_user",
+        "cpu_system",
+        "rss",
+        "pss",
+        "read_bytes",
+        "write_bytes",
+    )
+
+    timestamp: float
+    ptype: ProcessType
+    process_count: int
+    cpu_user: float
+    cpu_system: float
+    rss: int
+    pss: int
+    read_bytes: int
+    write_bytes: int
+
+    def __init__(self, timestamp: float, ptype: ProcessType):
+        assert type(timestamp) is float
+        assert type(ptype) is ProcessType
+        self.timestamp = timestamp
+        self.ptype = ptype
+        self.process_count = 0
+        self.cpu_user = 0.0
+        self.cpu_system = 0.0
+        self.rss = 0
+        self.pss = 0
+        self.read_bytes = 0
+        self.write_bytes = 0
+        return
+
+    def __repr__(self):
+        return "{}(ptype={}, process_count={}, cpu_user={:.3f}, cpu_system={:.3f}, rss={})".format(
+            __class__.__name__,
+            self.ptype,
+            self.process_count,
+            self.cpu_user,
+            self.cpu_system,
+            self.rss,
+        )
+
+
+class ResourceSummary:
+    """
+    Resources consumed by the processes of one type during all the samples.
+    """
+    ptype: ProcessType
+    sample_count: int
+    max_process_count: int
+    cpu_user: float
+    cpu_system: float
+    max_rss: int
+    avg_rss: float
+    max_pss: int
+    read_bytes: int
+    write_bytes: int
+
+    def __init__(self, ptype: ProcessType):
+        assert type(ptype) is ProcessType
+        self.ptype = ptype
+        self.sample_count = 0
+        self.max_process_count = 0
+        self.cpu_user = 0.0
+        self.cpu_system = 0.0
+        self.max_rss = 0
+        self.avg_rss = 0.0
+        self.max_pss = 0
+        self.read_bytes = 0
+        self.write_bytes = 0
+        return
+
+    @property
+    def cpu_total(self) -> float:
+        return self.cpu_user + self.cpu_system
+
+    def __repr__(self):
+        return "{}(ptype={}, sample_count={}, cpu_total={:.3f}, max_rss={}, read_bytes={}, write_bytes={})".format(
+            __class__.__name__,
+            self.ptype,
+            self.sample_count,
+            self.cpu_total,
+            self.max_rss,
+            self.read_bytes,
+            self.write_bytes,
+        )
+
+
+class NodeResourceSampler:
+    """
+    Background sampler of resources consumed by the child processes of a
+    local node (CPU time, RSS/PSS and storage I/O), grouped by ProcessType.
+
+    Client backends and background workers have ProcessType.Unknown.
+    Postmaster itself is not sampled.
+
+    The first sample is a baseline: its CPU time and I/O are zero, since
+    the processes have consumed them before the sampler was started. Later
+    a new process is counted from zero only if it has been started after
+    the previous sample.
+
+    The samples are kept in a ring buffer of the given capacity, so the
+    oldest ones are discarded in long runs.
+
+    Examples:
+        with node.resource_sampler(interval=0.5) as sampler:
+            node.pgbench_run(time=10)
+
+        for summary in sampler.summary().values():
+            print(summary)
+
+        sampler.to_csv("resources.csv")
+    """
+
+    _C_CSV_COLUMNS = [
+        "timestamp",
+        "ptype",
+        "process_count",
+        "cpu_user",
+        "cpu_system",
+        "rss",
+        "pss",
+        "read_bytes",
+        "write_bytes",
+    ]
+
+    # create_time of psutil is based on the boot time in whole seconds
+    _C_CREATE_TIME_ERROR = 1.0
+
+    _node: typing.Any
+    _interval: float
+    _with_pss: bool
+    _samples: typing.Deque[ResourceSample]
+    _counters: typing.Dict[typing.Tuple[int, float], typing.Tuple[float, float, int, int]]
+    _counters_time: typing.Optional[float]
+    _guard: threading.Lock
+    _stop_event: threading.Event
+    _thread: typing.Optional[threading.Thread]
+
+    # --------------------------------------------------------------------
+    def __init__(
+        self,
+        node: typing.Any,
+        interval: float = 1.0,
+        capacity: int = 10000,
+        with_pss: bool = False,
+    ):
+        """
+        Args:
+            node: a local PostgresNode.
+            interval: seconds between samples.
+            capacity: a max count of kept samples.
+            with_pss: collect PSS too (reading of smaps is more expensive).
+        """
+        assert node is not None
+        assert type(interval) in [int, float]
+        assert type(capacity) is int
+        assert type(with_pss) is bool
+
+        if interval <= 0:
+            raise InvalidOperationException("Sampling interval must be positive.")
+
+        if capacity <= 0:
+            raise InvalidOperationException("Sample capacity must be positive.")
+
+        self._node = node
+        self._interval = float(interval)
+        self._with_pss = with_pss
+        self._samples = collections.deque(maxlen=capacity)
+        self._counters = dict()
+        self._counters_time = None
+        self._guard = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        return
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.stop()
+
+    # interface ----------------------------------------------------------
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            raise InvalidOperationException("Resource sampler is already started.")
+
+        self._stop_event.clear()
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name="testgres-resource-sampler",
+            daemon=True,
+        )
+        self._thread.start()
+        return
+
+    def stop(self) -> None:
+        """
+        Stop the sampling thread. A final sample is taken.
+        """
+        if self._thread is None:
+            return
+
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        return
+
+    def sample(self) -> typing.List[ResourceSample]:
+        """
+        Take one sample of all the process types now.
+
+        Returns:
+            New samples (one per process type). An empty list if the node is not running.
+        """
+        # a process started after it is in this snapshot or is new for the next one
+        counters_time = time.time()
+
+        try:
+            snapshot = self._node.process_snapshot()
+        except InvalidOperationException:
+            # node is not running
+            return []
+
+        timestamp = time.time()
+        prev_time = self._counters_time
+
+        samples: typing.Dict[ProcessType, ResourceSample] = dict()
+        counters = dict()
+
+        for process in snapshot.child_processes:
+            try:
+                stats = self._read_process(process.process)
+            except (NoSuchProcess, ProcessLookupError, FileNotFoundError):
+                # process has finished
+                continue
+
+            key, cpu_user, cpu_system, rss, pss, read_bytes, write_bytes = stats
+
+            prev = self._counters.get(key)
+            counters[key] = (cpu_user, cpu_system, read_bytes, write_bytes)
+
+            sample = samples.get(process.ptype)
+
+            if sample is None:
+                sample = ResourceSample(timestamp, process.ptype)
+                samples[process.ptype] = sample
+
+            sample.process_count += 1
+            sample.rss += rss
+            sample.pss += pss
+
+            if prev is None:
+                if prev_time is not None and key[1] >= prev_time - __class__._C_CREATE_TIME_ERROR:
+                    # a new process, all its consumption is in this interval
+                    prev = (0.0, 0.0, 0, 0)
+                else:
+                    # a baseline, its consumption is before this interval
+                    prev = (cpu_user, cpu_system, read_bytes, write_bytes)
+
+            sample.cpu_user += max(0.0, cpu_user - prev[0])
+            sample.cpu_system += max(0.0, cpu_system - prev[1])
+            sample.read_bytes += max(0, read_bytes - prev[2])
+            sample.write_bytes += max(0, write_bytes - prev[3])
+            continue
+
+        result = list(samples.values())
+
+        with self._guard:
+            self._counters = counters
+            self._counters_time = counters_time
+            self._samples.extend(result)
+
+        return result
+
+    def samples(
+        self,
+        ptype: typing.Optional[ProcessType] = None,
+    ) -> typing.List[ResourceSample]:
+        assert ptype is None or type(ptype) is ProcessType
+
+        with self._guard:
+            samples = list(self._samples)
+
+        if ptype is None:
+            return samples
+
+        return [s for s in samples if s.ptype == ptype]
+
+    def summary(self) -> typing.Dict[ProcessType, ResourceSummary]:
+        result: typing.Dict[ProcessType, ResourceSummary] = dict()
+
+        for s in self.samples():
+            summary = result.get(s.ptype)
+
+            if summary is None:
+                summary = ResourceSummary(s.ptype)
+                result[s.ptype] = summary
+
+            summary.sample_count += 1
+            summary.max_process_count = max(summary.max_process_count, s.process_count)
+            summary.cpu_user += s.cpu_user
+            summary.cpu_system += s.cpu_system
+            summary.max_rss = max(summary.max_rss, s.rss)
+            summary.avg_rss += s.rss
+            summary.max_pss = max(summary.max_pss, s.pss)
+            summary.read_bytes += s.read_bytes
+            summary.write_bytes += s.write_bytes
+            continue
+
+        for summary in result.values():
+            summary.avg_rss /= summary.sample_count
+            continue
+
+        return result
+
+    def to_csv(self, file: typing.Union[str, typing.TextIO]) -> None:
+        """
+        Write all the kept samples as CSV.
+
+        Args:
+            file: a file name or a text file object.
+        """
+        if type(file) is str:
+            with open(file, "w", newline="") as f:
+                self.to_csv(f)
+            return
+
+        writer = csv.writer(file)
+        writer.writerow(__class__._C_CSV_COLUMNS)
+
+        for s in self.samples():
+            writer.writerow([
+                "{:.6f}".format(s.timestamp),
+                s.ptype.value,
+                s.process_count,
+                "{:.6f}".format(s.cpu_user),
+                "{:.6f}".format(s.cpu_system),
+                s.rss,
+                s.pss,
+                s.read_bytes,
+                s.write_bytes,
+            ])
+            continue
+        return
+
+    # --------------------------------------------------------------------
+    def _run(self) -> None:
+        try:
+            while True:
+                self.sample()
+
+                if self._stop_event.wait(self._interval):
+                    break
+                continue
+
+            # the last interval
+            self.sample()
+        except Exception as e:
+            logging.error("[resource sampler] {}".format(e))
+            raise
+        return
+
+    def _read_process(self, process: typing.Any) -> typing.Tuple:
+        with process.oneshot():
+            key = (process.pid, process.create_time())
+
+            cpu_times = process.cpu_times()
+
+            if self._with_pss:
+                mem = process.memory_full_info()
+                rss = mem.rss
+                pss = getattr(mem, "pss", 0)
+            else:
+                rss = process.memory_info().rss
+                pss = 0
+
+            try:
+                io = process.io_counters()
+                read_bytes = io.read_bytes
+                write_bytes = io.write_bytes
+            except (AccessDenied, AttributeError):
+                # /proc/<pid>/io is not readable
+                read_bytes = 0
+                write_bytes = 0
+
+        return key, cpu_times.user, cpu_times.system, rss, pss, read_bytes, write_bytes
@@ -0,0 +1,457 @@
+# coding: utf-8
+
+from .exceptions import InvalidOperationException
+from .utils import PgVer
+
+import json
+import time
+import typing
+
+# a key of row in a view, () for one-row views
+T_ROW_KEY = typing.Tuple[typing.Any, ...]
+
+# { view: { row key: { column: value } } }
+T_VIEWS = typing.Dict[str, typing.Dict[T_ROW_KEY, typing.Dict[str, typing.Any]]]
+
+
+class StatementStats:
+    """
+    Activity of one statement (pg_stat_statements) during a profile.
+
+    Args:
+        query: normalized text of statement.
+        calls: count of executions.
+        total_time: execution time (milliseconds).
+        rows: count of retrieved or affected rows.
+        fields: deltas of all the numeric columns.
+    """
+    query: str
+    calls: int
+    total_time: float
+    rows: int
+    fields: typing.Dict[str, typing.Any]
+
+    def __init__(
+        self,
+        query: str,
+        calls: int,
+        total_time: float,
+        rows: int,
+        fields: typing.Dict[str, typing.Any],
+    ):
+        assert type(query) is str
+        assert type(calls) is int
+        assert type(total_time) in [int, float]
+        assert type(rows) is int
+        assert type(fields) is dict
+        self.query = query
+        self.calls = calls
+        self.total_time = total_time
+        self.rows = rows
+        self.fields = fields
+        return
+
+    @property
+    def mean_time(self) -> float:
+        if self.calls == 0:
+            return 0.0
+        return self.total_time / self.calls
+
+    def __repr__(self):
+        return "{}(calls={}, total_time={:.3f}, rows={}, query={!r})".format(
+            __class__.__name__,
+            self.calls,
+            self.total_time,
+            self.rows,
+            self.query,
+        )
+
+
+class StatsProfile:
+    """
+    Difference of cumulative statistics views of a node between the
+    beginning and the end of a profiled block.
+
+    Views are selected by the server version:
+        pg_stat_database, pg_stat_bgwriter - all versions,
+        pg_stat_wal - 14+,
+        pg_stat_io - 16+,
+        pg_stat_checkpointer - 17+,
+        pg_stat_statements - if it is requested.
+
+    Statistics of other backends reach the views with a delay (about one
+    second), use settle to wait for them before the final snapshot.
+
+    Examples:
+        with node.stats_profile(statements=True) as prof:
+            node.pgbench_run(time=10)
+
+        print(prof.delta("pg_stat_wal").get("wal_bytes"))
+        print(prof.delta("pg_stat_database", "postgres")["xact_commit"])
+        for s in prof.top_statements(5):
+            print(s.total_time, s.query)
+    """
+
+    # it is used to skip own queries in pg_stat_statements
+    _C_QUERY_MARK = "/* testgres stats_profile */"
+
+    # { view: (min version, columns of row key) }
+    _C_VIEWS = {
+        "pg_stat_database": ("9.0", ["datname"]),
+        "pg_stat_bgwriter": ("9.0", []),
+        "pg_stat_wal": ("14", []),
+        "pg_stat_io": ("16", ["backend_type", "object", "context"]),
+        "pg_stat_checkpointer": ("17", []),
+    }  # yapf: disable
+
+    _C_STATEMENTS_VIEW = "pg_stat_statements"
+    _C_STATEMENTS_EXTENSION = "pg_stat_statements"
+
+    _node: typing.Any
+    _dbname: typing.Optional[str]
+    _username: typing.Optional[str]
+    _statements: bool
+    _settle: float
+    _views: typing.List[str]
+    _start: typing.Optional[T_VIEWS]
+    _stop: typing.Optional[T_VIEWS]
+    _start_time: typing.Optional[float]
+    _stop_time: typing.Optional[float]
+    _queries: typing.Dict[T_ROW_KEY, str]
+
+    # --------------------------------------------------------------------
+    def __init__(
+        self,
+        node: typing.Any,
+        dbname: typing.Optional[str] = None,
+        username: typing.Optional[str] = None,
+        statements: bool = False,
+        settle: float = 0,
+    ):
+        """
+        Args:
+            node: a running PostgresNode.
+            dbname: database name to connect to.
+            username: database user name.
+            statements: collect pg_stat_statements. The extension is created
+                and the library is preloaded (with restart of node) if it is needed.
+            settle: how long should we wait before the final snapshot (seconds)?
+        """
+        assert node is not None
+        assert dbname is None or type(dbname) is str
+        assert username is None or type(username) is str
+        assert type(statements) is bool
+        assert type(settle) in [int, float]
+        assert settle >= 0
+
+        self._node = node
+        self._dbname = dbname
+        self._username = username
+        self._statements = statements
+        self._settle = settle
+
+        version = node.version
+        assert type(version) is PgVer
+
+        self._views = [
+            view for view, (min_version, _) in __class__._C_VIEWS.items()
+            if version >= PgVer(min_version)
+        ]
+
+        self._start = None
+        self._stop = None
+        self._start_time = None
+        self._stop_time = None
+        self._queries = dict()
+        return
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.stop()
+
+    # interface ----------------------------------------------------------
+    @property
+    def views(self) -> typing.List[str]:
+        """
+        Names of the profiled views.
+        """
+        if self._statements:
+            return self._views + [__class__._C_STATEMENTS_VIEW]
+        return list(self._views)
+
+    @property
+    def elapsed(self) -> float:
+        """
+        Duration of the profiled block (seconds).
+        """
+        if self._start_time is None or self._stop_time is None:
+            raise InvalidOperationException("Stats profile is not finished.")
+        return self._stop_time - self._start_time
+
+    def start(self) -> None:
+        if self._start is not None:
+            raise InvalidOperationException("Stats profile is already started.")
+
+        if self._statements:
+            self._prepare_statements()
+
+        self._start = self._snapshot()
+        self._start_time = time.monotonic()
+        return
+
+    def stop(self) -> None:
+        if self._start is None:
+            raise InvalidOperationException("Stats profile is not started.")
+
+        if self._stop is not None:
+            raise InvalidOperationException("Stats profile is already finished.")
+
+        self._stop_time = time.monotonic()
+
+        if self._settle > 0:
+            time.sleep(self._settle)
+
+        self._stop = self._snapshot()
+        return
+
+    def diff(self) -> T_VIEWS:
+        """
+        Deltas of numeric columns: { view: { row key: { column: delta } } }.
+
+        Rows which appeared during the profile are compared with zeros.
+        """
+        if self._start is None or self._stop is None:
+            raise InvalidOperationException("Stats profile is not finished.")
+
+        result: T_VIEWS = dict()
+
+        for view, rows in self._stop.items():
+            start_rows = self._start.get(view, dict())
+            view_result = dict()
+
+            for key, row in rows.items():
+                start_row = start_rows.get(key, dict())
+                deltas = dict()
+
+                for column, value in row.items():
+                    if not __class__._is_number(value):
+                        continue
+
+                    start_value = start_row.get(column)
+
+                    if not __class__._is_number(start_value):
+                        start_value = 0
+
+                    deltas[column] = value - start_value
+                    continue
+
+                view_result[key] = deltas
+                continue
+
+            result[view] = view_result
+            continue
+
+        return result
+
+    def delta(self, view: str, *key) -> typing.Dict[str, typing.Any]:
+        """
+        Deltas of one row of a view.
+
+        Args:
+            view: name of view.
+            key: values of the row key (datname for pg_stat_database;
+                backend_type, object and context for pg_stat_io).
+
+        Returns:
+            { column: delta } or an empty dict if there is no such row.
+        """
+        assert type(view) is str
+
+        if view not in self.views:
+            raise InvalidOperationException("View {} is not profiled.".format(view))
+
+        return self.diff().get(view, dict()).get(tuple(key), dict())
+
+    def top_statements(
+        self,
+        n: int = 10,
+        order_by: str = "total_time",
+    ) -> typing.List[StatementStats]:
+        """
+        The most expensive statements of the profiled block.
+
+        Args:
+            n: a max count of statements.
+            order_by: an attribute of StatementStats or a column of pg_stat_statements.
+        """
+        assert type(n) is int
+        assert type(order_by) is str
+
+        if not self._statements:
+            raise InvalidOperationException("Stats profile is created without statements.")
+
+        rows = self.diff().get(__class__._C_STATEMENTS_VIEW, dict())
+
+        result: typing.List[StatementStats] = []
+
+        for key, fields in rows.items():
+            calls = int(fields.get("calls", 0))
+
+            if calls <= 0:
+                continue
+
+            # total_time was renamed in 13
+            total_time = fields.get("total_exec_time", fields.get("total_time", 0))
+
+            result.append(StatementStats(
+                self._queries.get(key, ""),
+                calls,
+                float(total_time),
+                int(fields.get("rows", 0)),
+                fields,
+            ))
+            continue
+
+        def sort_key(s: StatementStats):
+            if hasattr(s, order_by):
+                return getattr(s, order_by)
+            return s.fields.get(order_by, 0)
+
+        result.sort(key=sort_key, reverse=True)
+        return result[:n]
+
+    # --------------------------------------------------------------------
+    def _connect(self, autocommit: bool = True):
+        return self._node.connect(
+            dbname=self._dbname,
+            username=self._username,
+            autocommit=autocommit,
+        )
+
+    def _prepare_statements(self) -> None:
+        with self._connect() as con:
+            available = con.execute(
+                "select 1 from pg_catalog.pg_available_extensions where name = %s",
+                __class__._C_STATEMENTS_EXTENSION,
+            )
+
+            if len(available) == 0:
+                raise InvalidOperationException("Extension pg_stat_statements is not available.")
+
+            libraries = con.execute("show shared_preload_libraries")[0][0]
+
+        libraries = __class__._split_list_setting(libraries)
+
+        if __class__._C_STATEMENTS_EXTENSION not in libraries:
+            libraries.append(__class__._C_STATEMENTS_EXTENSION)
+
+            # elements are passed separately, a str would be one library
+            self._node.apply_settings(
+                {"shared_preload_libraries": libraries},
+                dbname=self._dbname,
+                username=self._username,
+            )
+
+        with self._connect() as con:
+            con.execute("create extension if not exists pg_stat_statements")
+        return
+
+    @staticmethod
+    def _split_list_setting(value: str) -> typing.List[str]:
+        # "a, \"b,c\"" -> ["a", "b,c"]
+        assert type(value) is str
+
+        result = []
+        item = ""
+        quoted = False
+        i = 0
+
+        while i < len(value):
+            ch = value[i]
+            if ch == '"':
+                if quoted and value.startswith('""', i):
+                    item += '"'
+                    i += 1
+                else:
+                    quoted = not quoted
+            elif ch == "," and not quoted:
+                result.append(item.strip())
+                item = ""
+            else:
+                item += ch
+            i += 1
+            continue
+
+        result.append(item.strip())
+        return [x for x in result if x != ""]
+
+    def _snapshot(self) -> T_VIEWS:
+        result: T_VIEWS = dict()
+
+        with self._connect(autocommit=False) as con:
+            # one consistent snapshot of statistics (15+)
+            if self._node.version >= PgVer("15"):
+                con.execute("set local stats_fetch_consistency = 'snapshot'")
+
+            for view in self._views:
+                _, key_columns = __class__._C_VIEWS[view]
+                result[view] = self._read_view(con, "pg_catalog." + view, key_columns)
+                continue
+
+            if self._statements:
+                rows = self._read_view(
+                    con,
+                    __class__._C_STATEMENTS_VIEW,
+                    ["userid", "dbid", "queryid", "toplevel"],
+                )
+
+                statements = dict()
+
+                for key, row in rows.items():
+                    query = row.get("query") or ""
+
+                    if __class__._C_QUERY_MARK in query:
+                        continue
+
+                    self._queries[key] = query
+                    statements[key] = row
+                    continue
+
+                result[__class__._C_STATEMENTS_VIEW] = statements
+
+            con.rollback()
+
+        return result
+
+    @staticmethod
+    def _read_view(
+        con: typing.Any,
+        view: str,
+        key_columns: typing.List[str],
+    ) -> typing.Dict[T_ROW_KEY, typing.Dict[str, typing.Any]]:
+        # rows are read as json to get the column names with any driver
+        rows = con.execute(
+            "{} select row_to_json(v)::text from {} v".format(
+                __class__._C_QUERY_MARK,
+                view,
+            )
+        )
+
+        result = dict()
+
+        for (text, ) in rows:
+            row = json.loads(text)
+            assert type(row) is dict
+            # a missing column (toplevel of old pg_stat_statements) is None
+            key = tuple(row.get(c) for c in key_columns)
+            result[key] = row
+            continue
+
+        return result
+
+    @staticmethod
+    def _is_number(value: typing.Any) -> bool:
+        return type(value) in [int, float]
@@ -0,0 +1,316 @@
+# coding: utf-8
+
+from .enums import LogFormat
+
+from testgres.operations.os_ops import OsOperations
+
+import csv
+import datetime
+import json
+import typing
+
+
+class LogRecord:
+    """
+    A parsed record of csvlog/jsonlog.
+
+    Args:
+        timestamp: time of record (in log_timezone of server).
+        pid: process id.
+        severity: error severity (LOG, ERROR, PANIC and so on).
+        sqlstate: SQLSTATE code or None.
+        message: primary message.
+        fields: all the fields of the record.
+    """
+    timestamp: typing.Optional[datetime.datetime]
+    pid: typing.Optional[int]
+    severity: str
+    sqlstate: typing.Optional[str]
+    message: str
+    fields: typing.Dict[str, typing.Any]
+
+    def __init__(
+        self,
+        timestamp: typing.Optional[datetime.datetime],
+        pid: typing.Optional[int],
+        severity: str,
+        sqlstate: typing.Optional[str],
+        message: str,
+        fields: typing.Dict[str, typing.Any],
+    ):
+        assert timestamp is None or type(timestamp) is datetime.datetime
+        assert pid is None or type(pid) is int
+        assert type(severity) is str
+        assert sqlstate is None or type(sqlstate) is str
+        assert type(message) is str
+        assert type(fields) is dict
+        self.timestamp = timestamp
+        self.pid = pid
+        self.severity = severity
+        self.sqlstate = sqlstate
+        self.message = message
+        self.fields = fields
+        return
+
+    def __repr__(self):
+        return "{}(timestamp={!r}, pid={}, severity={!r}, sqlstate={!r}, message={!r})".format(
+            __class__.__name__,
+            self.timestamp,
+            self.pid,
+            self.severity,
+            self.sqlstate,
+            self.message,
+        )
+
+
+class StructuredLogReader:
+    """
+    Streaming parser of csvlog/jsonlog file.
+
+    Each call of read() returns records which were written after the
+    previous call. File is read by bounded blocks. Records are filtered
+    by severity and pid on raw bytes first, so irrelevant records are not
+    decoded and parsed at all.
+
+    NOTE: messages written to stderr directly (for example, TRAP of failed
+    assertion) are not in structured log. Look for them in pg_log_file.
+    """
+
+    _C_READ_BLOCK_SIZE = 64 * 1024
+
+    # columns of csvlog
+    _C_CSV_COLUMNS = [
+        "log_time",
+        "user_name",
+        "database_name",
+        "process_id",
+        "connection_from",
+        "session_id",
+        "session_line_num",
+        "command_tag",
+        "session_start_time",
+        "virtual_transaction_id",
+        "transaction_id",
+        "error_severity",
+        "sql_state_code",
+        "message",
+        "detail",
+        "hint",
+        "internal_query",
+        "internal_query_pos",
+        "context",
+        "query",
+        "query_pos",
+        "location",
+        "application_name",
+        "backend_type",  # 13+
+        "leader_pid",  # 14+
+        "query_id",  # 14+
+    ]
+
+    _os_ops: OsOperations
+    _file_name: str
+    _log_format: LogFormat
+    _file_encoding: str
+    _read_block_size: int
+    _file_pos: int
+    _tail: bytes
+
+    # --------------------------------------------------------------------
+    def __init__(
+        self,
+        os_ops: OsOperations,
+        file_name: str,
+        log_format: LogFormat,
+        file_encoding: str = "utf-8",
+        read_block_size: int = _C_READ_BLOCK_SIZE,
+    ):
+        assert isinstance(os_ops, OsOperations)
+        assert type(file_name) is str
+        assert type(log_format) is LogFormat
+        assert type(file_encoding) is str
+        assert type(read_block_size) is int
+        assert read_block_size > 0
+
+        self._os_ops = os_ops
+        self._file_name = file_name
+        self._log_format = log_format
+        self._file_encoding = file_encoding
+        self._read_block_size = read_block_size
+        self._file_pos = 0
+        self._tail = b""
+        return
+
+    # interface ----------------------------------------------------------
+    @property
+    def file_name(self) -> str:
+        return self._file_name
+
+    @property
+    def log_format(self) -> LogFormat:
+        return self._log_format
+
+    def read(
+        self,
+        severities: typing.Optional[typing.Iterable[str]] = None,
+        pids: typing.Optional[typing.Iterable[int]] = None,
+    ) -> typing.Iterator[LogRecord]:
+        """
+        Yield new complete records.
+
+        Args:
+            severities: None or severities to select (for example, ["ERROR", "PANIC"]).
+            pids: None or process ids to select.
+        """
+        severity_keys = None
+        pid_keys = None
+
+        if severities is not None:
+            severities = set(severities)
+            severity_keys = [self._severity_key(s) for s in severities]
+
+        if pids is not None:
+            pids = set(pids)
+            pid_keys = [self._pid_key(p) for p in pids]
+
+        for raw in self._read_raw_records():
+            assert type(raw) is bytes
+
+            # cheap checks on bytes, a record may be parsed only after them
+            if severity_keys is not None and not any(k in raw for k in severity_keys):
+                continue
+
+            if pid_keys is not None and not any(k in raw for k in pid_keys):
+                continue
+
+            record = self._parse(raw)
+
+            # the key was found in the message, for example
+            if severities is not None and record.severity not in severities:
+                continue
+
+            if pids is not None and record.pid not in pids:
+                continue
+
+            yield record
+            continue
+        return
+
+    # --------------------------------------------------------------------
+    def _read_raw_records(self) -> typing.Iterator[bytes]:
+        while True:
+            if not self._os_ops.path_exists(self._file_name):
+                return
+
+            block = self._os_ops.read_binary(
+                self._file_name,
+                self._file_pos,
+                self._read_block_size,
+            )
+            assert type(block) is bytes
+
+            if len(block) == 0:
+                return
+
+            self._file_pos += len(block)
+
+            data = self._tail + block
+            start = 0
+
+            records: typing.List[bytes] = []
+
+            if self._log_format == LogFormat.Json:
+                # one record per line
+                while True:
+                    x = data.find(b"\n", start)
+                    if x == -1:
+                        break
+                    if x > start:
+                        records.append(data[start:x])
+                    start = x + 1
+                    continue
+            else:
+                assert self._log_format == LogFormat.Csv
+                # a quoted field may contain line feeds
+                quote_count = 0
+                pos = start
+                while True:
+                    x = data.find(b"\n", pos)
+                    if x == -1:
+                        break
+                    quote_count += data.count(b'"', pos, x)
+                    pos = x + 1
+                    if quote_count % 2 != 0:
+                        continue
+                    records.append(data[start:x])
+                    start = pos
+                    quote_count = 0
+                    continue
+
+            # the state is saved before yield, a caller may stop the iteration
+            self._tail = data[start:]
+
+            for raw in records:
+                yield raw
+                continue
+            continue
+
+    def _severity_key(self, severity: str) -> bytes:
+        assert type(severity) is str
+
+        if self._log_format == LogFormat.Json:
+            return '"error_severity":"{}"'.format(severity).encode(self._file_encoding)
+
+        return ",{},".format(severity).encode(self._file_encoding)
+
+    def _pid_key(self, pid: int) -> bytes:
+        assert type(pid) is int
+
+        if self._log_format == LogFormat.Json:
+            return '"pid":{},'.format(pid).encode(self._file_encoding)
+
+        return ",{},".format(pid).encode(self._file_encoding)
+
+    def _parse(self, raw: bytes) -> LogRecord:
+        assert type(raw) is bytes
+
+        text = raw.decode(self._file_encoding, errors="replace")
+
+        if self._log_format == LogFormat.Json:
+            fields = json.loads(text)
+            assert type(fields) is dict
+            return LogRecord(
+                __class__._parse_timestamp(fields.get("timestamp")),
+                fields.get("pid"),
+                fields.get("error_severity", ""),
+                fields.get("state_code"),
+                fields.get("message", ""),
+                fields,
+            )
+
+        assert self._log_format == LogFormat.Csv
+
+        values = next(csv.reader([text]))
+        fields = dict(zip(__class__._C_CSV_COLUMNS, values))
+
+        pid = fields.get("process_id")
+
+        return LogRecord(
+            __class__._parse_timestamp(fields.get("log_time")),
+            int(pid) if pid else None,
+            fields.get("error_severity", ""),
+            fields.get("sql_state_code") or None,
+            fields.get("message", ""),
+            fields,
+        )
+
+    @staticmethod
+    def _parse_timestamp(value: typing.Optional[str]) -> typing.Optional[datetime.datetime]:
+        # "2026-10-19 10:00:00.123 UTC", a time zone name is ignored
+        if not value:
+            return None
+
+        try:
+            return datetime.datetime.strptime(value[:23], "%Y-%m-%d %H:%M:%S.%f")
+        except ValueError:
+            return None
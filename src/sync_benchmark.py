@@ -0,0 +1,241 @@
+# coding: utf-8
+
+from .exceptions import InvalidOperationException
+from .pgbench_result import PgbenchResult
+from .standby import First, Any
+from .utils import PgVer
+
+import typing
+
+
+class SyncBenchmarkResult:
+    """
+    Result of pgbench for one configuration of synchronous replication.
+
+    Args:
+        standbys: synchronous_standby_names ("" for asynchronous replication).
+        synchronous_commit: a value of synchronous_commit.
+        result: parsed output of pgbench.
+    """
+    __slots__ = (
+        "standbys",
+        "synchronous_commit",
+        "result",
+    )
+
+    standbys: str
+    synchronous_commit: str
+    result: PgbenchResult
+
+    def __init__(
+        self,
+        standbys: str,
+        synchronous_commit: str,
+        result: PgbenchResult,
+    ):
+        assert type(standbys) is str
+        assert type(synchronous_commit) is str
+        assert isinstance(result, PgbenchResult)
+        self.standbys = standbys
+        self.synchronous_commit = synchronous_commit
+        self.result = result
+        return
+
+    @property
+    def tps(self) -> float:
+        """
+        Transactions per second.
+        """
+        return self.result.tps
+
+    @property
+    def latency_avg(self) -> float:
+        """
+        Average latency (milliseconds).
+        """
+        return self.result.latency_avg
+
+    @property
+    def output(self) -> str:
+        """
+        Stdout of pgbench.
+        """
+        return self.result.output
+
+    def __repr__(self):
+        return "{}(standbys='{}', synchronous_commit={}, tps={:.1f}, latency_avg={:.3f})".format(
+            __class__.__name__,
+            self.standbys,
+            self.synchronous_commit,
+            self.tps,
+            self.latency_avg,
+        )
+
+
+class SyncReplicationBenchmark:
+    """
+    Cost of synchronous replication: pgbench is run for each configuration
+    of synchronous standbys and each level of synchronous_commit.
+
+    Settings are applied by ALTER SYSTEM and a reload, the node is never
+    restarted. They are reset at the end.
+
+    Examples:
+        benchmark = SyncReplicationBenchmark(
+            master,
+            configs=[None, First(1, [r1, r2]), Any(1, [r1, r2])],
+            time=5,
+            clients=4,
+        )
+
+        for r in benchmark.run():
+            print(r.standbys, r.synchronous_commit, r.tps, r.latency_avg)
+    """
+
+    _C_LEVELS = ["off", "local", "remote_write", "on", "remote_apply"]
+
+    _node: typing.Any
+    _configs: typing.List[typing.Any]
+    _levels: typing.List[str]
+    _time: int
+    _clients: int
+    _scale: typing.Optional[int]
+    _dbname: typing.Optional[str]
+    _username: typing.Optional[str]
+    _options: typing.List[str]
+
+    # --------------------------------------------------------------------
+    def __init__(
+        self,
+        node: typing.Any,
+        configs: typing.List[typing.Any],
+        levels: typing.Optional[typing.List[str]] = None,
+        time: int = 5,
+        clients: int = 1,
+        scale: typing.Optional[int] = 1,
+        dbname: typing.Optional[str] = None,
+        username: typing.Optional[str] = None,
+        options: typing.Optional[typing.List[str]] = None,
+    ):
+        """
+        Args:
+            node: a primary PostgresNode (PostgreSQL 9.6+).
+            configs: configurations of synchronous standbys: :class:`.First`,
+                :class:`.Any` (PostgreSQL 10+) or None (asynchronous
+                replication).
+            levels: values of synchronous_commit (all of them by default).
+            time: duration of each pgbench run (seconds).
+            clients: count of pgbench clients (and threads).
+            scale: pgbench tables are initialized with this scale factor
+                (None means they already exist).
+            dbname: database name to connect to.
+            username: database user name.
+            options: additional options for pgbench (list).
+        """
+        assert node is not None
+        assert type(configs) is list
+        assert levels is None or type(levels) is list
+        assert type(time) is int
+        assert type(clients) is int
+        assert scale is None or type(scale) is int
+        assert dbname is None or type(dbname) is str
+        assert username is None or type(username) is str
+        assert options is None or type(options) is list
+
+        if node.version < PgVer("9.6"):
+            raise InvalidOperationException("Sync replication benchmark requires PostgreSQL 9.6+.")
+
+        if len(configs) == 0:
+            raise InvalidOperationException("Configurations are not defined.")
+
+        for config in configs:
+            if config is not None and not isinstance(config, (First, Any)):
+                raise InvalidOperationException("Configuration must be First, Any or None.")
+            if isinstance(config, Any) and node.version < PgVer("10"):
+                raise InvalidOperationException("Quorum commit (Any) requires PostgreSQL 10+.")
+            continue
+
+        self._node = node
+        self._configs = configs
+        self._levels = levels or __class__._C_LEVELS
+        self._time = time
+        self._clients = clients
+        self._scale = scale
+        self._dbname = dbname
+        self._username = username
+        self._options = options or []
+        return
+
+    # interface ----------------------------------------------------------
+    def run(self) -> typing.List[SyncBenchmarkResult]:
+        """
+        Returns:
+            Results for all the configurations and levels (in this order).
+        """
+        node = self._node
+
+        if self._scale is not None:
+            node.pgbench_init(
+                dbname=self._dbname,
+                username=self._username,
+                scale=self._scale,
+            )
+
+        result = []
+
+        try:
+            for config in self._configs:
+                standbys = "" if config is None else str(config)
+
+                node.apply_settings(
+                    {"synchronous_standby_names": standbys},
+                    dbname=self._dbname,
+                    username=self._username,
+                )
+
+                if config is not None:
+                    self._wait_sync_standbys(config)
+
+                for level in self._levels:
+                    node.apply_settings(
+                        {"synchronous_commit": level},
+                        dbname=self._dbname,
+                        username=self._username,
+                    )
+
+                    pgbench_result = node.pgbench_result(
+                        dbname=self._dbname,
+                        username=self._username,
+                        options=self._options,
+                        time=self._time,
+                        client=self._clients,
+                        jobs=self._clients,
+                    )
+
+                    result.append(SyncBenchmarkResult(standbys, level, pgbench_result))
+                    continue
+                continue
+        finally:
+            node.apply_settings(
+                {"synchronous_standby_names": None, "synchronous_commit": None},
+                dbname=self._dbname,
+                username=self._username,
+            )
+
+        return result
+
+    # --------------------------------------------------------------------
+    def _wait_sync_standbys(self, config) -> None:
+        # a reload is asynchronous for WAL senders too
+        sync_state = "quorum" if isinstance(config, Any) else "sync"
+
+        self._node.poll_query_until(
+            "select count(*) >= {} from pg_catalog.pg_stat_replication where sync_state = '{}'".format(
+                config.sync_num,
+                sync_state,
+            ),
+            dbname=self._dbname,
+            username=self._username,
+            sleep_time=0.1,
+        )
+        return
@@ -0,0 +1,505 @@
+# coding: utf-8
+
+import typing
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .enums import XLogMethod
+from .exceptions import InvalidOperationException
+from .node import PostgresNode
+from .standby import First
+from .tracing import trace_span
+
+
+class Topology(object):
+    """
+    Nodes of a replication topology built by :class:`.TopologyBuilder`.
+
+    Nodes are available by name (topology["replica1"]). The topology is a
+    context manager, all its nodes are cleaned up on exit.
+    """
+
+    _nodes: typing.Dict[str, PostgresNode]
+    _primary_name: str
+    _standby_names: typing.List[str]
+    _subscriber_names: typing.List[str]
+
+    def __init__(self, nodes, primary_name, standby_names, subscriber_names):
+        assert type(nodes) is dict
+        assert type(primary_name) is str
+        assert type(standby_names) is list
+        assert type(subscriber_names) is list
+
+        self._nodes = nodes
+        self._primary_name = primary_name
+        self._standby_names = standby_names
+        self._subscriber_names = subscriber_names
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.cleanup()
+
+    def __getitem__(self, name: str) -> PostgresNode:
+        assert type(name) is str
+        return self._nodes[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._nodes
+
+    @property
+    def nodes(self) -> typing.List[PostgresNode]:
+        return list(self._nodes.values())
+
+    @property
+    def primary(self) -> PostgresNode:
+        return self._nodes[self._primary_name]
+
+    @property
+    def standbys(self) -> typing.List[PostgresNode]:
+        return [self._nodes[n] for n in self._standby_names]
+
+    @property
+    def subscribers(self) -> typing.List[PostgresNode]:
+        return [self._nodes[n] for n in self._subscriber_names]
+
+    def stop(self) -> None:
+        """
+        Stop all nodes, subscribers and cascades go first.
+        """
+        for node in reversed(self.nodes):
+            node.stop()
+            continue
+        return
+
+    def cleanup(self) -> None:
+        """
+        Stop all nodes and remove their files.
+        """
+        for node in reversed(self.nodes):
+            node.cleanup(release_resources=True)
+            continue
+        return
+
+
+class TopologyBuilder(object):
+    """
+    Declarative builder of replication topologies.
+
+    All standbys (cascades too) are cloned from one base backup of the
+    primary. Nodes of the same level are spawned and started in parallel,
+    so setup time is dominated by the slowest node.
+
+    Example::
+
+        builder = TopologyBuilder()
+        builder.primary("primary", schema="create table t (x int primary key)")
+        builder.standby("replica1", sync=True, slot=True)
+        builder.standby("replica2")
+        builder.standby("cascade1", upstream="replica1")
+        builder.subscriber("subscriber1")
+
+        with builder.build() as topology:
+            topology.primary.execute("insert into t values (1)")
+            topology["cascade1"].catchup()
+    """
+
+    class StandbySpec:
+        """
+        Description of a physical standby.
+        """
+        __slots__ = ["name", "upstream", "sync", "slot"]
+
+        name: str
+        upstream: str
+        sync: bool
+        slot: typing.Optional[str]
+
+        def __init__(self, name: str, upstream: str, sync: bool, slot: typing.Optional[str]):
+            self.name = name
+            self.upstream = upstream
+            self.sync = sync
+            self.slot = slot
+
+    class SubscriberSpec:
+        """
+        Description of a logical subscriber.
+        """
+        __slots__ = ["name", "tables", "params"]
+
+        name: str
+        tables: typing.Optional[typing.List[str]]
+        params: typing.Dict[str, typing.Any]
+
+        def __init__(self, name: str, tables: typing.Optional[typing.List[str]], params: typing.Dict[str, typing.Any]):
+            self.name = name
+            self.tables = tables
+            self.params = params
+
+    _C_DEFAULT_JOBS = 8
+
+    _node_factory: typing.Callable[..., PostgresNode]
+    _jobs: int
+    _primary_name: typing.Optional[str]
+    _primary_schema: typing.Optional[str]
+    _primary_sql: typing.Optional[str]
+    _initdb_params: typing.Optional[typing.List[str]]
+    _pg_options: typing.Dict[str, typing.Any]
+    _standbys: typing.List[StandbySpec]
+    _subscribers: typing.List[SubscriberSpec]
+
+    def __init__(
+        self,
+        node_factory: typing.Optional[typing.Callable[..., PostgresNode]] = None,
+        jobs: int = _C_DEFAULT_JOBS,
+    ):
+        """
+        Args:
+            node_factory: a callable (name) -> new :class:`.PostgresNode`
+                for the primary and subscribers (get_new_node by default).
+                Standbys are cloned from the primary.
+            jobs: how many nodes are spawned and started at the same time.
+        """
+        assert type(jobs) is int
+        assert jobs > 0
+
+        if node_factory is None:
+            from .api import get_new_node
+            node_factory = get_new_node
+
+        self._node_factory = node_factory
+        self._jobs = jobs
+        self._primary_name = None
+        self._primary_schema = None
+        self._primary_sql = None
+        self._initdb_params = None
+        self._pg_options = {}
+        self._standbys = []
+        self._subscribers = []
+        return
+
+    def primary(
+        self,
+        name: str = "primary",
+        schema: typing.Optional[str] = None,
+        sql: typing.Optional[str] = None,
+        initdb_params: typing.Optional[typing.List[str]] = None,
+        pg_options: typing.Optional[typing.Dict[str, typing.Any]] = None,
+    ) -> "TopologyBuilder":
+        """
+        Describe the primary.
+
+        Args:
+            name: node name.
+            schema: a DDL script executed on the primary and subscribers.
+                Without it the schema of the primary is cloned to subscribers
+                by pg_dump.
+            sql: a script executed on the primary only (after the schema,
+                before the base backup).
+            initdb_params: parameters of initdb.
+            pg_options: configuration parameters of all nodes.
+        """
+        assert type(name) is str
+        assert schema is None or type(schema) is str
+        assert sql is None or type(sql) is str
+        assert initdb_params is None or type(initdb_params) is list
+        assert pg_options is None or type(pg_options) is dict
+
+        if self._primary_name is not None:
+            raise InvalidOperationException("Primary is already defined.")
+
+        self._check_new_name(name)
+        self._primary_name = name
+        self._primary_schema = schema
+        self._primary_sql = sql
+        self._initdb_params = initdb_params
+        self._pg_options = pg_options or {}
+        return self
+
+    def standby(
+        self,
+        name: str,
+        upstream: typing.Optional[str] = None,
+        sync: bool = False,
+        slot: typing.Union[bool, str] = False,
+    ) -> "TopologyBuilder":
+        """
+        Describe a physical standby.
+
+        Args:
+            name: node name (it is application_name of replication).
+            upstream: name of the upstream node (the primary by default).
+                A standby of a standby is a cascade.
+            sync: is it a synchronous standby of the primary?
+            slot: a replication slot on the upstream (True means a slot
+                with the name of the standby).
+        """
+        assert type(name) is str
+        assert upstream is None or type(upstream) is str
+        assert type(sync) is bool
+        assert type(slot) in [bool, str]
+
+        if self._primary_name is None:
+            raise InvalidOperationException("Primary is not defined.")
+
+        if upstream is None:
+            upstream = self._primary_name
+
+        if upstream != self._primary_name and upstream not in [s.name for s in self._standbys]:
+            raise InvalidOperationException("Unknown upstream \"{}\".".format(upstream))
+
+        if sync and upstream != self._primary_name:
+            raise InvalidOperationException("A cascading standby can't be synchronous.")
+
+        self._check_new_name(name)
+
+        if slot is True:
+            slot = name
+        elif slot is False:
+            slot = None
+
+        self._standbys.append(__class__.StandbySpec(name, upstream, sync, slot))
+        return self
+
+    def subscriber(
+        self,
+        name: str,
+        tables: typing.Optional[typing.List[str]] = None,
+        **params,
+    ) -> "TopologyBuilder":
+        """
+        Describe a logical subscriber of the primary. A new node is created,
+        the schema of the primary is executed (or cloned) there and
+        a subscription to a publication of the primary is created.
+
+        Args:
+            name: node name (and the name of its subscription).
+            tables: published tables (all tables by default).
+            params: subscription parameters.
+        """
+        assert type(name) is str
+        assert tables is None or type(tables) is list
+
+        if self._primary_name is None:
+            raise InvalidOperationException("Primary is not defined.")
+
+        self._check_new_name(name)
+        self._subscribers.append(__class__.SubscriberSpec(name, tables, params))
+        return self
+
+    def build(self) -> Topology:
+        """
+        Create and start all nodes, wait until all standbys are streaming
+        and all subscriptions are synchronized.
+
+        Returns:
+            A :class:`.Topology` object.
+        """
+        if self._primary_name is None:
+            raise InvalidOperationException("Primary is not defined.")
+
+        nodes: typing.Dict[str, PostgresNode] = {}
+
+        try:
+            with trace_span("topology.build"):
+                self._build(nodes)
+        except:  # noqa: E722
+            for node in reversed(list(nodes.values())):
+                node.cleanup(release_resources=True)
+                continue
+            raise
+
+        return Topology(
+            nodes,
+            self._primary_name,
+            [s.name for s in self._standbys],
+            [s.name for s in self._subscribers],
+        )
+
+    # --------------------------------------------------------------------
+    def _check_new_name(self, name: str) -> None:
+        assert type(name) is str
+
+        names = [self._primary_name]
+        names += [s.name for s in self._standbys]
+        names += [s.name for s in self._subscribers]
+
+        if name in names:
+            raise InvalidOperationException("Node \"{}\" is already defined.".format(name))
+        return
+
+    def _run_parallel(self, func, items) -> list:
+        items = list(items)
+
+        if len(items) < 2 or self._jobs == 1:
+            return [func(x) for x in items]
+
+        with ThreadPoolExecutor(max_workers=min(self._jobs, len(items))) as executor:
+            # list() rethrows an exception of a worker
+            return list(executor.map(func, items))
+
+    def _create_nodes(self, create, specs, nodes: typing.Dict[str, PostgresNode]) -> None:
+        # placeholders keep the order of nodes for cleanup
+        for spec in specs:
+            nodes[spec.name] = None
+            continue
+
+        try:
+            self._run_parallel(create, specs)
+        finally:
+            for spec in specs:
+                if nodes[spec.name] is None:
+                    del nodes[spec.name]
+                continue
+        return
+
+    def _build(self, nodes: typing.Dict[str, PostgresNode]) -> None:
+        assert type(nodes) is dict
+
+        primary = self._node_factory(name=self._primary_name)
+        nodes[self._primary_name] = primary
+
+        primary.init(
+            initdb_params=self._initdb_params,
+            allow_streaming=len(self._standbys) > 0,
+            allow_logical=len(self._subscribers) > 0,
+        )
+
+        if self._pg_options:
+            primary.set_auto_conf(self._pg_options)
+
+        primary.start()
+
+        if self._primary_schema:
+            primary.safe_psql(self._primary_schema)
+
+        if self._primary_sql:
+            primary.safe_psql(self._primary_sql)
+
+        self._build_standbys(primary, nodes)
+        self._build_subscribers(primary, nodes)
+        return
+
+    def _build_standbys(self, primary: PostgresNode, nodes: typing.Dict[str, PostgresNode]) -> None:
+        if len(self._standbys) == 0:
+            return
+
+        with primary.backup(xlog_method=XLogMethod.stream) as backup:
+            # copies of all standbys are spawned at once
+            def spawn(spec):
+                nodes[spec.name] = backup.spawn_primary(name=spec.name, destroy=False)
+                return
+
+            with trace_span("topology.spawn"):
+                self._create_nodes(spawn, self._standbys, nodes)
+
+            username = backup.username
+
+        # standbys are started level by level, an upstream must be
+        # running to create a slot there
+        level = [self._primary_name]
+
+        while len(level) > 0:
+            specs = [s for s in self._standbys if s.upstream in level]
+
+            for spec in specs:
+                node = nodes[spec.name]
+                node._assign_master(nodes[spec.upstream])
+                node._create_recovery_conf(username=username, slot=spec.slot)
+                continue
+
+            with trace_span("topology.start"):
+                self._run_parallel(lambda s: nodes[s.name].start(), specs)
+
+            for upstream in level:
+                names = [s.name for s in specs if s.upstream == upstream]
+                if len(names) > 0:
+                    __class__._wait_streaming(nodes[upstream], names)
+                continue
+
+            level = [s.name for s in specs]
+            continue
+
+        sync_names = [s.name for s in self._standbys if s.sync]
+
+        if len(sync_names) > 0:
+            primary.set_synchronous_standbys(First(1, [nodes[n] for n in sync_names]))
+            primary.reload()
+
+            primary.poll_query_until(
+                "select count(*) = 0 from pg_catalog.pg_stat_replication"
+                " where application_name in ({}) and sync_state = 'async'".format(
+                    __class__._format_names(sync_names),
+                ),
+                sleep_time=0.1,
+            )
+        return
+
+    def _build_subscribers(self, primary: PostgresNode, nodes: typing.Dict[str, PostgresNode]) -> None:
+        if len(self._subscribers) == 0:
+            return
+
+        pubs = dict()
+
+        for spec in self._subscribers:
+            pubs[spec.name] = primary.publish(spec.name, tables=spec.tables)
+            continue
+
+        def create(spec):
+            node = self._node_factory(name=spec.name)
+            nodes[spec.name] = node
+
+            node.init(initdb_params=self._initdb_params)
+
+            if self._pg_options:
+                node.set_auto_conf(self._pg_options)
+
+            node.start()
+
+            if self._primary_schema:
+                node.safe_psql(self._primary_schema)
+            else:
+                pubs[spec.name].clone_schema(node)
+            return
+
+        with trace_span("topology.subscribers"):
+            self._create_nodes(create, self._subscribers, nodes)
+
+        subs = []
+
+        for spec in self._subscribers:
+            subs.append(nodes[spec.name].subscribe(pubs[spec.name], spec.name, **spec.params))
+            continue
+
+        for sub in subs:
+            sub.catchup()
+
+            # initial synchronization of tables
+            sub.node.poll_query_until(
+                "select count(*) = 0 from pg_catalog.pg_subscription_rel"
+                " where srsubstate not in ('r', 's')",
+                sleep_time=0.1,
+            )
+            continue
+        return
+
+    @staticmethod
+    def _wait_streaming(upstream: PostgresNode, names: typing.List[str]) -> None:
+        assert isinstance(upstream, PostgresNode)
+        assert type(names) is list
+
+        upstream.poll_query_until(
+            "select count(*) = {} from pg_catalog.pg_stat_replication"
+            " where application_name in ({}) and state = 'streaming'".format(
+                len(names),
+                __class__._format_names(names),
+            ),
+            sleep_time=0.1,
+        )
+        return
+
+    @staticmethod
+    def _format_names(names: typing.List[str]) -> str:
+        return ", ".join("'{}'".format(n.replace("'", "''")) for n in names)
@@ -0,0 +1,430 @@
+# coding: utf-8
+
+from .config import testgres_config
+
+import bisect
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import typing
+
+
+class Tracer:
+    """
+    Collector of timing spans of testgres operations.
+
+    Spans are collected while testgres_config.use_tracing is True. Each
+    finished span is added to a bounded list and to a histogram of its
+    operation. A span gets the node name of the enclosing span if it is
+    not given explicitly.
+
+    Examples:
+        testgres.configure_testgres(use_tracing=True)
+        ...
+        tracer = testgres.Tracer.get_single_instance()
+        for name, h in tracer.histograms().items():
+            print(name, h.count, h.total, h.percentile(0.9))
+        tracer.export_chrome_trace("trace.json")
+    """
+
+    class Span:
+        """
+        One finished operation.
+
+        Args:
+            name: name of operation.
+            start: start time (seconds since the tracer origin).
+            duration: duration (seconds).
+            pid: process id.
+            tid: thread id.
+            args: node name and arguments of operation.
+        """
+        __slots__ = ("name", "start", "duration", "pid", "tid", "args")
+
+        name: str
+        start: float
+        duration: float
+        pid: int
+        tid: int
+        args: typing.Dict[str, typing.Any]
+
+        def __init__(
+            self,
+            name: str,
+            start: float,
+            duration: float,
+            pid: int,
+            tid: int,
+            args: typing.Dict[str, typing.Any],
+        ):
+            assert type(name) is str
+            assert type(start) is float
+            assert type(duration) is float
+            assert type(pid) is int
+            assert type(tid) is int
+            assert type(args) is dict
+            self.name = name
+            self.start = start
+            self.duration = duration
+            self.pid = pid
+            self.tid = tid
+            self.args = args
+            return
+
+        def __repr__(self):
+            return "{}(name={!r}, duration={:.6f}, args={!r})".format(
+                __class__.__name__,
+                self.name,
+                self.duration,
+                self.args,
+            )
+
+        def to_dict(self) -> typing.Dict[str, typing.Any]:
+            return {
+                "name": self.name,
+                "start": self.start,
+                "duration": self.duration,
+                "pid": self.pid,
+                "tid": self.tid,
+                "args": self.args,
+            }
+
+    class Histogram:
+        """
+        Durations of one operation.
+
+        Buckets have exponential upper bounds from 0.1 ms to about 100 seconds.
+        """
+
+        # upper bounds of buckets (seconds), the last bucket is unbounded
+        _C_BOUNDS = [0.0001 * (2 ** i) for i in range(21)]
+
+        name: str
+        count: int
+        total: float
+        min: float
+        max: float
+        buckets: typing.List[int]
+
+        def __init__(self, name: str):
+            assert type(name) is str
+            self.name = name
+            self.count = 0
+            self.total = 0.0
+            self.min = 0.0
+            self.max = 0.0
+            self.buckets = [0] * (len(__class__._C_BOUNDS) + 1)
+            return
+
+        def __repr__(self):
+            return "{}(name={!r}, count={}, total={:.6f}, max={:.6f})".format(
+                __class__.__name__,
+                self.name,
+                self.count,
+                self.total,
+                self.max,
+            )
+
+        @property
+        def mean(self) -> float:
+            if self.count == 0:
+                return 0.0
+            return self.total / self.count
+
+        def add(self, duration: float) -> None:
+            assert type(duration) is float
+
+            if self.count == 0:
+                self.min = duration
+                self.max = duration
+            else:
+                self.min = min(self.min, duration)
+                self.max = max(self.max, duration)
+
+            self.count += 1
+            self.total += duration
+            self.buckets[bisect.bisect_left(__class__._C_BOUNDS, duration)] += 1
+            return
+
+        def percentile(self, p: float) -> float:
+            """
+            Estimate of a percentile (0 < p <= 1): an upper bound of its bucket.
+            """
+            assert type(p) in [int, float]
+            assert p > 0
+            assert p <= 1
+
+            if self.count == 0:
+                return 0.0
+
+            need = p * self.count
+            seen = 0
+
+            for i, n in enumerate(self.buckets):
+                seen += n
+                if seen >= need:
+                    if i < len(__class__._C_BOUNDS):
+                        return min(__class__._C_BOUNDS[i], self.max)
+                    break
+                continue
+
+            return self.max
+
+        def to_dict(self) -> typing.Dict[str, typing.Any]:
+            return {
+                "count": self.count,
+                "total": self.total,
+                "min": self.min,
+                "max": self.max,
+                "mean": self.mean,
+                "p50": self.percentile(0.5),
+                "p90": self.percentile(0.9),
+                "p99": self.percentile(0.99),
+                "bounds": __class__._C_BOUNDS,
+                "buckets": self.buckets,
+            }
+
+    # --------------------------------------------------------------------
+    _C_MAX_SPANS = 100000
+
+    sm_single_instance: typing.Optional["Tracer"] = None
+    sm_single_instance_guard = threading.Lock()
+
+    _guard: threading.Lock
+    _origin: float
+    _spans: typing.List[Span]
+    _max_spans: int
+    _dropped_spans: int
+    _histograms: typing.Dict[str, Histogram]
+    _local: threading.local
+
+    # --------------------------------------------------------------------
+    def __init__(self, max_spans: int = _C_MAX_SPANS):
+        assert type(max_spans) is int
+        assert max_spans >= 0
+
+        self._guard = threading.Lock()
+        self._origin = time.perf_counter()
+        self._spans = []
+        self._max_spans = max_spans
+        self._dropped_spans = 0
+        self._histograms = dict()
+        self._local = threading.local()
+        return
+
+    @staticmethod
+    def get_single_instance() -> "Tracer":
+        assert __class__ == Tracer
+
+        if __class__.sm_single_instance is not None:
+            assert type(__class__.sm_single_instance) is __class__
+            return __class__.sm_single_instance
+
+        with __class__.sm_single_instance_guard:
+            if __class__.sm_single_instance is None:
+                __class__.sm_single_instance = __class__()
+
+        assert __class__.sm_single_instance is not None
+        assert type(__class__.sm_single_instance) is __class__
+        return __class__.sm_single_instance
+
+    # interface ----------------------------------------------------------
+    @contextlib.contextmanager
+    def span(self, name: str, **args):
+        """
+        Measure a block of code.
+        """
+        assert type(name) is str
+
+        stack = self._get_stack()
+
+        if args.get("node") is None:
+            args.pop("node", None)
+            for parent_args in reversed(stack):
+                if "node" in parent_args:
+                    args["node"] = parent_args["node"]
+                    break
+                continue
+
+        stack.append(args)
+
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            duration = time.perf_counter() - start
+            stack.pop()
+            self._add(name, start - self._origin, duration, args)
+        return
+
+    @property
+    def dropped_spans(self) -> int:
+        """
+        Count of spans which are not kept (histograms still have them).
+        """
+        return self._dropped_spans
+
+    def spans(self, name: typing.Optional[str] = None) -> typing.List[Span]:
+        assert name is None or type(name) is str
+
+        with self._guard:
+            spans = list(self._spans)
+
+        if name is None:
+            return spans
+
+        return [s for s in spans if s.name == name]
+
+    def histograms(self) -> typing.Dict[str, Histogram]:
+        with self._guard:
+            return dict(self._histograms)
+
+    def reset(self) -> None:
+        with self._guard:
+            self._origin = time.perf_counter()
+            self._spans = []
+            self._dropped_spans = 0
+            self._histograms = dict()
+        return
+
+    def export_json(self, file: typing.Union[str, typing.TextIO]) -> None:
+        """
+        Write spans and histograms as JSON.
+
+        Args:
+            file: a file name or a text file object.
+        """
+        data = {
+            "spans": [s.to_dict() for s in self.spans()],
+            "dropped_spans": self._dropped_spans,
+            "histograms": {k: h.to_dict() for k, h in self.histograms().items()},
+        }
+
+        __class__._write_json(file, data)
+        return
+
+    def export_chrome_trace(self, file: typing.Union[str, typing.TextIO]) -> None:
+        """
+        Write spans in Chrome trace event format (chrome://tracing, Perfetto).
+
+        Args:
+            file: a file name or a text file object.
+        """
+        events = [
+            {
+                "name": s.name,
+                "cat": "testgres",
+                "ph": "X",
+                "ts": s.start * 1000000,
+                "dur": s.duration * 1000000,
+                "pid": s.pid,
+                "tid": s.tid,
+                "args": s.args,
+            }
+            for s in self.spans()
+        ]
+
+        __class__._write_json(file, {"traceEvents": events, "displayTimeUnit": "ms"})
+        return
+
+    # --------------------------------------------------------------------
+    def _get_stack(self) -> typing.List[typing.Dict[str, typing.Any]]:
+        stack = getattr(self._local, "stack", None)
+
+        if stack is None:
+            stack = []
+            self._local.stack = stack
+
+        return stack
+
+    def _add(
+        self,
+        name: str,
+        start: float,
+        duration: float,
+        args: typing.Dict[str, typing.Any],
+    ) -> None:
+        span = __class__.Span(
+            name,
+            start,
+            duration,
+            os.getpid(),
+            threading.get_ident(),
+            args,
+        )
+
+        with self._guard:
+            if len(self._spans) < self._max_spans:
+                self._spans.append(span)
+            else:
+                self._dropped_spans += 1
+
+            h = self._histograms.get(name)
+
+            if h is None:
+                h = __class__.Histogram(name)
+                self._histograms[name] = h
+
+            h.add(duration)
+        return
+
+    @staticmethod
+    def _write_json(file: typing.Union[str, typing.TextIO], data: typing.Any) -> None:
+        if type(file) is str:
+            with open(file, "w") as f:
+                __class__._write_json(f, data)
+            return
+
+        # arguments may be any objects
+        json.dump(data, file, default=str)
+        return
+
+
+def trace_span(name: str, **args):
+    """
+    Measure a block of code if tracing is enabled (testgres_config.use_tracing).
+    """
+    if not testgres_config.use_tracing:
+        return contextlib.nullcontext()
+
+    return Tracer.get_single_instance().span(name, **args)
+
+
+def traced(name: str):
+    """
+    Measure each call of a function if tracing is enabled.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not testgres_config.use_tracing:
+                return function(*args, **kwargs)
+
+            with Tracer.get_single_instance().span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def traced_node_method(name: str):
+    """
+    Measure each call of a method of PostgresNode if tracing is enabled.
+    A span gets the node name.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(self, *args, **kwargs):
+            if not testgres_config.use_tracing:
+                return function(self, *args, **kwargs)
+
+            with Tracer.get_single_instance().span(name, node=self.name):
+                return function(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -3,6 +3,7 @@
 from __future__ import division
 from __future__ import print_function
 
+import atexit
 import os
 import sys
 import time
@@ -27,9 +28,11 @@ from testgres.operations.local_ops import LocalOperations
 from testgres.operations.helpers import Helpers as OsHelpers
 
 from .impl.port_manager__generic2 import PortManager__Generic2
+from .impl.port_manager__lease_registry import PortManager__LeaseRegistry
 
 from .impl.platforms import internal_platform_utils_factory
 from .impl import internal_utils
+from .tracing import trace_span
 
 # rows returned by PG_CONFIG
 _pg_config_data = {}
@@ -39,6 +42,13 @@ _pg_config_data = {}
 #
 _old_port_manager = PortManager__Generic2(LocalOperations.get_single_instance())
 
+#
+# The port manager for TestgresConfig.use_port_lease_registry
+#
+_lease_port_manager = PortManager__LeaseRegistry()
+
+atexit.register(_lease_port_manager.release_leases)
+
 
 # re-export version type
 class PgVer(Version):
@@ -54,6 +64,9 @@ def internal__reserve_port():
     """
     Generate a new port.
     """
+    if tconf.use_port_lease_registry:
+        return _lease_port_manager.reserve_port()
+
     return _old_port_manager.reserve_port()
 
 
@@ -63,6 +76,11 @@ def internal__release_port(port):
     """
 
     assert type(port) is int
+
+    # The option may be changed after the port has been reserved
+    if _lease_port_manager.is_reserved(port):
+        return _lease_port_manager.release_port(port)
+
     return _old_port_manager.release_port(port)
 
 
@@ -98,13 +116,14 @@ def execute_utility2(
     assert type(ignore_errors) is bool
     assert exec_env is None or type(exec_env) is dict
 
-    exec_r = os_ops.exec_command(
-        args,
-        verbose=True,
-        ignore_errors=ignore_errors,
-        encoding=OsHelpers.GetDefaultEncoding(),
-        exec_env=exec_env,
-    )
+    with trace_span("execute_utility", util=_get_utility_name(args), args=args):
+        exec_r = os_ops.exec_command(
+            args,
+            verbose=True,
+            ignore_errors=ignore_errors,
+            encoding=OsHelpers.GetDefaultEncoding(),
+            exec_env=exec_env,
+        )
 
     assert type(exec_r) is tuple
     assert len(exec_r) == 3
@@ -131,6 +150,15 @@ def execute_utility2(
     return out
 
 
+def _get_utility_name(args) -> str:
+    if isinstance(args, (list, tuple)):
+        cmd = str(args[0]) if len(args) > 0 else ""
+    else:
+        cmd = str(args).split(" ", 1)[0]
+
+    return os.path.basename(cmd)
+
+
 def get_bin_path(filename):
     """
     Return absolute path to an executable using PG_BIN or PG_CONFIG.
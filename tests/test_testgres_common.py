@@ -15,6 +15,7 @@ from src.node import NodeConnection
 from src.node import PostgresNodeLogReader
 from src.node import PostgresNodeUtils
 from src.node import ProcessProxy
+from src.node import ProcessTreeSnapshot
 from src.utils import get_pg_version2
 from src.utils import file_tail
 from src.utils import get_bin_path2
@@ -26,6 +27,11 @@ from src import ProcessType
 from src import NodeStatus
 from src import IsolationLevel
 from src import NodeApp
+from src import Tracer
+from src import TopologyBuilder
+from src import LogicalCatchup
+from src import CatchUpException
+from src import BackupFormat
 from src import enums
 
 # New name prevents to collect test-functions in TestgresException and fixes
@@ -40,6 +46,7 @@ from src import QueryTimeoutException
 from src import InvalidOperationException
 from src import BackupException
 from src import ProgrammingError
+from src import DatabaseError
 from src import scoped_config
 from src import First, Any
 
@@ -56,6 +63,7 @@ import re
 import subprocess
 import typing
 import types
+import io
 import psutil
 import testgres.postgres_configuration as testgres_pgconf
 
@@ -573,6 +581,82 @@ class TestTestgresCommon:
             assert ('debug1' == cmm_new[0][0].lower())
             assert (cmm_old != cmm_new)
 
+    def test_apply_settings(self, node_svc: PostgresNodeService):
+        assert isinstance(node_svc, PostgresNodeService)
+
+        with __class__.helper__get_node(node_svc) as node:
+            node.init().start()
+
+            pid1 = node.pid
+            assert pid1 != 0
+
+            # reload is enough
+            r = node.apply_settings({"work_mem": "7MB", "log_min_duration_statement": 5})
+            assert r is False
+            assert node.execute("show work_mem")[0][0] == "7MB"
+            assert node.execute("show log_min_duration_statement")[0][0] == "5ms"
+            assert node.pid == pid1
+
+            # the same value of postmaster parameter does not require a restart
+            max_connections = node.execute("show max_connections")[0][0]
+            r = node.apply_settings({"max_connections": int(max_connections)})
+            assert r is False
+            assert node.pid == pid1
+
+            # restart is required
+            r = node.apply_settings({"max_connections": int(max_connections) + 1})
+            assert r is True
+            assert node.execute("show max_connections")[0][0] == str(int(max_connections) + 1)
+            assert node.pid != pid1
+
+            # reset
+            r = node.apply_settings({"work_mem": None})
+            assert r is False
+            assert node.execute("show work_mem")[0][0] != "7MB"
+
+            # internal parameter can't be changed
+            with pytest.raises(expected_exception=InvalidOperationException):
+                node.apply_settings({"block_size": 4096})
+
+            with pytest.raises(expected_exception=ValueError):
+                node.apply_settings({"work_mem; drop table x": 1})
+
+            # elements of a list parameter
+            r = node.apply_settings({"search_path": ["s1", "public"]})
+            assert r is False
+            assert node.execute("show search_path")[0][0] == "s1, public"
+
+            # stopped node
+            node.stop()
+            r = node.apply_settings({"work_mem": "9MB", "search_path": ("s2", "public")})
+            assert r is False
+            node.start()
+            assert node.execute("show work_mem")[0][0] == "9MB"
+            assert node.execute("show search_path")[0][0] == "s2, public"
+
+    def test_apply_settings__mixed_case(self, node_svc: PostgresNodeService):
+        assert isinstance(node_svc, PostgresNodeService)
+
+        with __class__.helper__get_node(node_svc).init().start() as node:
+            r = node.apply_settings({"Work_Mem": "7MB"})
+            assert r is False
+            assert node.execute("show work_mem")[0][0] == "7MB"
+
+            # contexts are cached by lower case names
+            with node.connect() as con:
+                queries = []
+                execute = con.execute
+
+                def execute_proxy(query, *args):
+                    queries.append(query)
+                    return execute(query, *args)
+
+                con.execute = execute_proxy
+
+                contexts = node._get_setting_contexts(con, ["Work_Mem", "WORK_MEM"])
+                assert contexts == {"Work_Mem": "user", "WORK_MEM": "user"}
+                assert queries == []
+
     def test_pg_ctl(self, node_svc: PostgresNodeService):
         assert isinstance(node_svc, PostgresNodeService)
 
@@ -1142,6 +1226,37 @@ class TestTestgresCommon:
                 with pytest.raises(expected_exception=testgres_TestgresException):
                     replica.source_walsender
 
+    def test_process_snapshot(self, node_svc: PostgresNodeService):
+        assert isinstance(node_svc, PostgresNodeService)
+
+        with __class__.helper__get_node(node_svc).init().start() as node:
+            snapshot1 = node.process_snapshot()
+            assert type(snapshot1) is ProcessTreeSnapshot
+            assert snapshot1.postmaster_pid == node.pid
+            assert len(snapshot1.child_processes) > 0
+            assert ProcessType.Checkpointer in snapshot1.auxiliary_pids
+
+            # the same postmaster and a fresh snapshot
+            assert node.process_snapshot(max_age=3600) is snapshot1
+
+            snapshot2 = node.process_snapshot()
+            assert snapshot2 is not snapshot1
+            assert snapshot2.auxiliary_pids[ProcessType.Checkpointer] == snapshot1.auxiliary_pids[ProcessType.Checkpointer]
+
+            node.restart()
+
+            # a new postmaster
+            snapshot3 = node.process_snapshot(max_age=3600)
+            assert snapshot3 is not snapshot1
+            assert snapshot3.postmaster_pid == node.pid
+            assert snapshot3.postmaster_pid != snapshot1.postmaster_pid
+            assert ProcessType.Checkpointer in snapshot3.auxiliary_pids
+
+            node.stop()
+
+            with pytest.raises(expected_exception=InvalidOperationException):
+                node.process_snapshot(max_age=3600)
+
     def test_exceptions(self):
         str(StartNodeException('msg', [('file', 'lines')]))
         str(ExecUtilException('msg', 'cmd', 1, 'out'))
@@ -1367,6 +1482,158 @@ class TestTestgresCommon:
         # GO HOME!
         return
 
+    @pytest.mark.parametrize("log_format", [enums.LogFormat.Csv, enums.LogFormat.Json])
+    def test_structured_log(self, node_svc: PostgresNodeService, log_format: enums.LogFormat):
+        assert isinstance(node_svc, PostgresNodeService)
+        assert type(log_format) is enums.LogFormat
+
+        with __class__.helper__get_node(node_svc) as node:
+            if log_format == enums.LogFormat.Json and node.version < PgVer('15'):
+                pytest.skip("jsonlog is only available on PostgreSQL 15 and newer")
+
+            node.init(structured_log=log_format).start()
+
+            reader = node.structured_log()
+            assert reader.file_name == node.structured_log_file
+
+            node.psql("select 1/0")
+
+            # plain log is still written
+            assert b"division by zero" in node_svc.os_ops.read(node.pg_log_file, binary=True)
+
+            records = []
+            for _ in range(50):
+                records += list(reader.read(severities=["ERROR"]))
+                if len(records) > 0:
+                    break
+                time.sleep(0.1)
+
+            assert len(records) == 1
+            assert records[0].sqlstate == "22012"
+            assert records[0].message == "division by zero"
+            assert records[0].pid is not None
+
+            # a replica logs into its own directory
+            with node.replicate(checkpoint="fast").start() as replica:
+                assert replica.structured_log_file != node.structured_log_file
+                assert replica.structured_log_file.startswith(replica.logs_dir)
+
+                replica.psql("select 2/0")
+
+                records = []
+                for _ in range(50):
+                    records += list(replica.structured_log().read(severities=["ERROR"]))
+                    if len(records) > 0:
+                        break
+                    time.sleep(0.1)
+
+                assert len(records) == 1
+                assert records[0].message == "division by zero"
+
+            # the original log does not get replica's records
+            assert len(list(node.structured_log().read(severities=["ERROR"]))) == 1
+
+    def test_stats_profile(self, node_svc: PostgresNodeService):
+        assert isinstance(node_svc, PostgresNodeService)
+
+        with __class__.helper__get_node(node_svc).init().start() as node:
+            with node.stats_profile(settle=0.5) as prof:
+                node.safe_psql("create table t as select generate_series(1, 10000) as x")
+                node.safe_psql("select count(*) from t")
+
+            assert prof.elapsed > 0
+            assert "pg_stat_database" in prof.views
+            assert ("pg_stat_wal" in prof.views) == (node.version >= PgVer('14'))
+            assert ("pg_stat_io" in prof.views) == (node.version >= PgVer('16'))
+
+            db_delta = prof.delta("pg_stat_database", "postgres")
+            assert db_delta["xact_commit"] >= 2
+            assert db_delta["tup_inserted"] >= 10000
+
+            if node.version >= PgVer('14'):
+                assert prof.delta("pg_stat_wal")["wal_bytes"] > 0
+
+            # a missing row
+            assert prof.delta("pg_stat_database", "no_such_db") == {}
+
+            with pytest.raises(expected_exception=InvalidOperationException):
+                prof.delta("pg_stat_statements")
+
+            with pytest.raises(expected_exception=InvalidOperationException):
+                prof.top_statements()
+
+            available = node.execute("select 1 from pg_available_extensions where name = 'pg_stat_statements'")
+
+            if len(available) == 0:
+                with pytest.raises(expected_exception=InvalidOperationException, match="not available"):
+                    node.stats_profile(statements=True).start()
+                return
+
+            with node.stats_profile(statements=True) as prof:
+                for _ in range(5):
+                    node.safe_psql("select count(*) from t where x > 100")
+
+            top = prof.top_statements(3)
+            assert len(top) > 0
+            assert len(top) <= 3
+            assert any("from t where x >" in s.query and s.calls == 5 for s in top)
+
+    def test_stats_profile_preloaded(self, node_svc: PostgresNodeService):
+        assert isinstance(node_svc, PostgresNodeService)
+
+        with __class__.helper__get_node(node_svc).init().start() as node:
+            # another library is already preloaded
+            node.apply_settings({"shared_preload_libraries": ["plpgsql"]})
+            assert (node.execute("show shared_preload_libraries") == [("plpgsql", )])
+
+            available = node.execute("select 1 from pg_available_extensions where name = 'pg_stat_statements'")
+
+            if len(available) == 0:
+                with pytest.raises(expected_exception=InvalidOperationException, match="not available"):
+                    node.stats_profile(statements=True).start()
+                return
+
+            with node.stats_profile(statements=True) as prof:
+                node.safe_psql("select 1")
+
+            assert (node.execute("show shared_preload_libraries") == [("plpgsql, pg_stat_statements", )])
+            assert (len(prof.top_statements()) > 0)
+
+    def test_tracing(self, node_svc: PostgresNodeService):
+        assert isinstance(node_svc, PostgresNodeService)
+
+        tracer = Tracer.get_single_instance()
+        tracer.reset()
+
+        with scoped_config(use_tracing=True):
+            with __class__.helper__get_node(node_svc) as node:
+                node.init().start()
+                node.execute("select 1")
+                node.stop()
+
+                histograms = tracer.histograms()
+
+                for name in ["node.init", "node.start", "node.stop", "cached_initdb", "execute_utility", "get_pg_node_state", "connect"]:
+                    assert name in histograms
+                    assert histograms[name].count > 0
+
+                # pg_ctl is run inside of node.start
+                spans = [s for s in tracer.spans("execute_utility") if s.args["util"] == "pg_ctl"]
+                assert len(spans) > 0
+                assert all(s.args["node"] == node.name for s in spans)
+
+                # psql is run directly by a node
+                node.start()
+                node.safe_psql("select 1")
+                node.stop()
+
+                spans = [s for s in tracer.spans("execute_utility") if s.args["util"] == "psql"]
+                assert len(spans) == 1
+                assert "select 1" in spans[0].args["args"]
+                assert spans[0].args["node"] == node.name
+
+        tracer.reset()
+
     def test_psql(self, node_svc: PostgresNodeService):
         assert isinstance(node_svc, PostgresNodeService)
         with __class__.helper__get_node(node_svc).init().start() as node:
@@ -1607,6 +1874,286 @@ class TestTestgresCommon:
                 with pytest.raises(expected_exception=BackupException):
                     backup.spawn_primary()
 
+    def test_backup_tar_compressed(self, node_svc: PostgresNodeService):
+        assert isinstance(node_svc, PostgresNodeService)
+        with __class__.helper__get_node(node_svc) as node:
+            node.init(allow_streaming=True).start()
+            node.execute("create table t as select generate_series(1, 1000) as x")
+
+            for xlog_method in ["fetch", "stream"]:
+                with node.backup(
+                    xlog_method=xlog_method,
+                    format=BackupFormat.tar,
+                    compress="gzip:1",
+                    max_rate="100M",
+                    checkpoint="fast",
+                    progress=True,
+                ) as backup:
+                    assert (backup.stats is not None)
+                    assert (backup.stats.bytes > 0)
+                    assert (backup.stats.duration > 0)
+                    assert (backup.stats.rate > 0)
+
+                    with backup.spawn_primary(destroy=False).start() as node_copy:
+                        assert (node_copy.execute("select count(*) from t") == [(1000, )])
+
+                    with backup.spawn_replica().start() as replica:
+                        node.execute("insert into t values (0)")
+                        replica.catchup()
+                        assert (replica.execute("select count(*) from t") == [(1001, )])
+
+                    node.execute("delete from t where x = 0")
+
+            # a broken archive leaves nothing in the backup
+            with node.backup(format=BackupFormat.tar, checkpoint="fast") as backup:
+                tar_file = os.path.join(backup.base_dir, "tar", "base.tar")
+                node_svc.os_ops.write(tar_file, "garbage", truncate=True)
+
+                with pytest.raises(expected_exception=BackupException, match="Failed to extract files"):
+                    backup.spawn_primary()
+
+                assert not node_svc.os_ops.path_exists(os.path.join(backup.base_dir, "data"))
+
+            # tar does not detect lz4 itself
+            if __class__.helper__util_exists(node_svc.os_ops, "lz4"):
+                with node.backup(format=BackupFormat.tar, checkpoint="fast") as backup:
+                    tar_file = os.path.join(backup.base_dir, "tar", "base.tar")
+                    node_svc.os_ops.exec_command(["lz4", "-q", "--rm", tar_file, tar_file + ".lz4"])
+
+                    with backup.spawn_primary().start() as node_copy:
+                        assert (node_copy.execute("select count(*) from t") == [(1000, )])
+
+            # server side compression, a plain backup is written by client
+            with node.backup(compress="server-gzip") as backup:
+                assert (backup.stats.bytes is None)
+                with backup.spawn_primary().start() as node_copy:
+                    assert (node_copy.execute("select count(*) from t") == [(1000, )])
+
+            with pytest.raises(expected_exception=BackupException, match="Invalid checkpoint"):
+                node.backup(checkpoint="slow")
+
+            if node.version < PgVer("17"):
+                with node.backup() as backup:
+                    with pytest.raises(expected_exception=BackupException, match="PostgreSQL 17"):
+                        node.backup(incremental=backup)
+
+    def test_backup_incremental_chain(self, node_svc: PostgresNodeService):
+        assert isinstance(node_svc, PostgresNodeService)
+
+        current_version = get_pg_version2(node_svc.os_ops)
+
+        if not __class__.helper__pg_version_ge(current_version, "17"):
+            with __class__.helper__get_node(node_svc) as node:
+                node.init(allow_streaming=True).start()
+                with pytest.raises(expected_exception=BackupException, match="PostgreSQL 17"):
+                    node.backup(summarize_wal=True)
+
+        __class__.helper__skip_test_if_pg_version_is_not_ge(current_version, "17")
+
+        with __class__.helper__get_node(node_svc) as node:
+            node.init(allow_streaming=True).start()
+            node.execute("create table t as select generate_series(1, 100000) as x")
+            node.execute("create table t2 (x int)")
+
+            with node.backup(summarize_wal=True, progress=True) as full:
+                node.execute("insert into t2 values (1)")
+
+                with full.incremental_backup(progress=True) as incr1:
+                    node.execute("insert into t2 values (2)")
+
+                    with incr1.incremental_backup(progress=True) as incr2:
+                        assert (incr2.chain == [full, incr1, incr2])
+
+                        # only changed blocks are transferred
+                        assert (incr2.stats.bytes < full.stats.bytes)
+
+                        with incr1.spawn_primary(destroy=False).start() as node1:
+                            assert (node1.execute("select count(*) from t") == [(100000, )])
+                            assert (node1.execute("select * from t2") == [(1, )])
+
+                        with incr2.spawn_replica().start() as replica:
+                            node.execute("insert into t2 values (3)")
+                            replica.catchup()
+                            assert (replica.execute("select * from t2 order by x") == [(1, ), (2, ), (3, )])
+
+                incr1 = full.incremental_backup()
+                incr2 = incr1.incremental_backup()
+
+                # the chain is broken
+                incr1.cleanup()
+                with pytest.raises(expected_exception=BackupException, match="chain is exhausted"):
+                    incr2.spawn_primary()
+                incr2.cleanup()
+
+    def test_topology_builder(self, node_svc: PostgresNodeService):
+        assert isinstance(node_svc, PostgresNodeService)
+
+        current_version = get_pg_version2(node_svc.os_ops)
+
+        __class__.helper__skip_test_if_pg_version_is_not_ge(current_version, "10")
+
+        builder = TopologyBuilder(
+            node_factory=lambda name: __class__.helper__get_node(node_svc, name=name),
+        )
+
+        builder.primary(
+            "primary",
+            schema="create table t (x int primary key)",
+            sql="insert into t values (1)",
+        )
+        builder.standby("replica1", sync=True, slot=True)
+        builder.standby("replica2")
+        builder.standby("cascade1", upstream="replica1", slot="cascade1_slot")
+        builder.subscriber("subscriber1")
+
+        with pytest.raises(expected_exception=InvalidOperationException, match="already defined"):
+            builder.standby("replica2")
+
+        with pytest.raises(expected_exception=InvalidOperationException, match="Unknown upstream"):
+            builder.standby("replica3", upstream="unknown")
+
+        with pytest.raises(expected_exception=InvalidOperationException, match="synchronous"):
+            builder.standby("replica3", upstream="replica2", sync=True)
+
+        with builder.build() as topology:
+            assert ([n.name for n in topology.standbys] == ["replica1", "replica2", "cascade1"])
+            assert ([n.name for n in topology.subscribers] == ["subscriber1"])
+
+            primary = topology.primary
+
+            # replica1 is synchronous
+            res = primary.execute("select application_name, sync_state from pg_stat_replication order by 1")
+            assert (("replica1", "sync") in res)
+            assert (("replica2", "async") in res)
+
+            res = topology["replica1"].execute("select slot_name, active from pg_replication_slots")
+            assert (res == [("cascade1_slot", True)])
+
+            # initial data is copied to the subscriber
+            assert (topology["subscriber1"].execute("select x from t") == [(1, )])
+
+            primary.execute("insert into t values (2)")
+
+            for name in ["replica2", "cascade1"]:
+                topology[name].poll_query_until("select count(*) = 2 from t", sleep_time=0.1)
+
+            # replica1 is synchronous, so the row is there
+            assert (topology["replica1"].execute("select count(*) from t") == [(2, )])
+
+            topology["subscriber1"].poll_query_until("select count(*) = 2 from t", sleep_time=0.1)
+
+            nodes = topology.nodes
+
+        for node in nodes:
+            assert (node.status() == NodeStatus.Uninitialized)
+
+    def test_topology_builder_clone_schema(self, node_svc: PostgresNodeService):
+        assert isinstance(node_svc, PostgresNodeService)
+
+        current_version = get_pg_version2(node_svc.os_ops)
+
+        __class__.helper__skip_test_if_pg_version_is_not_ge(current_version, "10")
+
+        builder = TopologyBuilder(
+            node_factory=lambda name: __class__.helper__get_node(node_svc, name=name),
+        )
+
+        # no schema, it is cloned to the subscriber by pg_dump
+        builder.primary("primary", sql="create table t (x int primary key); insert into t values (1)")
+        builder.subscriber("subscriber1")
+
+        with builder.build() as topology:
+            assert (topology["subscriber1"].execute("select x from t") == [(1, )])
+
+    def test_replication_monitor(self, node_svc: PostgresNodeService):
+        assert isinstance(node_svc, PostgresNodeService)
+
+        current_version = get_pg_version2(node_svc.os_ops)
+
+        __class__.helper__skip_test_if_pg_version_is_not_ge(current_version, "10")
+
+        with __class__.helper__get_node(node_svc) as master:
+            master.init(allow_streaming=True).start()
+
+            with master.replicate("replica").start() as replica:
+                master.execute("create table t (x int)")
+                replica.catchup()
+
+                with master.replication_monitor(interval=0.05) as monitor:
+                    for _ in range(5):
+                        master.execute("insert into t select generate_series(1, 10000)")
+                        time.sleep(0.05)
+                    replica.catchup()
+
+                assert (not monitor.is_alive())
+
+                samples = monitor.samples("replica")
+                assert (len(samples) >= 2)
+                assert (samples[0].state == "streaming")
+                assert (samples[0].sync_state == "async")
+                assert (samples[-1].replay_lsn > samples[0].replay_lsn)
+
+                summary = monitor.summary()
+                assert (list(summary.keys()) == ["replica"])
+                assert (summary["replica"].sample_count == len(samples))
+                assert (summary["replica"].replay_rate > 0)
+
+                lag = summary["replica"].replay_lag_bytes
+                assert (lag.percentile(0.5) <= lag.percentile(0.99) <= lag.max)
+
+                f = io.StringIO()
+                monitor.to_csv(f)
+                assert (len(f.getvalue().splitlines()) == len(samples) + 1)
+
+    def test_sync_replication_benchmark(self, node_svc: PostgresNodeService):
+        assert isinstance(node_svc, PostgresNodeService)
+
+        current_version = get_pg_version2(node_svc.os_ops)
+
+        __class__.helper__skip_test_if_pg_version_is_not_ge(current_version, "10")
+
+        with __class__.helper__get_node(node_svc) as master:
+            master.init(allow_streaming=True).start()
+
+            with master.replicate("replica1").start() as replica1, \
+                    master.replicate("replica2").start() as replica2:
+                configs = [None, First(1, [replica1, replica2]), Any(2, [replica1, replica2])]
+
+                results = master.sync_replication_benchmark(
+                    configs,
+                    levels=["local", "remote_apply"],
+                    time=1,
+                    clients=2,
+                )
+
+                assert ([(r.standbys, r.synchronous_commit) for r in results] == [
+                    ("", "local"),
+                    ("", "remote_apply"),
+                    (str(configs[1]), "local"),
+                    (str(configs[1]), "remote_apply"),
+                    (str(configs[2]), "local"),
+                    (str(configs[2]), "remote_apply"),
+                ])
+
+                for r in results:
+                    assert (r.tps > 0)
+                    assert (r.latency_avg > 0)
+
+                # settings are reset, without a restart
+                assert (master.execute("show synchronous_standby_names") == [("", )])
+                assert (master.execute("show synchronous_commit") == [("on", )])
+
+                with pytest.raises(expected_exception=InvalidOperationException):
+                    master.sync_replication_benchmark([[replica1]])
+
+                master.set_synchronous_standbys(First(1, [replica1]), reload=True)
+                master.poll_query_until(
+                    "select sync_state = 'sync' from pg_stat_replication where application_name = 'replica1'",
+                    sleep_time=0.1,
+                )
+                res = master.execute("show synchronous_standby_names")
+                assert (res == [('1 ("replica1")', )])
+
     def test_backup_wrong_xlog_method(self, node_svc: PostgresNodeService):
         assert isinstance(node_svc, PostgresNodeService)
         with __class__.helper__get_node(node_svc) as node:
@@ -1922,6 +2469,181 @@ class TestTestgresCommon:
                 assert (res == [(i, i, )])
                 node1.execute('delete from test')
 
+    def test_logical_catchup_many(self, node_svc: PostgresNodeService):
+        assert isinstance(node_svc, PostgresNodeService)
+
+        current_version = get_pg_version2(node_svc.os_ops)
+
+        __class__.helper__skip_test_if_pg_version_is_not_ge(current_version, "10")
+
+        with __class__.helper__get_node(node_svc) as node1, \
+                __class__.helper__get_node(node_svc) as node2, \
+                __class__.helper__get_node(node_svc) as node3:
+            node1.init(allow_logical=True).start()
+            node2.init().start()
+            node3.init().start()
+
+            tables = ["t1", "t2", "t3"]
+
+            for t in tables:
+                create_table = "create table {} (x int primary key)".format(t)
+                node1.safe_psql(create_table)
+                node2.safe_psql(create_table)
+                node3.safe_psql(create_table)
+                node1.execute("insert into {} select generate_series(1, 1000)".format(t))
+                continue
+
+            subs = []
+            for t in tables:
+                pub = node1.publish("pub_" + t, tables=[t])
+                subs.append(node2.subscribe(pub, "sub2_" + t))
+                subs.append(node3.subscribe(pub, "sub3_" + t))
+                continue
+
+            # initial synchronization
+            LogicalCatchup(subs).wait()
+
+            for node in [node2, node3]:
+                for t in tables:
+                    assert (node.execute("select count(*) from {}".format(t)) == [(1000, )])
+                    continue
+                continue
+
+            for t in tables:
+                node1.execute("insert into {} values (0)".format(t))
+                continue
+
+            LogicalCatchup(subs, timeout=30).wait()
+
+            for node in [node2, node3]:
+                for t in tables:
+                    assert (node.execute("select count(*) from {}".format(t)) == [(1001, )])
+                    continue
+                continue
+
+            # a disabled subscription does not catch up
+            subs[0].disable()
+            node1.execute("insert into t1 values (-1)")
+
+            with pytest.raises(expected_exception=CatchUpException, match="sub2_t1"):
+                LogicalCatchup(subs, timeout=1).wait()
+
+            subs[0].enable()
+            LogicalCatchup(subs).wait()
+            assert (node2.execute("select count(*) from t1") == [(1002, )])
+
+    def test_publication_seed(self, node_svc: PostgresNodeService):
+        assert isinstance(node_svc, PostgresNodeService)
+
+        current_version = get_pg_version2(node_svc.os_ops)
+
+        __class__.helper__skip_test_if_pg_version_is_not_ge(current_version, "10")
+
+        with __class__.helper__get_node(node_svc) as node1, \
+                __class__.helper__get_node(node_svc) as node2, \
+                __class__.helper__get_node(node_svc) as node3:
+            node1.init(allow_logical=True).start()
+            node2.init().start()
+            node3.init().start()
+
+            node1.safe_psql(
+                "create table parent (id int primary key);"
+                "create table child (id int primary key, p int references parent);"
+                "insert into parent select generate_series(1, 1000);"
+                "insert into child select x, x from generate_series(1, 1000) x;")
+
+            pub = node1.publish("mypub")
+            assert (pub.tables() == ["public.child", "public.parent"])
+
+            # schema is cloned, data is preloaded by COPY
+            sub = pub.seed(node2, "mysub", jobs=2)
+            assert (node2.execute("select count(*) from parent") == [(1000, )])
+            assert (node2.execute("select count(*) from child") == [(1000, )])
+
+            # the subscription streams the changes after the snapshot
+            node1.execute("insert into parent values (0)")
+            sub.catchup()
+            assert (node2.execute("select count(*) from parent") == [(1001, )])
+
+            res = node2.execute("select count(*) from pg_subscription_rel where srsubstate <> 'r'")
+            assert (res == [(0, )])
+
+            # a slot created by seed is dropped on failure (no tables to copy into)
+            with pytest.raises(expected_exception=Exception, match="does not exist"):
+                pub.seed(node3, "mysub2", schema=False)
+
+            res = node1.execute("select slot_name from pg_replication_slots")
+            assert (res == [("mysub", )])
+
+            # a slot of another subscription is kept
+            with pytest.raises(expected_exception=Exception, match="already exists"):
+                pub.seed(node3, "mysub")
+
+            res = node1.execute("select slot_name from pg_replication_slots")
+            assert (res == [("mysub", )])
+
+            # the initial synchronization copies the data
+            sub3 = pub.seed(node3, "mysub3", schema=False, preload=False)
+            sub3.catchup()
+            assert (node3.execute("select count(*) from child") == [(1000, )])
+
+    def test_logical_stream(self, node_svc: PostgresNodeService):
+        assert isinstance(node_svc, PostgresNodeService)
+
+        current_version = get_pg_version2(node_svc.os_ops)
+
+        __class__.helper__skip_test_if_pg_version_is_not_ge(current_version, "11")
+
+        with __class__.helper__get_node(node_svc) as node:
+            node.init(allow_logical=True).start()
+            node.safe_psql("create table t (id int primary key, s text); create publication pub for table t")
+
+            streams = [node.logical_stream("s1", publications=["pub"], create_slot=True, batch_size=2)]
+
+            # test_decoding is a contrib module
+            try:
+                streams.append(node.logical_stream("s2", plugin="test_decoding", create_slot=True, batch_size=2))
+            except DatabaseError:
+                logging.warning("test_decoding is not available")
+
+            for i in range(3):
+                node.execute("insert into t values ({}, 'x''{}')".format(i, i))
+                continue
+
+            node.execute("update t set s = null where id = 1")
+            node.execute("delete from t where id = 2")
+            node.execute("truncate t")
+
+            for stream in streams:
+                with stream:
+                    changes = [c for c in stream if c.kind not in ("begin", "commit")]
+
+                    assert ([c.kind for c in changes] == ["insert"] * 3 + ["update", "delete", "truncate"])
+                    assert (changes[0].table == "public.t")
+                    assert (changes[1].new == {"id": "1", "s": "x'1"})
+                    assert (changes[3].new == {"id": "1", "s": None})
+                    assert (changes[4].old == {"id": "2"})
+                    assert (stream.transactions == 6)
+                    assert (stream.flushed_lsn is not None)
+                continue
+
+            # the delivered transactions are confirmed, the rest is read again
+            node.execute("insert into t values (10, 'a')")
+            node.execute("insert into t values (11, 'b')")
+
+            with node.logical_stream("s1", publications=["pub"]) as stream:
+                for c in stream:
+                    if c.kind == "commit":
+                        break
+                    continue
+
+            with node.logical_stream("s1", publications=["pub"]) as stream:
+                changes = [c for c in stream if c.kind == "insert"]
+                assert ([c.new["id"] for c in changes] == ["11"])
+
+            with pytest.raises(expected_exception=InvalidOperationException, match="Publications"):
+                node.logical_stream("s1")
+
     def test_logical_replication_fail(self, node_svc: PostgresNodeService):
         assert isinstance(node_svc, PostgresNodeService)
 
@@ -2045,6 +2767,30 @@ class TestTestgresCommon:
             out = proc.communicate()[0]
             assert (b'tps = ' in out)
 
+    def test_pgbench_result(self, node_svc: PostgresNodeService):
+        assert isinstance(node_svc, PostgresNodeService)
+
+        __class__.helper__skip_test_if_util_not_exist(node_svc.os_ops, "pgbench")
+
+        with __class__.helper__get_node(node_svc).init().start() as node:
+            node.pgbench_init(scale=1)
+
+            res = node.pgbench_result(time=2, progress=1, client=2, report_per_command=True)
+            assert (res.tps > 0)
+            assert (res.clients == 2)
+            assert (res.duration == 2)
+            assert (res.transactions > 0)
+            assert (res.failed == 0)
+            assert (res.latency_avg > 0)
+            assert (len(res.progress) >= 1)
+            assert (res.progress[0].time == 1.0)
+            assert (len(res.scripts) == 1)
+            assert (any(c.command.startswith("UPDATE pgbench_accounts") for c in res.scripts[0].commands))
+
+            # two runs are comparable
+            assert ("tps" in res.change(res))
+            assert (not res.is_regression(res))
+
     def test_unix_sockets(self, node_svc: PostgresNodeService):
         assert isinstance(node_svc, PostgresNodeService)
 
@@ -6,6 +6,7 @@ import pytest
 import psutil
 import platform
 import logging
+import time
 
 import src as testgres
 
@@ -13,6 +14,7 @@ from src import StartNodeException
 from src import ExecUtilException
 from src import NodeApp
 from src import NodeStatus
+from src import ProcessType
 from src import scoped_config
 from src import get_new_node
 from src import get_bin_path
@@ -305,6 +307,168 @@ class TestTestgresLocal:
             assert (node1.status() == NodeStatus.Running)
             assert (rm_carriage_returns(node1.safe_psql("SELECT 3;")) == b'3\n')
 
+    def test_port_lease_registry(self):
+        lease_port_manager = testgres.utils._lease_port_manager
+
+        with scoped_config(use_port_lease_registry=True):
+            with get_new_node() as node1, get_new_node() as node2:
+                assert (node1._should_free_port)
+                assert (node2._should_free_port)
+                assert (node1.port != node2.port)
+                assert (lease_port_manager.is_reserved(node1.port))
+                assert (lease_port_manager.is_reserved(node2.port))
+
+                node1.init().start()
+                node2.init().start()
+                assert (rm_carriage_returns(node1.safe_psql("SELECT 1;")) == b'1\n')
+                assert (rm_carriage_returns(node2.safe_psql("SELECT 2;")) == b'2\n')
+
+                port1 = node1.port
+                port2 = node2.port
+
+        assert (not lease_port_manager.is_reserved(port1))
+        assert (not lease_port_manager.is_reserved(port2))
+
+    def test_node_log(self):
+        with get_new_node().init().start() as node:
+            node.log.wait_for_log("database system is ready to accept connections", timeout=10)
+
+            node.log.mark()
+            node.psql("select 1/0")
+            m = node.log.wait_for_log(r"ERROR:\s+(division by zero)", timeout=10)
+            assert (m.groups == ("division by zero", ))
+
+            # next search starts after the found line
+            assert (node.log.search("division by zero") is None)
+
+            log_file = node.pg_log_file
+
+        assert (not os.path.exists(log_file))
+
+    def test_resource_sampler(self):
+        with get_new_node().init().start() as node:
+            with node.resource_sampler(interval=0.1) as sampler, node.connect() as con:
+                con.execute("create table t as select generate_series(1, 1000000) as x")
+                con.commit()
+                con.execute("checkpoint")
+                # a backend is sampled while it is alive
+                time.sleep(0.3)
+
+            summary = sampler.summary()
+            assert (ProcessType.Checkpointer in summary)
+            assert (summary[ProcessType.Checkpointer].max_rss > 0)
+            # backend of connection
+            assert (summary[ProcessType.Unknown].cpu_total > 0)
+
+            csv_file = os.path.join(node.base_dir, "resources.csv")
+            sampler.to_csv(csv_file)
+            with open(csv_file) as f:
+                assert (len(f.readlines()) == len(sampler.samples()) + 1)
+
+    def test_filesystem_backup(self):
+        with get_new_node().init(allow_streaming=True).start() as node:
+            node.execute("create table t as select generate_series(1, 1000) as x")
+
+            with node.backup(method=testgres.BackupMethod.Filesystem) as backup:
+                data_dir = os.path.join(backup.base_dir, "data")
+                assert (os.path.exists(os.path.join(data_dir, "backup_label")))
+                assert (not os.path.exists(os.path.join(data_dir, "postmaster.pid")))
+
+                with backup.spawn_primary(destroy=False).start() as node_copy:
+                    assert (node_copy.execute("select count(*) from t") == [(1000, )])
+                    node_copy.execute("insert into t values (0)")
+
+                with backup.spawn_replica(destroy=False).start() as replica:
+                    node.execute("insert into t values (1001)")
+                    replica.catchup()
+                    assert (replica.execute("select count(*) from t") == [(1001, )])
+
+                    # a running standby can't be copied this way
+                    with pytest.raises(expected_exception=testgres.BackupException, match="standby"):
+                        replica.backup(method=testgres.BackupMethod.Filesystem)
+
+            # changes of the copy are not visible in the source
+            assert (node.execute("select count(*) from t") == [(1001, )])
+
+            node.stop()
+
+            # a stopped node is just copied
+            with node.backup(method="filesystem") as backup:
+                with backup.spawn_primary().start() as node_copy:
+                    assert (node_copy.execute("select count(*) from t") == [(1001, )])
+
+    def test_backup_image(self):
+        with get_new_node().init(allow_streaming=True).start() as node:
+            node.execute("create table t as select generate_series(1, 1000) as x")
+
+            with node.backup() as backup:
+                replicas = [backup.spawn_replica("replica{}".format(i), destroy=False) for i in range(3)]
+
+                try:
+                    for replica in replicas:
+                        replica.start()
+
+                    node.execute("insert into t values (1001)")
+
+                    for replica in replicas:
+                        replica.catchup()
+                        assert (replica.execute("select count(*) from t") == [(1001, )])
+                finally:
+                    for replica in replicas:
+                        replica.cleanup()
+
+                # the image is not changed by its spawns
+                assert (backup._fast_copy is not None)
+                data_dir = os.path.join(backup.base_dir, "data")
+                assert (not os.path.exists(os.path.join(data_dir, "postmaster.pid")))
+
+                with backup.spawn_primary().start() as node_copy:
+                    assert (node_copy.execute("select count(*) from t") == [(1000, )])
+
+    def test_unix_socket_only(self):
+        with get_new_node(unix_socket_only=True) as node1, get_new_node(unix_socket_only=True) as node2:
+            assert (node1.port_manager is None)
+            assert (not node1._should_free_port)
+            assert (node1.host == node1.unix_socket_dir)
+            assert (node1.unix_socket_dir != node2.unix_socket_dir)
+            # nodes share a port number but not a socket directory
+            assert (node1.port == node2.port)
+
+            node1.init(allow_streaming=True).start()
+            node2.init().start()
+
+            assert (node1.execute("show listen_addresses") == [("", )])
+            assert (node2.execute("select 2") == [(2, )])
+            assert (os.path.exists(os.path.join(node1.unix_socket_dir, ".s.PGSQL.{}".format(node1.port))))
+
+            # psql, pgbench
+            node1.pgbench_init(scale=1)
+            assert (rm_carriage_returns(node1.safe_psql("select count(*) from pgbench_branches")) == b'1\n')
+
+            # pg_dump
+            node2.restore(filename=node1.dump())
+            assert (node2.execute("select count(*) from pgbench_branches") == [(1, )])
+
+            # pg_basebackup and streaming replication
+            with node1.replicate(checkpoint="fast") as replica:
+                assert (replica.unix_socket_dir is not None)
+                assert (replica.unix_socket_dir != node1.unix_socket_dir)
+
+                replica.start()
+                node1.execute("create table t as select 1 as v")
+                replica.catchup()
+                assert (replica.execute("select v from t") == [(1, )])
+
+                # the master is found on the same machine
+                assert (replica.source_walsender.pid in [p.pid for p in node1.auxiliary_processes])
+
+            socket_dir = node1.unix_socket_dir
+
+        assert (not os.path.exists(socket_dir))
+
+        with pytest.raises(expected_exception=testgres.InvalidOperationException):
+            get_new_node(unix_socket_only=True, host="127.0.0.1")
+
     def test_simple_with_bin_dir(self):
         with get_new_node() as node:
             node.init().start()
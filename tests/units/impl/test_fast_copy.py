@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from src.impl.fast_copy import FastCopy
+
+import os
+import tempfile
+
+
+class TestFastCopy:
+    # --------------------------------------------------------------------
+    def test_001__copy_tree(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            src = os.path.join(tmpdir, "src")
+            dst = os.path.join(tmpdir, "dst")
+
+            os.makedirs(os.path.join(src, "base", "1"))
+            os.makedirs(os.path.join(src, "pg_wal", "archive_status"))
+            os.makedirs(os.path.join(src, "empty"))
+
+            for i in range(10):
+                with open(os.path.join(src, "base", "1", str(i)), "wb") as f:
+                    f.write(bytes([i]) * (i * 1000))
+
+            with open(os.path.join(src, "pg_wal", "000000010000000000000001"), "wb") as f:
+                f.write(b"wal")
+
+            with open(os.path.join(src, "postmaster.pid"), "wb") as f:
+                f.write(b"123")
+
+            os.symlink("base", os.path.join(src, "link"))
+
+            copier = FastCopy(jobs=4)
+            copier.copy_tree(
+                src,
+                dst,
+                skip_contents=["pg_wal"],
+                skip=lambda path: path == "postmaster.pid",
+            )
+
+            for i in range(10):
+                with open(os.path.join(dst, "base", "1", str(i)), "rb") as f:
+                    assert f.read() == bytes([i]) * (i * 1000)
+
+            assert os.path.isdir(os.path.join(dst, "empty"))
+            assert os.listdir(os.path.join(dst, "pg_wal")) == []
+            assert not os.path.exists(os.path.join(dst, "postmaster.pid"))
+            assert os.readlink(os.path.join(dst, "link")) == "base"
+
+            assert copier.reflinked_files + copier.copied_files == 10
+            if copier.reflinked_files == 0:
+                assert copier.copied_bytes == sum(i * 1000 for i in range(10))
+        return
+
+    # --------------------------------------------------------------------
+    def test_002__copy_is_independent(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            src = os.path.join(tmpdir, "file1")
+            dst = os.path.join(tmpdir, "file2")
+
+            with open(src, "wb") as f:
+                f.write(b"a" * 8192)
+
+            for use_reflink in [True, False]:
+                copier = FastCopy(use_reflink=use_reflink, jobs=1)
+                copier.copy_file(src, dst)
+
+                if not use_reflink:
+                    assert not copier.use_reflink
+                    assert copier.copied_files == 1
+
+                # a write into the copy does not change the source
+                with open(dst, "r+b") as f:
+                    f.write(b"b")
+
+                with open(src, "rb") as f:
+                    assert f.read() == b"a" * 8192
+
+                os.remove(dst)
+        return
@@ -153,18 +153,67 @@ class TestFileLineReader:
         )
         return
 
+    # -------------------------------------------------------------------
+    def test_004__small_blocks(
+        self,
+        os_ops_descr: OsOpsDescr,
+    ):
+        assert type(os_ops_descr) is OsOpsDescr
+        assert isinstance(os_ops_descr.os_ops, OsOperations)
+
+        # multibyte characters are split between blocks
+        __class__.helper__player(
+            os_ops_descr,
+            __class__.sm_Steps001,
+            0,
+            read_block_size=1,
+        )
+        return
+
+    # -------------------------------------------------------------------
+    def test_005__read_lines(
+        self,
+        os_ops_descr: OsOpsDescr,
+    ):
+        assert type(os_ops_descr) is OsOpsDescr
+        os_ops = os_ops_descr.os_ops
+        assert isinstance(os_ops, OsOperations)
+
+        tmpdir = os_ops.mkdtemp()
+        filename = os_ops.build_path(tmpdir, "my.log")
+
+        C_LINES = ["line {} \u043c\u0430\n".format(i) for i in range(100)]
+
+        os_ops.write(filename, "".join(C_LINES).encode("utf-8") + b"tail", binary=True)
+
+        file_line_reader = FileLineReader(os_ops, filename, read_block_size=7)
+
+        assert file_line_reader.read_lines(30) == C_LINES[:30]
+        assert file_line_reader.read_lines(1) == C_LINES[30:31]
+        assert file_line_reader.read_lines(1000) == C_LINES[31:]
+        assert file_line_reader.read_lines(1000) == []
+
+        os_ops.write(filename, b" end\n", binary=True)
+        assert file_line_reader.read_lines(1000) == ["tail end\n"]
+        assert file_line_reader.read_line() is None
+
+        os_ops.rmdirs(tmpdir)
+        return
+
     # --------------------------------------------------------------------
     @staticmethod
     def helper__player(
         os_ops_descr: OsOpsDescr,
         steps: typing.List[tagStep],
         initial_pos: int,
+        read_block_size: int = FileLineReader._C_READ_BLOCK_SIZE,
     ):
         assert type(os_ops_descr) is OsOpsDescr
         assert isinstance(os_ops_descr.os_ops, OsOperations)
         assert type(steps) is list
         assert type(initial_pos) is int
         assert initial_pos >= 0
+        assert type(read_block_size) is int
 
         os_ops = os_ops_descr.os_ops
         assert isinstance(os_ops_descr.os_ops, OsOperations)
@@ -196,6 +245,7 @@ class TestFileLineReader:
                     filename,
                     file_encoding="utf-8",
                     file_pos=initial_pos,
+                    read_block_size=read_block_size,
                 )
 
             nRead = 0
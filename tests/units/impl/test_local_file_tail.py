@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from src.impl.local_file_tail import LocalFileTail
+
+import os
+import tempfile
+
+
+class TestLocalFileTail:
+    # --------------------------------------------------------------------
+    def test_001__lines(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            file_name = os.path.join(tmpdir, "postgresql.log")
+
+            with LocalFileTail(file_name) as tail:
+                # file does not exist yet
+                assert tail.read_lines() == []
+
+                with open(file_name, "wb") as f:
+                    f.write(b"abc\nde")
+                    f.flush()
+                    assert tail.read_lines() == ["abc\n"]
+                    assert tail.read_lines() == []
+
+                    f.write(b"f\n\xd0\xb0\xd0")
+                    f.flush()
+                    assert tail.read_lines() == ["def\n"]
+
+                    f.write(b"\xb1\n\n")
+                    f.flush()
+                    assert tail.read_lines() == ["аб\n", "\n"]
+        return
+
+    # --------------------------------------------------------------------
+    def test_002__rotation(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            file_name = os.path.join(tmpdir, "postgresql.log")
+
+            with open(file_name, "wb") as f:
+                f.write(b"line1\n")
+
+            with LocalFileTail(file_name) as tail:
+                assert tail.read_lines() == ["line1\n"]
+
+                with open(file_name, "ab") as f:
+                    f.write(b"line2\n")
+
+                os.rename(file_name, file_name + ".1")
+
+                # a new file is not created yet
+                assert tail.read_lines() == ["line2\n"]
+
+                with open(file_name, "wb") as f:
+                    f.write(b"line3\n")
+
+                assert tail.read_lines() == ["line3\n"]
+        return
+
+    # --------------------------------------------------------------------
+    def test_003__truncation(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            file_name = os.path.join(tmpdir, "postgresql.log")
+
+            with open(file_name, "wb") as f:
+                f.write(b"line1\nline2\n")
+
+            with LocalFileTail(file_name) as tail:
+                assert tail.read_lines() == ["line1\n", "line2\n"]
+
+                with open(file_name, "wb") as f:
+                    f.write(b"new\n")
+
+                assert tail.read_lines() == ["new\n"]
+        return
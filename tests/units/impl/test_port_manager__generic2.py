@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from ...helpers.global_data import OsOpsDescrs
+from ...helpers.global_data import OsOpsDescr
+from ...helpers.global_data import OsOperations
+
+from src.impl.port_manager__generic2 import PortManager__Generic2
+
+import pytest
+import typing
+import socket
+import threading
+
+
+class TestPortManager__Generic2:
+    sm_os_ops_descrs: typing.List[OsOpsDescr] = [
+        OsOpsDescrs.sm_local_os_ops_descr,
+        OsOpsDescrs.sm_remote_os_ops_descr
+    ]
+
+    @pytest.fixture(
+        params=[
+            pytest.param(
+                descr,
+                id=descr.sign,
+            )
+            for descr in sm_os_ops_descrs
+        ],
+    )
+    def os_ops_descr(self, request: pytest.FixtureRequest) -> OsOpsDescr:
+        assert isinstance(request, pytest.FixtureRequest)
+        assert isinstance(request.param, OsOpsDescr)
+        return request.param
+
+    # --------------------------------------------------------------------
+    def test_001__reserve_and_release(self, os_ops_descr: OsOpsDescr):
+        assert type(os_ops_descr) is OsOpsDescr
+        assert isinstance(os_ops_descr.os_ops, OsOperations)
+
+        port_manager = PortManager__Generic2(os_ops_descr.os_ops)
+
+        C_COUNT = 20
+
+        ports: typing.List[int] = []
+
+        try:
+            for _ in range(C_COUNT):
+                port = port_manager.reserve_port()
+                assert type(port) is int
+                assert port not in ports
+                ports.append(port)
+        finally:
+            for port in ports:
+                port_manager.release_port(port)
+
+        stats = port_manager.stats
+        assert type(stats) is PortManager__Generic2.Statistics
+        assert stats.reserve_count == C_COUNT
+        assert stats.release_count == C_COUNT
+        assert stats.probe_count >= C_COUNT
+        assert stats.probe_count == C_COUNT + stats.probe_failure_count + stats.lock_failure_count
+
+        # threads of parallel probes are not left behind
+        assert not any(t.name.startswith("testgres_port_probe") for t in threading.enumerate())
+        assert len(port_manager._reserved_ports) == 0
+        assert port_manager._port_states.count(PortManager__Generic2._C_PORT_IS_RESERVED) == 0
+        return
+
+    # --------------------------------------------------------------------
+    def test_002__busy_port_is_skipped(self):
+        os_ops = OsOpsDescrs.sm_local_os_ops_descr.os_ops
+        assert isinstance(os_ops, OsOperations)
+
+        port_manager = PortManager__Generic2(os_ops)
+
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.bind(("", 0))
+            busy_port = s.getsockname()[1]
+            assert type(busy_port) is int
+
+            if busy_port < PortManager__Generic2._C_MIN_PORT_NUMBER:
+                pytest.skip("OS gave a port {} out of range.".format(busy_port))
+
+            # Point the cursor to the busy port
+            port_manager._cursor = busy_port - PortManager__Generic2._C_MIN_PORT_NUMBER
+
+            port = port_manager.reserve_port()
+
+            try:
+                assert port != busy_port
+                assert port_manager.stats.probe_failure_count >= 1
+            finally:
+                port_manager.release_port(port)
+        return
+
+    # --------------------------------------------------------------------
+    def test_003__candidates_wrap_around(self):
+        os_ops = OsOpsDescrs.sm_local_os_ops_descr.os_ops
+        assert isinstance(os_ops, OsOperations)
+
+        port_manager = PortManager__Generic2(os_ops)
+
+        port_count = len(port_manager._port_states)
+        assert port_count == (
+            PortManager__Generic2._C_MAX_PORT_NUMBER - PortManager__Generic2._C_MIN_PORT_NUMBER + 1
+        )
+
+        port_manager._cursor = port_count - 2
+        port_manager._port_states[0] = PortManager__Generic2._C_PORT_IS_RESERVED
+
+        candidates = port_manager._get_candidates(4)
+
+        assert candidates == [
+            PortManager__Generic2._C_MAX_PORT_NUMBER - 1,
+            PortManager__Generic2._C_MAX_PORT_NUMBER,
+            PortManager__Generic2._C_MIN_PORT_NUMBER + 1,
+            PortManager__Generic2._C_MIN_PORT_NUMBER + 2,
+        ]
+
+        assert port_manager._cursor == 3
+
+        # all the ports are reserved
+        for i in range(port_count):
+            port_manager._port_states[i] = PortManager__Generic2._C_PORT_IS_RESERVED
+
+        assert port_manager._get_candidates(4) == []
+        assert port_manager._cursor == 3
+        return
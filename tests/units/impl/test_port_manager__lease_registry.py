@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from src.impl.port_manager__lease_registry import PortManager__LeaseRegistry
+
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import typing
+
+import psutil
+
+
+class TestPortManager__LeaseRegistry:
+    # --------------------------------------------------------------------
+    def test_001__reserve_and_release(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            registry_path = os.path.join(tmpdir, "leases.db")
+
+            port_manager = PortManager__LeaseRegistry(registry_path, block_size=4)
+
+            ports: typing.List[int] = []
+
+            for _ in range(6):
+                port = port_manager.reserve_port()
+                assert type(port) is int
+                assert port not in ports
+                assert port_manager.is_reserved(port)
+                ports.append(port)
+
+            # two blocks are leased
+            leases = __class__.helper__get_leases(registry_path)
+            assert len(leases) == 8
+            assert set(ports).issubset(leases.keys())
+            assert set(leases.values()) == {os.getpid()}
+
+            for port in ports:
+                port_manager.release_port(port)
+                assert not port_manager.is_reserved(port)
+
+            # released ports are still leased by this process
+            assert len(__class__.helper__get_leases(registry_path)) == 8
+
+            # released port is reused without a new lease
+            port = port_manager.reserve_port()
+            assert port in leases.keys()
+            assert len(__class__.helper__get_leases(registry_path)) == 8
+
+            port_manager.release_port(port)
+
+            port_manager.release_leases()
+            assert len(__class__.helper__get_leases(registry_path)) == 0
+        return
+
+    # --------------------------------------------------------------------
+    def test_002__two_managers_do_not_intersect(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            registry_path = os.path.join(tmpdir, "leases.db")
+
+            port_manager1 = PortManager__LeaseRegistry(registry_path, block_size=3)
+            port_manager2 = PortManager__LeaseRegistry(registry_path, block_size=3)
+
+            ports1 = [port_manager1.reserve_port() for _ in range(10)]
+            ports2 = [port_manager2.reserve_port() for _ in range(10)]
+
+            assert len(set(ports1)) == 10
+            assert len(set(ports2)) == 10
+            assert len(set(ports1).intersection(ports2)) == 0
+
+            for port in ports1:
+                port_manager1.release_port(port)
+            for port in ports2:
+                port_manager2.release_port(port)
+
+            port_manager1.release_leases()
+            port_manager2.release_leases()
+            assert len(__class__.helper__get_leases(registry_path)) == 0
+        return
+
+    # --------------------------------------------------------------------
+    def test_003__leases_of_dead_process_are_reclaimed(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            registry_path = os.path.join(tmpdir, "leases.db")
+
+            # the first manager creates the registry
+            port_manager = PortManager__LeaseRegistry(registry_path, block_size=2)
+            port = port_manager.reserve_port()
+
+            # this process waits for EOF of stdin
+            cmd = [sys.executable, "-c", "import sys; sys.stdin.read()"]
+
+            with subprocess.Popen(cmd, stdin=subprocess.PIPE) as proc:
+                dead_pid = proc.pid
+                dead_pid_start_time = psutil.Process(dead_pid).create_time()
+
+            assert not psutil.pid_exists(dead_pid)
+
+            C_DEAD_PORTS = [65001, 65002, 65003]
+
+            with sqlite3.connect(registry_path) as cn:
+                cn.executemany(
+                    "insert into port_lease (port, pid, pid_start_time) values (?, ?, ?)",
+                    [(p, dead_pid, dead_pid_start_time) for p in C_DEAD_PORTS if p != port],
+                )
+            cn.close()
+
+            assert dead_pid in __class__.helper__get_leases(registry_path).values()
+
+            # a new block is leased and dead leases are reclaimed
+            ports = [port_manager.reserve_port() for _ in range(2)]
+            assert dead_pid not in __class__.helper__get_leases(registry_path).values()
+
+            for p in ports + [port]:
+                port_manager.release_port(p)
+
+            port_manager.release_leases()
+        return
+
+    # --------------------------------------------------------------------
+    @staticmethod
+    def helper__get_leases(registry_path: str) -> typing.Dict[int, int]:
+        assert type(registry_path) is str
+
+        cn = sqlite3.connect(registry_path)
+        try:
+            return dict(cn.execute("select port, pid from port_lease").fetchall())
+        finally:
+            cn.close()
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+from ....helpers.global_data import OsOpsDescrs
+from ....helpers.global_data import OsOperations
+
+from src import logger as testgres_logger
+from src.impl.inotify import Inotify
+from src.impl.log_tail_service import LogTailService
+
+import logging
+import os
+import pytest
+import tempfile
+import threading
+import time
+import typing
+
+
+class TestSet001__run:
+    class tagHandler(logging.Handler):
+        def __init__(self):
+            super().__init__()
+            self.lines: typing.List[str] = []
+            self.event = threading.Event()
+
+        def emit(self, record):
+            self.lines.append(record.getMessage())
+            self.event.set()
+
+    # --------------------------------------------------------------------
+    def test_001__inotify(self):
+        if not Inotify.is_supported():
+            pytest.skip("inotify is not supported.")
+
+        os_ops = OsOpsDescrs.sm_local_os_ops_descr.os_ops
+        assert isinstance(os_ops, OsOperations)
+
+        C_NODE_NAME = "test_logger_inotify"
+
+        handler = __class__.tagHandler()
+        logging.getLogger(C_NODE_NAME).addHandler(handler)
+
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                file_name = os.path.join(tmpdir, "postgresql.log")
+
+                with open(file_name, "wb") as f:
+                    f.write(b"line1\n")
+
+                logger = testgres_logger.TestgresLogger(C_NODE_NAME, file_name, os_ops=os_ops)
+                assert not logger.is_alive()
+                logger.start()
+                assert logger.is_alive()
+
+                try:
+                    assert handler.event.wait(10)
+                    assert handler.lines == ["line1"]
+
+                    # a long quiet period does not delay the next line
+                    time.sleep(1)
+                    handler.event.clear()
+
+                    with open(file_name, "ab") as f:
+                        f.write(b"line2\n")
+
+                    assert handler.event.wait(5)
+                    assert handler.lines == ["line1", "line2"]
+
+                    # rotation
+                    os.rename(file_name, file_name + ".1")
+                    handler.event.clear()
+
+                    with open(file_name, "wb") as f:
+                        f.write(b"line3\n")
+
+                    assert handler.event.wait(5)
+                    assert handler.lines == ["line1", "line2", "line3"]
+
+                    # the last line is forwarded on stop
+                    with open(file_name, "ab") as f:
+                        f.write(b"line4\n")
+                finally:
+                    logger.stop()
+
+                assert not logger.is_alive()
+                assert handler.lines[-1] == "line4"
+        finally:
+            logging.getLogger(C_NODE_NAME).removeHandler(handler)
+        return
+
+    # --------------------------------------------------------------------
+    def test_002__one_thread_for_all(self):
+        os_ops = OsOpsDescrs.sm_local_os_ops_descr.os_ops
+        assert isinstance(os_ops, OsOperations)
+
+        C_COUNT = 10
+        C_NODE_NAME = "test_logger_one_thread_{}"
+
+        handlers = [__class__.tagHandler() for _ in range(C_COUNT)]
+
+        for i in range(C_COUNT):
+            logging.getLogger(C_NODE_NAME.format(i)).addHandler(handlers[i])
+
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                file_names = [os.path.join(tmpdir, "{}.log".format(i)) for i in range(C_COUNT)]
+
+                thread_count0 = threading.active_count()
+
+                loggers = [
+                    testgres_logger.TestgresLogger(C_NODE_NAME.format(i), file_names[i], os_ops=os_ops)
+                    for i in range(C_COUNT)
+                ]
+
+                try:
+                    for logger in loggers:
+                        logger.start()
+                        continue
+
+                    # at most one thread of service is started
+                    assert threading.active_count() <= thread_count0 + 1
+                    assert LogTailService.get_single_instance().thread is not None
+
+                    for i in range(C_COUNT):
+                        with open(file_names[i], "wb") as f:
+                            f.write("line of {}\n".format(i).encode())
+                        continue
+
+                    for i in range(C_COUNT):
+                        assert handlers[i].event.wait(10)
+                        assert handlers[i].lines == ["line of {}".format(i)]
+                        continue
+
+                    # a stopped logger does not get new lines
+                    loggers[0].stop()
+                    assert not loggers[0].is_alive()
+                    assert loggers[1].is_alive()
+
+                    for i in range(2):
+                        handlers[i].event.clear()
+                        with open(file_names[i], "ab") as f:
+                            f.write(b"next\n")
+                        continue
+
+                    assert handlers[1].event.wait(10)
+                    assert handlers[1].lines[-1] == "next"
+                    assert handlers[0].lines == ["line of 0"]
+                finally:
+                    for logger in loggers:
+                        logger.stop()
+                        continue
+
+                for logger in loggers:
+                    assert not logger.is_alive()
+                    continue
+        finally:
+            for i in range(C_COUNT):
+                logging.getLogger(C_NODE_NAME.format(i)).removeHandler(handlers[i])
+        return
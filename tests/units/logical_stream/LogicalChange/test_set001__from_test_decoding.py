@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from src.logical_stream import LogicalChange
+
+
+class TestSet001__from_test_decoding:
+    def test_001__begin_commit(self):
+        changes = LogicalChange.from_test_decoding("0/1", 700, "BEGIN 700")
+        assert len(changes) == 1
+        assert changes[0].kind == "begin"
+        assert changes[0].xid == 700
+
+        changes = LogicalChange.from_test_decoding("0/2", 700, "COMMIT 700")
+        assert len(changes) == 1
+        assert changes[0].kind == "commit"
+        assert changes[0].lsn == "0/2"
+        return
+
+    def test_002__insert(self):
+        data = "table public.t: INSERT: id[integer]:1 s[text]:'it''s a b' n[text]:null a[integer[]]:'{1,2}' \"A b\"[character varying]:x"
+        changes = LogicalChange.from_test_decoding("0/1", 700, data)
+        assert len(changes) == 1
+        assert changes[0].kind == "insert"
+        assert changes[0].table == "public.t"
+        assert changes[0].old is None
+        assert changes[0].new == {"id": "1", "s": "it's a b", "n": None, "a": "{1,2}", "A b": "x"}
+        return
+
+    def test_003__update_delete(self):
+        data = "table public.t: UPDATE: old-key: id[integer]:1 new-tuple: id[integer]:2 b[text]:unchanged-toast-datum"
+        change = LogicalChange.from_test_decoding("0/1", 700, data)[0]
+        assert change.kind == "update"
+        assert change.old == {"id": "1"}
+        assert change.new == {"id": "2"}
+
+        change = LogicalChange.from_test_decoding("0/1", 700, "table public.t: UPDATE: id[integer]:2")[0]
+        assert change.old is None
+        assert change.new == {"id": "2"}
+
+        change = LogicalChange.from_test_decoding("0/1", 700, "table public.t: DELETE: id[integer]:2")[0]
+        assert change.kind == "delete"
+        assert change.old == {"id": "2"}
+        assert change.new is None
+
+        change = LogicalChange.from_test_decoding("0/1", 700, "table public.t: DELETE: (no-tuple-data)")[0]
+        assert change.old is None
+        return
+
+    def test_004__truncate(self):
+        changes = LogicalChange.from_test_decoding("0/1", 700, "table public.a, public.b: TRUNCATE: (no-flags)")
+        assert [(c.kind, c.table) for c in changes] == [("truncate", "public.a"), ("truncate", "public.b")]
+        return
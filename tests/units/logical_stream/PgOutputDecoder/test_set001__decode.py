@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from src.logical_stream import PgOutputDecoder
+
+import struct
+
+
+def _relation(relid, nspname, relname, columns, keys):
+    data = b"R" + struct.pack(">I", relid) + nspname + b"\0" + relname + b"\0" + b"d" + struct.pack(">H", len(columns))
+    for name in columns:
+        data += (b"\1" if name in keys else b"\0") + name + b"\0" + struct.pack(">Ii", 23, -1)
+    return data
+
+
+def _tuple(values):
+    data = struct.pack(">H", len(values))
+    for v in values:
+        if v is None:
+            data += b"n"
+        elif v == b"u":
+            data += b"u"
+        else:
+            data += b"t" + struct.pack(">I", len(v)) + v
+    return data
+
+
+class TestSet001__decode:
+    def test_001__transaction(self):
+        decoder = PgOutputDecoder()
+
+        changes = decoder.decode("0/1", 0, b"B" + struct.pack(">QqI", 100, 0, 700))
+        assert len(changes) == 1
+        assert changes[0].kind == "begin"
+        assert changes[0].xid == 700
+
+        assert decoder.decode("0/2", 700, _relation(16384, b"public", b"t", [b"id", b"s"], [b"id"])) == []
+
+        changes = decoder.decode("0/3", 700, b"I" + struct.pack(">I", 16384) + b"N" + _tuple([b"1", None]))
+        assert changes[0].kind == "insert"
+        assert changes[0].table == "public.t"
+        assert changes[0].new == {"id": "1", "s": None}
+
+        changes = decoder.decode("0/4", 700, b"U" + struct.pack(">I", 16384) + b"K" + _tuple([b"1", None]) + b"N" + _tuple([b"2", b"u"]))
+        assert changes[0].kind == "update"
+        assert changes[0].old == {"id": "1"}
+        assert changes[0].new == {"id": "2"}
+
+        changes = decoder.decode("0/5", 700, b"D" + struct.pack(">I", 16384) + b"O" + _tuple([b"2", None]))
+        assert changes[0].kind == "delete"
+        assert changes[0].old == {"id": "2", "s": None}
+
+        changes = decoder.decode("0/6", 700, b"T" + struct.pack(">I", 1) + b"\0" + struct.pack(">I", 16384))
+        assert [(c.kind, c.table) for c in changes] == [("truncate", "public.t")]
+
+        changes = decoder.decode("0/7", 700, b"C" + struct.pack(">BQQq", 0, 100, 120, 0))
+        assert changes[0].kind == "commit"
+        assert changes[0].lsn == "0/7"
+        return
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from src import PostgresNode
+
+
+class TestSet003__format_setting_value:
+    def test_001__scalars(self):
+        assert PostgresNode._format_setting_value(True) == "on"
+        assert PostgresNode._format_setting_value(False) == "off"
+        assert PostgresNode._format_setting_value(8) == "8"
+        assert PostgresNode._format_setting_value(0.5) == "0.5"
+        assert PostgresNode._format_setting_value("8MB") == "E'8MB'"
+        assert PostgresNode._format_setting_value("it's") == "E'it\\'s'"
+        return
+
+    def test_002__list(self):
+        # each element is a separate literal (GUC_LIST_QUOTE parameters)
+        assert PostgresNode._format_setting_value(["plpgsql", "pg_stat_statements"]) == "E'plpgsql', E'pg_stat_statements'"
+        assert PostgresNode._format_setting_value(("s1", "public")) == "E's1', E'public'"
+        assert PostgresNode._format_setting_value([]) == "''"
+
+        # a str is one element even with commas
+        assert PostgresNode._format_setting_value("a,b") == "E'a,b'"
+        return
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+from ....helpers.global_data import OsOpsDescrs
+from ....helpers.global_data import OsOpsDescr
+from ....helpers.global_data import OsOperations
+
+from src.node import PostgresNode
+from src.node import PostgresNodeLogReader
+from src.node import PostgresNodeUtils
+
+import pytest
+import typing
+
+
+class TestSetM002__read:
+    sm_os_ops_descrs: typing.List[OsOpsDescr] = [
+        OsOpsDescrs.sm_local_os_ops_descr,
+        OsOpsDescrs.sm_remote_os_ops_descr
+    ]
+
+    @pytest.fixture(
+        params=[
+            pytest.param(
+                descr,
+                id=descr.sign,
+            )
+            for descr in sm_os_ops_descrs
+        ],
+    )
+    def os_ops_descr(self, request: pytest.FixtureRequest) -> OsOpsDescr:
+        assert isinstance(request, pytest.FixtureRequest)
+        assert isinstance(request.param, OsOpsDescr)
+        return request.param
+
+    def test_001__read(self, os_ops_descr: OsOpsDescr):
+        assert type(os_ops_descr) is OsOpsDescr
+        os_ops = os_ops_descr.os_ops
+        assert isinstance(os_ops, OsOperations)
+
+        node = __class__.helper__create_node(os_ops)
+        try:
+            os_ops.write(node.pg_log_file, b"old line\n", binary=True, truncate=True)
+
+            reader = PostgresNodeLogReader(node, from_beginnig=False)
+
+            os_ops.write(node.pg_log_file, b"line 1\nline 2\nline", binary=True)
+
+            blocks = reader.read()
+            assert len(blocks) == 1
+            assert blocks[0].file_name == node.pg_log_file
+            assert blocks[0].position == len(b"old line\n")
+            assert blocks[0].data == "line 1\nline 2\n"
+
+            # an incomplete line is returned when it is completed
+            os_ops.write(node.pg_log_file, b" 3\n", binary=True)
+
+            blocks = reader.read()
+            assert len(blocks) == 1
+            assert blocks[0].position == len(b"old line\nline 1\nline 2\n")
+            assert blocks[0].data == "line 3\n"
+
+            blocks = reader.read()
+            assert len(blocks) == 1
+            assert blocks[0].data == ""
+        finally:
+            os_ops.rmdirs(node.base_dir, ignore_errors=True)
+        return
+
+    def test_002__max_read_size(self, os_ops_descr: OsOpsDescr):
+        assert type(os_ops_descr) is OsOpsDescr
+        os_ops = os_ops_descr.os_ops
+        assert isinstance(os_ops, OsOperations)
+
+        node = __class__.helper__create_node(os_ops)
+        try:
+            C_LINE = b"0123456789\n"
+            C_COUNT = 1000
+
+            os_ops.write(node.pg_log_file, C_LINE * C_COUNT, binary=True, truncate=True)
+
+            reader = PostgresNodeLogReader(node, from_beginnig=True, max_read_size=1000)
+
+            total = 0
+            for _ in range(C_COUNT):
+                blocks = reader.read()
+                assert len(blocks) == 1
+                # an incomplete line of the previous call is added
+                assert len(blocks[0].data) <= 1000 + len(C_LINE)
+                total += len(blocks[0].data)
+                if total == len(C_LINE) * C_COUNT:
+                    break
+                continue
+
+            assert total == len(C_LINE) * C_COUNT
+        finally:
+            os_ops.rmdirs(node.base_dir, ignore_errors=True)
+        return
+
+    def test_003__read_line_batches(self, os_ops_descr: OsOpsDescr):
+        assert type(os_ops_descr) is OsOpsDescr
+        os_ops = os_ops_descr.os_ops
+        assert isinstance(os_ops, OsOperations)
+
+        node = __class__.helper__create_node(os_ops)
+        try:
+            lines = [("line {}\n".format(i)).encode() for i in range(25)]
+            os_ops.write(node.pg_log_file, b"".join(lines) + b"tail", binary=True, truncate=True)
+
+            reader = PostgresNodeLogReader(node, from_beginnig=True)
+
+            batches = list(reader.read_line_batches(max_lines=10))
+            assert [len(b.lines) for b in batches] == [10, 10, 5]
+            assert [x for b in batches for x in b.lines] == lines
+            assert batches[1].position == len(b"".join(lines[:10]))
+            assert batches[2].decode()[0] == "line 20\n"
+
+            assert list(reader.read_line_batches()) == []
+        finally:
+            os_ops.rmdirs(node.base_dir, ignore_errors=True)
+        return
+
+    def test_004__find_lines(self, os_ops_descr: OsOpsDescr):
+        assert type(os_ops_descr) is OsOpsDescr
+        os_ops = os_ops_descr.os_ops
+        assert isinstance(os_ops, OsOperations)
+
+        node = __class__.helper__create_node(os_ops)
+        try:
+            os_ops.write(node.pg_log_file, b"", binary=True, truncate=True)
+
+            reader = PostgresNodeLogReader(node, from_beginnig=True)
+            assert not PostgresNodeUtils.detect_port_conflict(reader)
+
+            os_ops.write(
+                node.pg_log_file,
+                b"aaa\nFATAL: x\nbbb FATAL: y FATAL\nLOG: Is another postmaster already running on port 5432?\n",
+                binary=True,
+            )
+
+            assert reader.find_lines([b"FATAL", b"bbb"]) == ["FATAL: x\n", "bbb FATAL: y FATAL\n"]
+            assert reader.find_lines([b"FATAL"]) == []
+
+            os_ops.write(node.pg_log_file, b"FATAL: Is another postmaster already running on port 5432?\n", binary=True)
+            assert PostgresNodeUtils.detect_port_conflict(reader)
+        finally:
+            os_ops.rmdirs(node.base_dir, ignore_errors=True)
+        return
+
+    @staticmethod
+    def helper__create_node(os_ops: OsOperations) -> PostgresNode:
+        assert isinstance(os_ops, OsOperations)
+        return PostgresNode(
+            base_dir=os_ops.mkdtemp(),
+            port=12345,
+            os_ops=os_ops,
+        )
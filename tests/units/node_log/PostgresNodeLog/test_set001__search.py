@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from src.node_log import PostgresNodeLog
+from src import TimeoutException
+
+import os
+import pytest
+import re
+import tempfile
+import threading
+import time
+
+
+class TestSet001__search:
+    # --------------------------------------------------------------------
+    def test_001__search_from_remembered_position(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            file_name = os.path.join(tmpdir, "postgresql.log")
+
+            with PostgresNodeLog(file_name) as log:
+                # file does not exist yet
+                assert log.search("LOG") is None
+                assert log.line_count == 0
+
+                with open(file_name, "wb") as f:
+                    f.write(b"LOG:  a 1\nERROR:  b 2\nLOG:  c 3\nLOG:  incompl")
+
+                assert log.line_count == 3
+                assert log.line(1) == "ERROR:  b 2"
+
+                m = log.search(r"^LOG:  (\w) (\d)$")
+                assert m is not None
+                assert m.line_number == 0
+                assert m.position == 0
+                assert m.line == "LOG:  a 1"
+                assert m.groups == ("a", "1")
+                assert log.position == len(b"LOG:  a 1\n")
+
+                m = log.search(re.compile("^log:", re.IGNORECASE))
+                assert m is not None
+                assert m.line_number == 2
+
+                # an incomplete line is not searched
+                assert log.search(b"incompl") is None
+
+                with open(file_name, "ab") as f:
+                    f.write(b"ete \xd0\xbc\xd0\xb0\n")
+
+                m = log.search("incomplete ма")
+                assert m is not None
+                assert m.line_number == 3
+                assert m.line == "LOG:  incomplete ма"
+
+                assert log.search("LOG") is None
+
+                # find_all does not move the position
+                assert [x.line_number for x in log.find_all("LOG", from_position=0)] == [0, 2, 3]
+                assert log.search("LOG") is None
+
+                log.position = 0
+                assert log.search("ERROR").line_number == 1
+        return
+
+    # --------------------------------------------------------------------
+    def test_002__mark_and_truncation(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            file_name = os.path.join(tmpdir, "postgresql.log")
+
+            with open(file_name, "wb") as f:
+                f.write(b"old line\n")
+
+            with PostgresNodeLog(file_name) as log:
+                assert log.mark() == len(b"old line\n")
+                assert log.search("old") is None
+
+                with open(file_name, "ab") as f:
+                    f.write(b"new line\n")
+
+                assert log.search("line").line == "new line"
+
+                # file is truncated
+                with open(file_name, "wb") as f:
+                    f.write(b"a\n")
+
+                assert log.line_count == 1
+                assert log.search("a").line_number == 0
+        return
+
+    # --------------------------------------------------------------------
+    def test_003__wait_for_log(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            file_name = os.path.join(tmpdir, "postgresql.log")
+
+            with open(file_name, "wb") as f:
+                f.write(b"first\n")
+
+            def LOCAL__writer():
+                time.sleep(0.5)
+                with open(file_name, "ab") as f:
+                    f.write(b"database system is ready\n")
+
+            with PostgresNodeLog(file_name) as log:
+                log.mark()
+
+                t = threading.Thread(target=LOCAL__writer)
+                t.start()
+
+                try:
+                    m = log.wait_for_log("system is ready", timeout=10)
+                finally:
+                    t.join()
+
+                assert m.line_number == 1
+
+                with pytest.raises(expected_exception=TimeoutException):
+                    log.wait_for_log("system is ready", timeout=0.3)
+        return
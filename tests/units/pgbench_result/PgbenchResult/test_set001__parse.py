@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from src.pgbench_result import PgbenchResult
+from src.exceptions import InvalidOperationException
+
+import math
+import pytest
+
+C_OUTPUT_16 = """pgbench (16.2)
+transaction type: <builtin: TPC-B (sort of)>
+scaling factor: 1
+query mode: simple
+number of clients: 2
+number of threads: 1
+maximum number of tries: 1
+duration: 2 s
+number of transactions actually processed: 4787
+number of failed transactions: 0 (0.000%)
+latency average = 0.832 ms
+latency stddev = 0.339 ms
+initial connection time = 6.157 ms
+tps = 2397.864113 (without initial connection time)
+statement latencies in milliseconds and failures:
+         0.001           0  \\set aid random(1, 100000 * :scale)
+         0.037           0  BEGIN;
+         0.114           0  UPDATE pgbench_accounts SET abalance = abalance + :delta WHERE aid = :aid;
+         0.190           0  END;
+"""
+
+C_PROGRESS_16 = """starting vacuum...end.
+progress: 1.0 s, 2240.9 tps, lat 0.886 ms stddev 0.287, 0 failed
+progress: 2.0 s, 2544.0 tps, lat 0.785 ms stddev 0.371, 0 failed
+"""
+
+C_OUTPUT_13 = """transaction type: <builtin: TPC-B (sort of)>
+scaling factor: 1
+query mode: simple
+number of clients: 1
+number of threads: 1
+number of transactions per client: 500
+number of transactions actually processed: 500/500
+latency average = 2.000 ms
+tps = 499.100000 (including connections establishing)
+tps = 500.200000 (excluding connections establishing)
+statement latencies in milliseconds:
+         0.002  \\set aid random(1, 100000 * :scale)
+         0.100  BEGIN;
+"""
+
+C_OUTPUT_SCRIPTS = """transaction type: multiple scripts
+scaling factor: 1
+query mode: simple
+number of clients: 1
+number of threads: 1
+duration: 1 s
+number of transactions actually processed: 3293
+number of failed transactions: 0 (0.000%)
+latency average = 0.303 ms
+initial connection time = 2.700 ms
+tps = 3296.596587 (without initial connection time)
+SQL script 1: <builtin: TPC-B (sort of)>
+ - weight: 2 (targets 66.7% of total)
+ - 2190 transactions (66.5% of total, tps = 2192.391900)
+ - number of failed transactions: 0 (0.000%)
+ - latency average = 0.422 ms
+ - latency stddev = 0.237 ms
+ - statement latencies in milliseconds and failures:
+         0.014           0  BEGIN;
+         0.154           0  END;
+SQL script 2: <builtin: select only>
+ - weight: 1 (targets 33.3% of total)
+ - 1103 transactions (33.5% of total, tps = 1104.204687)
+ - number of failed transactions: 0 (0.000%)
+ - latency average = 0.061 ms
+ - latency stddev = 0.044 ms
+ - statement latencies in milliseconds and failures:
+         0.060           0  SELECT abalance FROM pgbench_accounts WHERE aid = :aid;
+"""
+
+
+class TestSet001__parse:
+    def test_001__pg16(self):
+        res = PgbenchResult(C_OUTPUT_16, C_PROGRESS_16)
+        assert res.transaction_type == "<builtin: TPC-B (sort of)>"
+        assert res.scaling_factor == 1
+        assert res.query_mode == "simple"
+        assert res.clients == 2
+        assert res.threads == 1
+        assert res.duration == 2
+        assert res.transactions == 4787
+        assert res.failed == 0
+        assert res.latency_avg == 0.832
+        assert res.latency_stddev == 0.339
+        assert res.initial_connection_time == 6.157
+        assert res.tps == 2397.864113
+
+        assert [(i.time, i.tps, i.latency_avg, i.latency_stddev, i.failed) for i in res.progress] == [
+            (1.0, 2240.9, 0.886, 0.287, 0),
+            (2.0, 2544.0, 0.785, 0.371, 0),
+        ]
+
+        assert len(res.scripts) == 1
+        script = res.scripts[0]
+        assert script.name == res.transaction_type
+        assert script.transactions == 4787
+        assert script.tps == res.tps
+        assert [(c.latency, c.failures, c.command) for c in script.commands] == [
+            (0.001, 0, "\\set aid random(1, 100000 * :scale)"),
+            (0.037, 0, "BEGIN;"),
+            (0.114, 0, "UPDATE pgbench_accounts SET abalance = abalance + :delta WHERE aid = :aid;"),
+            (0.190, 0, "END;"),
+        ]
+        return
+
+    def test_002__pg13(self):
+        res = PgbenchResult(C_OUTPUT_13, "progress: 1.0 s, 498.0 tps, lat 2.005 ms stddev nan\n")
+        assert res.transactions == 500
+        assert res.tps == 500.2
+        assert res.duration is None
+        assert res.latency_stddev is None
+        assert res.initial_connection_time is None
+        assert res.progress[0].failed == 0
+        assert math.isnan(res.progress[0].latency_stddev)
+        assert [(c.latency, c.failures, c.command) for c in res.scripts[0].commands] == [
+            (0.002, None, "\\set aid random(1, 100000 * :scale)"),
+            (0.100, None, "BEGIN;"),
+        ]
+        return
+
+    def test_003__scripts(self):
+        res = PgbenchResult(C_OUTPUT_SCRIPTS)
+        assert res.transaction_type == "multiple scripts"
+        assert res.progress == []
+        assert [(s.name, s.weight, s.transactions, s.tps, s.latency_avg, s.latency_stddev) for s in res.scripts] == [
+            ("<builtin: TPC-B (sort of)>", 2, 2190, 2192.3919, 0.422, 0.237),
+            ("<builtin: select only>", 1, 1103, 1104.204687, 0.061, 0.044),
+        ]
+        assert [c.command for c in res.scripts[0].commands] == ["BEGIN;", "END;"]
+        assert [c.latency for c in res.scripts[1].commands] == [0.060]
+        return
+
+    def test_004__compare(self):
+        base = PgbenchResult(C_OUTPUT_16)
+        slow = PgbenchResult(C_OUTPUT_16.replace("tps = 2397.864113", "tps = 2000.0"))
+
+        change = slow.change(base)
+        assert abs(change["tps"] - (2000.0 / 2397.864113 - 1)) < 1e-9
+        assert change["latency_avg"] == 0
+        assert slow.is_regression(base)
+        assert not slow.is_regression(base, tolerance=0.2)
+        assert not base.is_regression(slow)
+        return
+
+    def test_005__unexpected(self):
+        with pytest.raises(expected_exception=InvalidOperationException, match="Unexpected output"):
+            PgbenchResult("pgbench: error: connection failed\n")
+        return
+
+    def test_006__to_csv(self, tmp_path):
+        res = PgbenchResult(C_OUTPUT_16, C_PROGRESS_16)
+        path = str(tmp_path / "progress.csv")
+        res.to_csv(path)
+
+        with open(path) as f:
+            lines = f.read().splitlines()
+
+        assert lines[0] == "time,tps,latency_avg,latency_stddev,failed,lag"
+        assert lines[1] == "1.0,2240.9,0.886,0.287,0,"
+        return
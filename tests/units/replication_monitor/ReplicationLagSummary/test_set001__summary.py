@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from src.replication_monitor import ReplicationLagStats
+from src.replication_monitor import ReplicationLagSummary
+from src.replication_monitor import ReplicationSample
+
+
+class TestSet001__summary:
+    def test_001__percentile(self):
+        stats = ReplicationLagStats([0.5] + [0.001] * 98 + [2.0])
+        assert stats.count == 100
+        assert stats.max == 2.0
+        assert stats.percentile(0) == 0.001
+        assert stats.percentile(0.5) == 0.001
+        assert stats.percentile(0.99) == 0.5
+        assert stats.percentile(1) == 2.0
+        assert abs(stats.mean - (0.098 + 2.5) / 100) < 1e-9
+
+        empty = ReplicationLagStats([])
+        assert empty.count == 0
+        assert empty.max == 0.0
+        assert empty.percentile(0.5) == 0.0
+        return
+
+    def test_002__summary(self):
+        C_MB = 1024 * 1024
+
+        samples = [
+            # replay_lag is NULL when a standby is idle
+            ReplicationSample(100.0, ("replica", "streaming", "async", C_MB, C_MB, C_MB, C_MB, C_MB, None, None, None)),
+            ReplicationSample(101.0, ("replica", "streaming", "async", 5 * C_MB, 4 * C_MB, 3 * C_MB, 3 * C_MB, 2 * C_MB, 0.1, 0.2, 0.3)),
+            ReplicationSample(102.0, ("replica", "streaming", "async", 5 * C_MB, 5 * C_MB, 5 * C_MB, 5 * C_MB, 5 * C_MB, 0.0, 0.0, 0.1)),
+        ]
+
+        assert samples[0].replay_lag == 0.0
+        assert samples[1].sent_lag_bytes == C_MB
+        assert samples[1].flush_lag_bytes == 2 * C_MB
+        assert samples[1].replay_lag_bytes == 3 * C_MB
+
+        summary = ReplicationLagSummary("replica", samples)
+        assert summary.sample_count == 3
+        assert summary.replay_lag.max == 0.3
+        assert summary.replay_lag.percentile(0.5) == 0.1
+        assert summary.replay_lag_bytes.max == 3 * C_MB
+        assert summary.sent_lag_bytes.max == C_MB
+
+        # 4MB are replayed during 2 seconds
+        assert summary.replay_rate == 2 * C_MB
+        return
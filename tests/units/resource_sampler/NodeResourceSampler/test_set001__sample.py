@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+from src.node import ProcessProxy
+from src.node import ProcessTreeSnapshot
+from src.resource_sampler import NodeResourceSampler
+from src.resource_sampler import ResourceSample
+from src.resource_sampler import ResourceSummary
+from src import ProcessType
+from src import InvalidOperationException
+
+import io
+import os
+import psutil
+import pytest
+import subprocess
+import sys
+import time
+import typing
+
+
+class TestSet001__sample:
+    class tagFakeNode:
+        children: typing.List[ProcessProxy]
+        is_running: bool
+
+        def __init__(self):
+            self.children = []
+            self.is_running = True
+
+        def process_snapshot(self) -> ProcessTreeSnapshot:
+            if not self.is_running:
+                raise InvalidOperationException("Node is not running.")
+            return ProcessTreeSnapshot(os.getpid(), list(self.children))
+
+    # --------------------------------------------------------------------
+    def test_001__sample(self):
+        C_BUSY_LOOP = "import time\ntime.sleep(0.5)\nt = time.process_time() + 0.3\nwhile time.process_time() < t: pass\ntime.sleep(60)\n"
+
+        node = __class__.tagFakeNode()
+
+        with subprocess.Popen([sys.executable, "-c", C_BUSY_LOOP]) as p1, \
+                subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"]) as p2:
+            try:
+                node.children = [
+                    ProcessProxy(psutil.Process(p1.pid), ProcessType.Checkpointer),
+                    ProcessProxy(psutil.Process(p2.pid), ProcessType.Unknown),
+                ]
+
+                sampler = NodeResourceSampler(node, interval=0.1, capacity=100)
+
+                samples = sampler.sample()
+                assert len(samples) == 2
+                assert all(type(s) is ResourceSample for s in samples)
+
+                # the first sample is a baseline
+                assert all(s.cpu_user == 0.0 and s.cpu_system == 0.0 for s in samples)
+                assert all(s.read_bytes == 0 and s.write_bytes == 0 for s in samples)
+
+                cpu_times = psutil.Process(p1.pid).cpu_times()
+                cpu_total0 = cpu_times.user + cpu_times.system
+
+                # wait for the busy loop
+                for _ in range(200):
+                    cpu_times = psutil.Process(p1.pid).cpu_times()
+                    if cpu_times.user + cpu_times.system >= cpu_total0 + 0.25:
+                        break
+                    time.sleep(0.05)
+                    continue
+
+                samples = sampler.sample()
+                samples = {s.ptype: s for s in samples}
+                assert samples[ProcessType.Checkpointer].process_count == 1
+                assert samples[ProcessType.Checkpointer].rss > 0
+                assert samples[ProcessType.Unknown].rss > 0
+
+                summary = sampler.summary()
+                assert type(summary[ProcessType.Checkpointer]) is ResourceSummary
+                assert summary[ProcessType.Checkpointer].sample_count == 2
+                assert summary[ProcessType.Checkpointer].cpu_total >= 0.25
+                assert summary[ProcessType.Unknown].cpu_total < 0.25
+
+                # a finished process is skipped
+                p2.kill()
+                p2.wait()
+                samples = sampler.sample()
+                assert [s.ptype for s in samples] == [ProcessType.Checkpointer]
+
+                # a stopped node gives nothing
+                node.is_running = False
+                assert sampler.sample() == []
+            finally:
+                p1.kill()
+                p2.kill()
+        return
+
+    def test_002__new_process(self):
+        C_BUSY_LOOP = "import time\nt = time.process_time() + 0.2\nwhile time.process_time() < t: pass\ntime.sleep(60)\n"
+
+        node = __class__.tagFakeNode()
+
+        with subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"]) as p1:
+            try:
+                node.children = [ProcessProxy(psutil.Process(p1.pid), ProcessType.Checkpointer)]
+
+                sampler = NodeResourceSampler(node, interval=0.1, capacity=100)
+                sampler.sample()
+
+                with subprocess.Popen([sys.executable, "-c", C_BUSY_LOOP]) as p2:
+                    try:
+                        for _ in range(200):
+                            cpu_times = psutil.Process(p2.pid).cpu_times()
+                            if cpu_times.user + cpu_times.system >= 0.2:
+                                break
+                            time.sleep(0.05)
+                            continue
+
+                        node.children.append(ProcessProxy(psutil.Process(p2.pid), ProcessType.Unknown))
+
+                        # a process started after the previous sample is counted from zero
+                        samples = {s.ptype: s for s in sampler.sample()}
+                        assert samples[ProcessType.Unknown].cpu_user + samples[ProcessType.Unknown].cpu_system >= 0.2
+                    finally:
+                        p2.kill()
+            finally:
+                p1.kill()
+        return
+
+    def test_003__ring_buffer_and_csv(self):
+        node = __class__.tagFakeNode()
+
+        with subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"]) as p:
+            try:
+                node.children = [ProcessProxy(psutil.Process(p.pid), ProcessType.WalWriter)]
+
+                sampler = NodeResourceSampler(node, interval=0.01, capacity=3, with_pss=True)
+
+                with sampler:
+                    assert sampler.is_alive()
+                    time.sleep(0.3)
+
+                assert not sampler.is_alive()
+
+                samples = sampler.samples()
+                assert len(samples) == 3
+                assert samples[0].timestamp <= samples[-1].timestamp
+                assert sampler.samples(ProcessType.Checkpointer) == []
+
+                f = io.StringIO()
+                sampler.to_csv(f)
+                lines = f.getvalue().splitlines()
+                assert len(lines) == 4
+                assert lines[0] == "timestamp,ptype,process_count,cpu_user,cpu_system,rss,pss,read_bytes,write_bytes"
+                assert lines[1].split(",")[1] == "wal writer"
+            finally:
+                p.kill()
+        return
+
+    def test_004__bad_args(self):
+        node = __class__.tagFakeNode()
+
+        with pytest.raises(expected_exception=InvalidOperationException):
+            NodeResourceSampler(node, interval=0)
+
+        with pytest.raises(expected_exception=InvalidOperationException):
+            NodeResourceSampler(node, capacity=0)
+        return
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from src.stats_profile import StatsProfile
+
+
+class TestSet001__split_list_setting:
+    def test_001__split(self):
+        assert StatsProfile._split_list_setting("") == []
+        assert StatsProfile._split_list_setting("plpgsql") == ["plpgsql"]
+        assert StatsProfile._split_list_setting("plpgsql, pg_stat_statements") == ["plpgsql", "pg_stat_statements"]
+
+        # a quoted element may contain commas
+        assert StatsProfile._split_list_setting('"a,b", c') == ["a,b", "c"]
+        assert StatsProfile._split_list_setting('"a""b"') == ['a"b']
+        return
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from ....helpers.global_data import OsOpsDescrs
+from ....helpers.global_data import OsOpsDescr
+from ....helpers.global_data import OsOperations
+
+from src.structured_log import StructuredLogReader
+from src.enums import LogFormat
+
+import datetime
+import pytest
+import typing
+
+
+class TestSet001__read:
+    sm_os_ops_descrs: typing.List[OsOpsDescr] = [
+        OsOpsDescrs.sm_local_os_ops_descr,
+        OsOpsDescrs.sm_remote_os_ops_descr
+    ]
+
+    @pytest.fixture(
+        params=[
+            pytest.param(
+                descr,
+                id=descr.sign,
+            )
+            for descr in sm_os_ops_descrs
+        ],
+    )
+    def os_ops_descr(self, request: pytest.FixtureRequest) -> OsOpsDescr:
+        assert isinstance(request, pytest.FixtureRequest)
+        assert isinstance(request.param, OsOpsDescr)
+        return request.param
+
+    # --------------------------------------------------------------------
+    C_JSON_DATA = (
+        b'{"timestamp":"2026-10-19 10:00:00.123 UTC","pid":100,"error_severity":"LOG",'
+        b'"message":"database system is ready to accept connections","backend_type":"postmaster"}\n'
+        b'{"timestamp":"2026-10-19 10:00:01.000 UTC","user":"test","pid":101,"error_severity":"ERROR",'
+        b'"state_code":"22012","message":"division by zero","backend_type":"client backend"}\n'
+        b'{"timestamp":"2026-10-19 10:00:02.000 UTC","pid":102,"error_severity":"LOG",'
+        b'"message":"text with \\"error_severity\\":\\"ERROR\\"","backend_type":"client backend"}\n'
+    )
+
+    C_CSV_DATA = (
+        b'2026-10-19 10:00:00.123 UTC,,,100,,1.1,1,,2026-10-19 10:00:00 UTC,,0,LOG,00000,'
+        b'"database system is ready to accept connections",,,,,,,,,"","postmaster",,0\n'
+        b'2026-10-19 10:00:01.000 UTC,"test","postgres",101,"[local]",1.2,1,"SELECT",'
+        b'2026-10-19 10:00:00 UTC,3/2,0,ERROR,22012,"division by zero",,,,,,'
+        b'"select 1/0;\nselect ""x"";",,,"psql","client backend",,0\n'
+        b'2026-10-19 10:00:02.000 UTC,,,102,,1.3,1,,2026-10-19 10:00:00 UTC,,0,LOG,00000,'
+        b'"text with ,ERROR,",,,,,,,,,"","client backend",,0\n'
+    )
+
+    # --------------------------------------------------------------------
+    @pytest.mark.parametrize(
+        "log_format,data",
+        [(LogFormat.Json, C_JSON_DATA), (LogFormat.Csv, C_CSV_DATA)],
+        ids=["json", "csv"],
+    )
+    def test_001__read(self, os_ops_descr: OsOpsDescr, log_format: LogFormat, data: bytes):
+        assert type(os_ops_descr) is OsOpsDescr
+        os_ops = os_ops_descr.os_ops
+        assert isinstance(os_ops, OsOperations)
+
+        tmpdir = os_ops.mkdtemp()
+        filename = os_ops.build_path(tmpdir, "postgresql.log")
+
+        try:
+            # file does not exist yet
+            reader = StructuredLogReader(os_ops, filename, log_format, read_block_size=17)
+            assert list(reader.read()) == []
+
+            # the last record is not complete
+            os_ops.write(filename, data[:-5], binary=True)
+
+            records = list(reader.read())
+            assert len(records) == 2
+
+            r = records[1]
+            assert r.timestamp == datetime.datetime(2026, 10, 19, 10, 0, 1)
+            assert r.pid == 101
+            assert r.severity == "ERROR"
+            assert r.sqlstate == "22012"
+            assert r.message == "division by zero"
+
+            if log_format == LogFormat.Csv:
+                assert r.fields["query"] == 'select 1/0;\nselect "x";'
+
+            os_ops.write(filename, data[-5:], binary=True)
+
+            records = list(reader.read())
+            assert len(records) == 1
+            assert records[0].pid == 102
+
+            # filters
+            reader = StructuredLogReader(os_ops, filename, log_format)
+            records = list(reader.read(severities=["ERROR", "PANIC"]))
+            assert [r.pid for r in records] == [101]
+
+            reader = StructuredLogReader(os_ops, filename, log_format)
+            records = list(reader.read(pids=[100, 102]))
+            assert [r.pid for r in records] == [100, 102]
+        finally:
+            os_ops.rmdirs(tmpdir)
+        return
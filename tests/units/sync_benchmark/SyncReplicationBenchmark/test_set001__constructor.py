@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from src.sync_benchmark import SyncReplicationBenchmark
+from src.utils import PgVer
+from src import First
+from src import Any
+from src import InvalidOperationException
+
+import pytest
+
+
+class TestSet001__constructor:
+    class tagFakeNode:
+        def __init__(self, version: str):
+            self.version = PgVer(version)
+
+    # --------------------------------------------------------------------
+    def test_001__any_requires_pg10(self):
+        node = __class__.tagFakeNode("9.6")
+
+        SyncReplicationBenchmark(node, [None, First(1, [])])
+
+        with pytest.raises(expected_exception=InvalidOperationException, match="PostgreSQL 10"):
+            SyncReplicationBenchmark(node, [None, Any(1, [])])
+
+        SyncReplicationBenchmark(__class__.tagFakeNode("10"), [Any(1, [])])
+        return
+
+    def test_002__bad_args(self):
+        node = __class__.tagFakeNode("16")
+
+        with pytest.raises(expected_exception=InvalidOperationException):
+            SyncReplicationBenchmark(__class__.tagFakeNode("9.5"), [None])
+
+        with pytest.raises(expected_exception=InvalidOperationException):
+            SyncReplicationBenchmark(node, [])
+
+        with pytest.raises(expected_exception=InvalidOperationException):
+            SyncReplicationBenchmark(node, ["FIRST 1 (r1)"])
+        return
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from src.tracing import Tracer
+from src.tracing import trace_span
+from src.tracing import traced
+from src import scoped_config
+
+import io
+import json
+import pytest
+import threading
+
+
+class TestSet001__span:
+    def test_001__span(self):
+        tracer = Tracer()
+
+        with tracer.span("outer", node="node1", x=1):
+            with tracer.span("inner"):
+                pass
+            with tracer.span("inner", node="node2"):
+                pass
+
+        spans = tracer.spans()
+        assert [s.name for s in spans] == ["inner", "inner", "outer"]
+
+        # a node name is inherited from the enclosing span
+        assert spans[0].args == {"node": "node1"}
+        assert spans[1].args == {"node": "node2"}
+        assert spans[2].args == {"node": "node1", "x": 1}
+
+        assert spans[2].duration >= spans[0].duration + spans[1].duration
+        assert spans[2].start <= spans[0].start
+        assert spans[0].tid == threading.get_ident()
+
+        assert tracer.spans("outer") == [spans[2]]
+
+        h = tracer.histograms()
+        assert h["inner"].count == 2
+        assert h["outer"].count == 1
+        assert h["inner"].total == spans[0].duration + spans[1].duration
+        return
+
+    def test_002__span_on_exception(self):
+        tracer = Tracer()
+
+        with pytest.raises(expected_exception=ZeroDivisionError):
+            with tracer.span("failed", node="node1"):
+                1 / 0
+
+        assert [s.name for s in tracer.spans()] == ["failed"]
+
+        # the stack is clean
+        with tracer.span("next"):
+            pass
+
+        assert tracer.spans("next")[0].args == {}
+        return
+
+    def test_003__histogram(self):
+        h = Tracer.Histogram("op")
+        assert h.percentile(0.5) == 0.0
+
+        for _ in range(90):
+            h.add(0.001)
+
+        for _ in range(10):
+            h.add(1.0)
+
+        assert h.count == 100
+        assert h.min == 0.001
+        assert h.max == 1.0
+        assert abs(h.mean - 0.1009) < 1e-9
+
+        # upper bounds of buckets
+        assert 0.001 <= h.percentile(0.5) < 0.002
+        assert 1.0 == h.percentile(0.99)
+        assert h.percentile(1) == 1.0
+        return
+
+    def test_004__max_spans(self):
+        tracer = Tracer(max_spans=2)
+
+        for _ in range(5):
+            with tracer.span("op"):
+                pass
+
+        assert len(tracer.spans()) == 2
+        assert tracer.dropped_spans == 3
+        assert tracer.histograms()["op"].count == 5
+
+        tracer.reset()
+        assert tracer.spans() == []
+        assert tracer.histograms() == {}
+        return
+
+    def test_005__export(self):
+        tracer = Tracer()
+
+        with tracer.span("op", node="node1", args=["pg_ctl", "start"]):
+            pass
+
+        f = io.StringIO()
+        tracer.export_json(f)
+        data = json.loads(f.getvalue())
+        assert data["spans"][0]["name"] == "op"
+        assert data["spans"][0]["args"] == {"node": "node1", "args": ["pg_ctl", "start"]}
+        assert data["histograms"]["op"]["count"] == 1
+
+        f = io.StringIO()
+        tracer.export_chrome_trace(f)
+        data = json.loads(f.getvalue())
+        event = data["traceEvents"][0]
+        assert event["name"] == "op"
+        assert event["ph"] == "X"
+        assert event["dur"] >= 0
+        assert event["args"]["node"] == "node1"
+        return
+
+    def test_006__disabled(self):
+        tracer = Tracer.get_single_instance()
+        tracer.reset()
+
+        @traced("func")
+        def func():
+            return 1
+
+        with scoped_config(use_tracing=False):
+            with trace_span("op"):
+                pass
+            assert func() == 1
+
+        assert tracer.spans() == []
+
+        with scoped_config(use_tracing=True):
+            with trace_span("op"):
+                pass
+            assert func() == 1
+
+        assert [s.name for s in tracer.spans()] == ["op", "func"]
+        tracer.reset()
+        return